@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -7,17 +8,89 @@ class Settings(BaseSettings):
     llm_model: str = "meta-llama/llama-3.1-8b-instruct"
     chroma_db_path: str = "./chroma_db"
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
+    bm25_index_path: str = "./bm25_index"
+
+    # Embedding model for collections and queries ("all-MiniLM-L6-v2" = ChromaDB's
+    # bundled ONNX model; others load via sentence-transformers and need re-ingestion)
+    embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_batch_size: int = 32
+    embedding_num_threads: int = 0
+    embedding_query_cache_size: int = 4096
 
     # RAG pipeline settings
     rag_top_k: int = 5
     hybrid_search_top_k: int = 20
     rrf_k: int = 60
 
+    # Concurrency: threads for blocking retrieval work, and how long
+    # collection sizes are cached before asking ChromaDB again
+    retrieval_max_workers: int = 8
+    collection_count_ttl_seconds: float = 30.0
+
     # Feature flags
     enable_query_rewrite: bool = True
     enable_hybrid_search: bool = True
     enable_reranker: bool = True
 
+    # "sequential": rewrite, then retrieve. "fanout": retrieve on the raw
+    # message immediately while rewrite/HyDE run, fusing every variant that
+    # finishes within variant_timeout_seconds.
+    retrieval_mode: Literal["sequential", "fanout"] = "sequential"
+    enable_hyde: bool = True
+    variant_timeout_seconds: float = 2.0
+
+    # Per-request latency budget: skip or cut short rewrite/rerank when their
+    # recent p95 latency doesn't fit in what's left (requests may override);
+    # a fraction of requests runs them anyway to notice when they speed up
+    enable_latency_budget: bool = False
+    latency_budget_ms: int = 3000
+    latency_budget_probe_rate: float = 0.05
+
+    # Semantic retrieval cache (query embedding → final reranked chunk ids)
+    enable_semantic_cache: bool = False
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_near_miss_threshold: float = 0.85
+    semantic_cache_max_entries: int = 1024
+    semantic_cache_ttl_seconds: float = 3600.0
+
+    # Exact-match cache for non-streaming completions (SQLite, shared across processes)
+    enable_llm_cache: bool = False
+    llm_cache_path: str = "./llm_cache.sqlite3"
+    llm_cache_max_entries: int = 50_000
+
+    # Local cross-encoder: "fp32", or "int8" (dynamically quantized, CPU only);
+    # intra-op threads (0 = torch default) and max tokens per (query, document) pair
+    reranker_backend: Literal["fp32", "int8"] = "fp32"
+    reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_num_threads: int = 0
+    reranker_max_length: int = 512
+
+    # Micro-batch local cross-encoder pairs across concurrent requests
+    enable_rerank_batching: bool = True
+    rerank_max_batch_size: int = 128
+    rerank_max_wait_ms: float = 5.0
+    rerank_predict_batch_size: int = 32
+
+    # LRU cache of cross-encoder scores per (normalized query, chunk id)
+    enable_rerank_cache: bool = True
+    rerank_cache_max_entries: int = 100_000
+
+    # Sampling profiler for /api/chat: keeps a profile of profile_sample_rate of
+    # requests and of any request slower than profile_slow_ms (newest
+    # profile_max_files in profile_dir, listed at /api/admin/profiles)
+    enable_profiling: bool = False
+    profile_sample_rate: float = 0.01
+    profile_slow_ms: float = 5000.0
+    profile_interval_ms: float = 10.0
+    profile_dir: str = "./profiles"
+    profile_max_files: int = 200
+
+    # Debug mode: attach each request's stage timings and token usage to the sources event
+    debug: bool = False
+
+    # Bearer token for /api/admin/*; when empty those routes are only served in debug mode
+    admin_token: str = ""
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
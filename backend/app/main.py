@@ -1,8 +1,27 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import chat, personas
+from app.config import get_settings
+from app.routers import admin, chat, metrics, personas
+from app.services.bm25_index import preload_indexes
+from app.services.embeddings import get_embedding_function
+from app.services.executor import shutdown_executor
+from app.services.rag import list_personas
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model and map BM25 indexes into memory before
+    # serving the first chat request
+    get_embedding_function().load()
+    if get_settings().enable_hybrid_search:
+        preload_indexes([p["id"] for p in list_personas()])
+    yield
+    shutdown_executor()
+
 
-app = FastAPI(title="AI Talk With You", version="0.1.0")
+app = FastAPI(title="AI Talk With You", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +33,8 @@ app.add_middleware(
 
 app.include_router(personas.router)
 app.include_router(chat.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
 
 
 @app.get("/api/health")
@@ -10,6 +10,7 @@ class ChatRequest(BaseModel):
     persona_id: str
     message: str
     conversation_history: list[ChatMessage] = []
+    latency_budget_ms: int | None = None  # overrides LATENCY_BUDGET_MS for this request
 
 
 class Citation(BaseModel):
@@ -0,0 +1,69 @@
+import re
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.config import get_settings
+from app.services.embeddings import get_embedding_function
+from app.services.profiler import PROFILE_ID_PATTERN, list_profiles, load_profile
+from app.services.rerank_batcher import batcher_stats
+from app.services.rerank_cache import score_cache_stats
+from app.services.semantic_cache import semantic_cache_stats
+
+
+def require_admin(authorization: str | None = Header(None)):
+    """Admin routes need `Authorization: Bearer <ADMIN_TOKEN>`; without a
+    token configured they are only served in debug mode."""
+    settings = get_settings()
+    if not settings.admin_token:
+        if not settings.debug:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/api/admin/cache")
+async def cache_stats():
+    return {
+        "semantic_cache": semantic_cache_stats(),
+        "query_embeddings": get_embedding_function().stats(),
+    }
+
+
+@router.get("/api/admin/reranker")
+async def reranker_stats():
+    """Cross-encoder batching and score cache metrics (null until first used)."""
+    return {"batching": batcher_stats(), "score_cache": score_cache_stats()}
+
+
+@router.get("/api/admin/profiles")
+def profiles(
+    limit: int = Query(20, ge=1, le=500),
+    reason: str | None = Query(None, pattern="^(slow|sampled)$"),
+):
+    """Recent request profiles, newest first (stacks omitted; fetch one by id)."""
+    settings = get_settings()
+    return {
+        "enabled": settings.enable_profiling,
+        "slow_ms": settings.profile_slow_ms,
+        "sample_rate": settings.profile_sample_rate,
+        "profiles": list_profiles(limit, reason),
+    }
+
+
+@router.get("/api/admin/profiles/{profile_id}")
+def profile(profile_id: str, format: str = Query("json", pattern="^(json|folded)$")):
+    """One profile; `format=folded` returns just the stacks, for flamegraph.pl or speedscope."""
+    if not re.match(PROFILE_ID_PATTERN, profile_id):
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    data = load_profile(profile_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    if format == "folded":
+        return PlainTextResponse("\n".join(data.get("folded", [])) + "\n")
+    return data
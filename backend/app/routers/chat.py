@@ -20,6 +20,7 @@ async def chat(request: ChatRequest):
                 persona_id=request.persona_id,
                 user_message=request.message,
                 conversation_history=request.conversation_history,
+                latency_budget_ms=request.latency_budget_ms,
             ):
                 if isinstance(item, dict):
                     # Sources metadata at the end of the stream
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.metrics import render
+
+router = APIRouter()
+
+
+@router.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latency and token histograms in the Prometheus text format."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
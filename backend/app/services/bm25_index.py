@@ -3,15 +3,78 @@
 Provides sparse retrieval to complement ChromaDB's dense (embedding) search.
 The combination of sparse + dense retrieval (hybrid search) captures both
 exact keyword matches and semantic similarity.
+
+The index is an inverted index (term → sorted postings of documents
+containing it), so a query only touches documents that share at least one
+term with it. Scoring reproduces rank_bm25's BM25Okapi exactly (same IDF
+floor, same k1/b, same per-term summation order), and ties keep corpus order.
+
+Query evaluation uses MaxScore-style pruning:
+  1. Each term gets an upper bound on its contribution (IDF × max BM25 weight
+     over its postings).
+  2. A lower bound on the k-th best score is taken from the strongest term.
+  3. The weakest terms whose bounds together cannot reach that threshold are
+     "non-essential": documents matching only them are never scored, and they
+     are only probed (binary search) for candidates from the essential terms.
+  4. Surviving candidates are scored exactly and the top-k kept with a heap.
+
+For many queries at once (multi-query retrieval, evaluation sweeps),
+`bm25_search_many` multiplies a sparse query × term matrix by a cached CSR
+term × document weight matrix and picks each row's top-k with argpartition.
+
+Documents can be added or removed in place; statistics (N, avgdl, IDF, term
+bounds) are refreshed lazily on the next search instead of re-tokenizing the
+corpus. After removals the IDF floor's mean is summed in the original term
+order, so scores can differ from a fresh rebuild in the last float digit.
+
+Persistence:
+  `ingestion/ingest.py` writes one versioned artifact directory per persona
+  (vocabulary, postings, doc lengths, IDF table, id/metadata mapping). The
+  server memory-maps it at startup instead of re-tokenizing the collection.
+  Each artifact carries a fingerprint of the collection's chunk ids; if it no
+  longer matches ChromaDB the artifact is refused and the index is rebuilt.
 """
 
+import heapq
+import json
+import logging
+import math
 import re
-from rank_bm25 import BM25Okapi
-from app.services.vectorstore import get_all_documents
+import shutil
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from app.config import get_settings
+from app.services.vectorstore import (
+    corpus_fingerprint,
+    get_all_documents,
+    get_corpus_fingerprint,
+    invalidate_collection_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the on-disk layout or the tokenizer changes
+INDEX_FORMAT_VERSION = 1
+
+# BM25Okapi parameters (rank_bm25 defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
+# Relative slack on pruning decisions so float rounding in the bounds can
+# never drop a document that belongs in the top-k
+_PRUNE_SLACK = 1e-9
 
+_ARRAY_FILES = ("term_offsets", "postings_docs", "postings_tfs", "doc_lengths", "idf")
 
 # In-memory BM25 index cache per persona
-_index_cache: dict[str, dict] = {}
+_index_cache: dict[str, "BM25Index"] = {}
+_cache_lock = threading.Lock()
 
 
 def _tokenize(text: str) -> list[str]:
@@ -19,28 +82,577 @@ def _tokenize(text: str) -> list[str]:
     return re.findall(r"\w+", text.lower())
 
 
-def get_or_build_index(persona_id: str) -> dict:
-    """Get or lazily build the BM25 index for a persona from ChromaDB data."""
-    if persona_id not in _index_cache:
-        all_docs = get_all_documents(persona_id)
-        documents = all_docs.get("documents", [])
-        if not documents:
-            _index_cache[persona_id] = {
-                "bm25": None,
-                "documents": [],
-                "metadatas": [],
-                "ids": [],
-            }
-        else:
-            tokenized_corpus = [_tokenize(doc) for doc in documents]
-            bm25 = BM25Okapi(tokenized_corpus)
-            _index_cache[persona_id] = {
-                "bm25": bm25,
-                "documents": documents,
-                "metadatas": all_docs.get("metadatas", []),
-                "ids": all_docs.get("ids", []),
-            }
-    return _index_cache[persona_id]
+def _compute_idf(doc_freqs: np.ndarray, num_docs: int) -> np.ndarray:
+    """BM25Okapi IDF: log((N - df + 0.5) / (df + 0.5)), negatives floored to eps * mean.
+
+    Terms with no live documents are left at 0 and excluded from the mean,
+    exactly as if the corpus had been rebuilt without them.
+    """
+    idf = np.zeros(len(doc_freqs), dtype=np.float64)
+    idf_sum = 0
+    num_terms = 0
+    negative = []
+    for term_id, df in enumerate(doc_freqs.tolist()):
+        if df <= 0:
+            continue
+        value = math.log(num_docs - df + 0.5) - math.log(df + 0.5)
+        idf[term_id] = value
+        idf_sum += value
+        num_terms += 1
+        if value < 0:
+            negative.append(term_id)
+    if num_terms:
+        idf[negative] = BM25_EPSILON * (idf_sum / num_terms)
+    return idf
+
+
+class BM25Index:
+    """Inverted BM25 index for one persona.
+
+    The base segment is a CSR-style postings layout (possibly memory-mapped
+    from an artifact). Documents added afterwards go to small per-term append
+    lists; removed documents are tombstoned until `compacted()` rewrites the
+    arrays.
+    """
+
+    def __init__(
+        self,
+        vocabulary: dict[str, int],
+        term_offsets: np.ndarray,
+        postings_docs: np.ndarray,
+        postings_tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        idf: np.ndarray | None = None,
+    ):
+        self.vocabulary = vocabulary
+        self._term_offsets = term_offsets
+        self._postings_docs = postings_docs
+        self._postings_tfs = postings_tfs
+        self._doc_lengths = doc_lengths
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas or [{} for _ in documents]
+
+        self._extra_docs: dict[int, list[int]] = {}
+        self._extra_tfs: dict[int, list[int]] = {}
+        self._extra_lengths: list[int] = []
+        self._alive: np.ndarray | None = None  # None while nothing has been removed
+        self._doc_freqs = np.diff(term_offsets).astype(np.int64)
+        self._id_to_doc = {doc_id: i for i, doc_id in enumerate(ids)}
+        self._lock = threading.RLock()
+
+        self._idf = idf
+        self._doc_norms: np.ndarray | None = None
+        self._max_weights: np.ndarray | None = None
+        self._weight_matrix: sparse.csr_matrix | None = None
+        self._dirty = True
+
+    # -- construction -------------------------------------------------------
+
+    @classmethod
+    def build(cls, ids: list[str], documents: list[str], metadatas: list[dict]) -> "BM25Index":
+        """Tokenize a corpus and build its postings lists.
+
+        Terms are numbered in order of first appearance, matching the
+        iteration order rank_bm25 uses for its IDF average.
+        """
+        vocabulary: dict[str, int] = {}
+        term_docs: list[list[int]] = []
+        term_tfs: list[list[int]] = []
+        doc_lengths = np.empty(len(documents), dtype=np.int32)
+
+        for doc_idx, doc in enumerate(documents):
+            tokens = _tokenize(doc)
+            doc_lengths[doc_idx] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_id = vocabulary.get(term)
+                if term_id is None:
+                    term_id = vocabulary[term] = len(vocabulary)
+                    term_docs.append([])
+                    term_tfs.append([])
+                term_docs[term_id].append(doc_idx)
+                term_tfs[term_id].append(tf)
+
+        term_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum([len(docs) for docs in term_docs], out=term_offsets[1:])
+        num_postings = int(term_offsets[-1])
+        return cls(
+            vocabulary=vocabulary,
+            term_offsets=term_offsets,
+            postings_docs=np.fromiter(
+                (d for docs in term_docs for d in docs), dtype=np.int32, count=num_postings
+            ),
+            postings_tfs=np.fromiter(
+                (tf for tfs in term_tfs for tf in tfs), dtype=np.int32, count=num_postings
+            ),
+            doc_lengths=doc_lengths,
+            ids=list(ids),
+            documents=list(documents),
+            metadatas=list(metadatas) if metadatas else [],
+        )
+
+    # -- statistics ---------------------------------------------------------
+
+    @property
+    def num_docs(self) -> int:
+        if self._alive is None:
+            return len(self.ids)
+        return int(self._alive.sum())
+
+    @property
+    def num_terms(self) -> int:
+        return int(np.count_nonzero(self._doc_freqs))
+
+    @property
+    def fingerprint(self) -> str:
+        return corpus_fingerprint(self.live_ids())
+
+    def live_ids(self) -> list[str]:
+        if self._alive is None:
+            return list(self.ids)
+        return [doc_id for doc_id, alive in zip(self.ids, self._alive) if alive]
+
+    def _all_doc_lengths(self) -> np.ndarray:
+        if not self._extra_lengths:
+            return np.asarray(self._doc_lengths)
+        return np.concatenate([self._doc_lengths, np.asarray(self._extra_lengths, dtype=np.int32)])
+
+    def _refresh(self):
+        """Recompute N, avgdl, IDF and per-term weight bounds after a mutation."""
+        with self._lock:
+            if not self._dirty:
+                return
+            doc_lengths = self._all_doc_lengths()
+            live_lengths = doc_lengths if self._alive is None else doc_lengths[self._alive]
+            num_docs = len(live_lengths)
+            if num_docs:
+                avgdl = int(live_lengths.sum()) / num_docs
+                doc_norms = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / avgdl)
+            else:
+                doc_norms = np.zeros(len(doc_lengths), dtype=np.float64)
+
+            mutated = self._alive is not None or bool(self._extra_lengths)
+            if self._idf is None or mutated or len(self._idf) != len(self._doc_freqs):
+                self._idf = _compute_idf(self._doc_freqs, num_docs)
+
+            # Upper bound of tf*(k1+1)/(tf+norm) per term over its live postings
+            max_weights = np.zeros(len(self._doc_freqs), dtype=np.float64)
+            base_terms = len(self._term_offsets) - 1
+            if len(self._postings_docs):
+                docs = self._postings_docs
+                tfs = self._postings_tfs
+                weights = tfs * (BM25_K1 + 1) / (tfs + doc_norms[docs])
+                if self._alive is not None:
+                    weights[~self._alive[docs]] = 0.0
+                starts = np.asarray(self._term_offsets[:-1])
+                nonempty = np.flatnonzero(np.diff(self._term_offsets) > 0)
+                max_weights[nonempty] = np.maximum.reduceat(weights, starts[nonempty])
+            for term_id, extra_docs in self._extra_docs.items():
+                docs = np.asarray(extra_docs, dtype=np.int64)
+                tfs = np.asarray(self._extra_tfs[term_id], dtype=np.float64)
+                weights = tfs * (BM25_K1 + 1) / (tfs + doc_norms[docs])
+                if self._alive is not None:
+                    weights[~self._alive[docs]] = 0.0
+                if term_id < base_terms:
+                    max_weights[term_id] = max(max_weights[term_id], weights.max())
+                else:
+                    max_weights[term_id] = weights.max()
+
+            self._doc_norms = doc_norms
+            self._max_weights = max_weights
+            self._weight_matrix = None
+            self._dirty = False
+
+    def _weights(self) -> sparse.csr_matrix:
+        """Term × document CSR matrix of BM25 weights (IDF included), built once per refresh."""
+        self._refresh()
+        matrix = self._weight_matrix
+        if matrix is None:
+            rows, cols, tfs = [], [], []
+            base_terms = len(self._term_offsets) - 1
+            if len(self._postings_docs):
+                rows.append(np.repeat(np.arange(base_terms), np.diff(self._term_offsets)))
+                cols.append(np.asarray(self._postings_docs))
+                tfs.append(np.asarray(self._postings_tfs))
+            for term_id, extra_docs in self._extra_docs.items():
+                rows.append(np.full(len(extra_docs), term_id))
+                cols.append(np.asarray(extra_docs, dtype=np.int32))
+                tfs.append(np.asarray(self._extra_tfs[term_id], dtype=np.int32))
+
+            shape = (len(self._doc_freqs), len(self.ids))
+            if rows:
+                rows, cols, tfs = np.concatenate(rows), np.concatenate(cols), np.concatenate(tfs)
+                if self._alive is not None:
+                    keep = self._alive[cols]
+                    rows, cols, tfs = rows[keep], cols[keep], tfs[keep]
+                data = self._idf[rows] * (tfs * (BM25_K1 + 1) / (tfs + self._doc_norms[cols]))
+                matrix = sparse.csr_matrix((data, (rows, cols)), shape=shape)
+            else:
+                matrix = sparse.csr_matrix(shape, dtype=np.float64)
+            self._weight_matrix = matrix
+        return matrix
+
+    def _postings(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        """Live postings (sorted doc numbers, term frequencies) for a term."""
+        docs = tfs = None
+        if term_id < len(self._term_offsets) - 1:
+            start, end = self._term_offsets[term_id], self._term_offsets[term_id + 1]
+            docs = self._postings_docs[start:end]
+            tfs = self._postings_tfs[start:end]
+        extra = self._extra_docs.get(term_id)
+        if extra:
+            extra_docs = np.asarray(extra, dtype=np.int32)
+            extra_tfs = np.asarray(self._extra_tfs[term_id], dtype=np.int32)
+            if docs is None:
+                docs, tfs = extra_docs, extra_tfs
+            else:
+                docs = np.concatenate([docs, extra_docs])
+                tfs = np.concatenate([tfs, extra_tfs])
+        if docs is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        if self._alive is not None:
+            keep = self._alive[docs]
+            docs, tfs = docs[keep], tfs[keep]
+        return docs, tfs
+
+    # -- mutation -----------------------------------------------------------
+
+    def add_documents(self, ids: list[str], documents: list[str], metadatas: list[dict] | None = None):
+        """Append documents (upsert semantics: an existing id is replaced)."""
+        metadatas = metadatas or [{} for _ in documents]
+        with self._lock:
+            replaced = [doc_id for doc_id in ids if doc_id in self._id_to_doc]
+            if replaced:
+                self.remove_documents(replaced)
+            if self._alive is not None:
+                self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+
+            new_doc_freqs: Counter[int] = Counter()
+            for doc_id, doc, meta in zip(ids, documents, metadatas):
+                doc_idx = len(self.ids)
+                tokens = _tokenize(doc)
+                self._extra_lengths.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    term_id = self.vocabulary.get(term)
+                    if term_id is None:
+                        term_id = self.vocabulary[term] = len(self.vocabulary)
+                    self._extra_docs.setdefault(term_id, []).append(doc_idx)
+                    self._extra_tfs.setdefault(term_id, []).append(tf)
+                    new_doc_freqs[term_id] += 1
+                self.ids.append(doc_id)
+                self.documents.append(doc)
+                self.metadatas.append(meta)
+                self._id_to_doc[doc_id] = doc_idx
+
+            grow = len(self.vocabulary) - len(self._doc_freqs)
+            if grow:
+                self._doc_freqs = np.concatenate([self._doc_freqs, np.zeros(grow, dtype=np.int64)])
+            for term_id, df in new_doc_freqs.items():
+                self._doc_freqs[term_id] += df
+            self._dirty = True
+
+    def remove_documents(self, ids: list[str]):
+        """Tombstone documents by id; unknown ids are ignored."""
+        with self._lock:
+            for doc_id in ids:
+                doc_idx = self._id_to_doc.pop(doc_id, None)
+                if doc_idx is None:
+                    continue
+                if self._alive is None:
+                    self._alive = np.ones(len(self.ids), dtype=bool)
+                self._alive[doc_idx] = False
+                for term in set(_tokenize(self.documents[doc_idx])):
+                    self._doc_freqs[self.vocabulary[term]] -= 1
+            self._dirty = True
+
+    def compacted(self) -> "BM25Index":
+        """Return an equivalent index with merged postings and no tombstones."""
+        self._refresh()
+        live = np.arange(len(self.ids)) if self._alive is None else np.flatnonzero(self._alive)
+        renumber = np.full(len(self.ids), -1, dtype=np.int64)
+        renumber[live] = np.arange(len(live))
+
+        # Keep only terms that still occur, in their original (first-seen) order
+        old_terms = sorted(
+            (term_id, term) for term, term_id in self.vocabulary.items()
+            if self._doc_freqs[term_id] > 0
+        )
+        vocabulary = {term: new_id for new_id, (_, term) in enumerate(old_terms)}
+        doc_chunks, tf_chunks = [], []
+        term_offsets = np.zeros(len(old_terms) + 1, dtype=np.int64)
+        for new_id, (term_id, _) in enumerate(old_terms):
+            docs, tfs = self._postings(term_id)
+            doc_chunks.append(renumber[docs].astype(np.int32))
+            tf_chunks.append(tfs.astype(np.int32))
+            term_offsets[new_id + 1] = term_offsets[new_id] + len(docs)
+
+        live_list = live.tolist()
+        return BM25Index(
+            vocabulary=vocabulary,
+            term_offsets=term_offsets,
+            postings_docs=np.concatenate(doc_chunks) if doc_chunks else np.zeros(0, dtype=np.int32),
+            postings_tfs=np.concatenate(tf_chunks) if tf_chunks else np.zeros(0, dtype=np.int32),
+            doc_lengths=self._all_doc_lengths()[live].astype(np.int32),
+            ids=[self.ids[i] for i in live_list],
+            documents=[self.documents[i] for i in live_list],
+            metadatas=[self.metadatas[i] for i in live_list],
+            idf=self._idf[[term_id for term_id, _ in old_terms]] if old_terms else None,
+        )
+
+    # -- search -------------------------------------------------------------
+
+    def search(self, tokenized_query: list[str], top_k: int) -> list[tuple[int, float]]:
+        """Top-k (doc number, score) pairs with score > 0, best first."""
+        self._refresh()
+        idf = self._idf
+        doc_norms = self._doc_norms
+
+        counts: dict[int, int] = {}
+        for term in tokenized_query:
+            term_id = self.vocabulary.get(term)
+            if term_id is not None and self._doc_freqs[term_id] > 0:
+                counts[term_id] = counts.get(term_id, 0) + 1
+        if not counts or top_k <= 0:
+            return []
+
+        postings = {term_id: self._postings(term_id) for term_id in counts}
+
+        def contribution(term_id: int, docs: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+            return idf[term_id] * (tfs * (BM25_K1 + 1) / (tfs + doc_norms[docs]))
+
+        # MaxScore bounds only hold when every contribution is non-negative
+        prunable = all(idf[term_id] > 0 for term_id in counts)
+        ordered = sorted(counts, key=lambda t: counts[t] * idf[t] * self._max_weights[t])
+        essential = ordered
+        non_essential_bound = 0.0
+        if prunable and len(ordered) > 1:
+            # Any document in the strongest term's postings scores at least
+            # its contribution from that term alone
+            strongest = ordered[-1]
+            seed = counts[strongest] * contribution(strongest, *postings[strongest])
+            threshold = 0.0
+            if len(seed) >= top_k:
+                threshold = float(np.partition(seed, len(seed) - top_k)[len(seed) - top_k])
+            threshold *= 1 - _PRUNE_SLACK
+            split = 0
+            for term_id in ordered:
+                bound = counts[term_id] * idf[term_id] * self._max_weights[term_id] * (1 + _PRUNE_SLACK)
+                if non_essential_bound + bound >= threshold:
+                    break
+                non_essential_bound += bound
+                split += 1
+            essential = ordered[split:]
+
+        candidates = np.unique(np.concatenate([postings[t][0] for t in essential]))
+        if len(candidates) > top_k and non_essential_bound > 0:
+            # Drop candidates that can't catch up even with every non-essential term
+            partial = np.zeros(len(candidates))
+            for term_id in essential:
+                docs, tfs = postings[term_id]
+                partial[np.searchsorted(candidates, docs)] += counts[term_id] * contribution(term_id, docs, tfs)
+            kth = float(np.partition(partial, len(partial) - top_k)[len(partial) - top_k])
+            candidates = candidates[partial + non_essential_bound >= kth * (1 - _PRUNE_SLACK)]
+
+        # Exact scores, summed in query order exactly as BM25Okapi.get_scores does
+        scores = np.zeros(len(candidates))
+        for term in tokenized_query:
+            term_id = self.vocabulary.get(term)
+            if term_id not in counts:
+                continue
+            docs, tfs = postings[term_id]
+            pos = np.searchsorted(docs, candidates)
+            found = pos < len(docs)
+            found[found] = docs[pos[found]] == candidates[found]
+            hit = pos[found]
+            scores[found] += contribution(term_id, docs[hit], tfs[hit])
+
+        positive = scores > 0
+        best = heapq.nlargest(
+            top_k,
+            zip(scores[positive].tolist(), (-candidates[positive]).tolist()),
+        )
+        return [(-neg_doc, score) for score, neg_doc in best]
+
+    def search_many(self, tokenized_queries: list[list[str]], top_k: int) -> list[list[tuple[int, float]]]:
+        """Score a batch of queries with one sparse matrix product.
+
+        Scores agree with `search` up to float summation order, so exact ties
+        may occasionally resolve differently.
+        """
+        weights = self._weights()
+        rows, cols = [], []
+        for row, tokens in enumerate(tokenized_queries):
+            for term in tokens:
+                term_id = self.vocabulary.get(term)
+                if term_id is not None:
+                    rows.append(row)
+                    cols.append(term_id)
+        # Repeated query terms count once per occurrence, as in BM25Okapi
+        queries = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(tokenized_queries), weights.shape[0]),
+        )
+        scores = (queries @ weights).tocsr()
+
+        results = []
+        for row in range(len(tokenized_queries)):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            row_scores = scores.data[start:end]
+            row_docs = scores.indices[start:end]
+            positive = row_scores > 0
+            row_scores, row_docs = row_scores[positive], row_docs[positive]
+            if top_k <= 0 or not len(row_scores):
+                results.append([])
+                continue
+            if len(row_scores) > top_k:
+                keep = np.argpartition(-row_scores, top_k - 1)[:top_k]
+                # Include every document tied with the k-th score so ties resolve by corpus order
+                kth = row_scores[keep].min()
+                keep = np.flatnonzero(row_scores >= kth)
+                row_scores, row_docs = row_scores[keep], row_docs[keep]
+            order = np.lexsort((row_docs, -row_scores))[:top_k]
+            results.append([(int(row_docs[i]), float(row_scores[i])) for i in order])
+        return results
+
+
+def build_index(ids: list[str], documents: list[str], metadatas: list[dict]) -> BM25Index:
+    return BM25Index.build(ids, documents, metadatas)
+
+
+def _index_dir(persona_id: str) -> Path:
+    return Path(get_settings().bm25_index_path) / persona_id
+
+
+def save_index(persona_id: str, index: BM25Index) -> Path:
+    """Write an index artifact for a persona, replacing any previous one.
+
+    The artifact is written to a temporary directory, then swapped in with
+    two renames (old artifact aside, new one into place), so a reader sees a
+    complete artifact or, between the renames, none at all (and rebuilds).
+    """
+    index = index.compacted()
+    index._refresh()
+    target = _index_dir(persona_id)
+    tmp = target.with_name(f"{target.name}.tmp")
+    old = target.with_name(f"{target.name}.old")
+    for stale in (tmp, old):
+        if stale.exists():
+            shutil.rmtree(stale)
+    tmp.mkdir(parents=True)
+
+    arrays = {
+        "term_offsets": index._term_offsets,
+        "postings_docs": index._postings_docs,
+        "postings_tfs": index._postings_tfs,
+        "doc_lengths": index._doc_lengths,
+        "idf": index._idf,
+    }
+    for name in _ARRAY_FILES:
+        np.save(tmp / f"{name}.npy", np.ascontiguousarray(arrays[name]))
+
+    vocabulary = sorted(index.vocabulary, key=index.vocabulary.get)
+    meta = {
+        "version": INDEX_FORMAT_VERSION,
+        "fingerprint": index.fingerprint,
+        "num_docs": index.num_docs,
+        "num_terms": len(vocabulary),
+        "k1": BM25_K1,
+        "b": BM25_B,
+        "epsilon": BM25_EPSILON,
+        "vocabulary": vocabulary,
+    }
+    with open(tmp / "meta.json", "w") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    with open(tmp / "docs.json", "w") as f:
+        json.dump(
+            {"ids": index.ids, "documents": index.documents, "metadatas": index.metadatas},
+            f,
+            ensure_ascii=False,
+        )
+
+    if target.exists():
+        target.rename(old)
+    tmp.rename(target)
+    if old.exists():
+        shutil.rmtree(old)
+    return target
+
+
+def load_index(persona_id: str, expected_fingerprint: str | None = None) -> BM25Index | None:
+    """Memory-map a persona's index artifact.
+
+    Returns None when there is no artifact, it was written by a different
+    format version, or its fingerprint does not match `expected_fingerprint`.
+    """
+    path = _index_dir(persona_id)
+    meta_path = path / "meta.json"
+    if not meta_path.exists():
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("version") != INDEX_FORMAT_VERSION:
+        logger.warning("Ignoring BM25 index for %s: format version %s", persona_id, meta.get("version"))
+        return None
+    if (meta.get("k1"), meta.get("b"), meta.get("epsilon")) != (BM25_K1, BM25_B, BM25_EPSILON):
+        logger.warning("Ignoring BM25 index for %s: built with different BM25 parameters", persona_id)
+        return None
+    if expected_fingerprint is not None and meta["fingerprint"] != expected_fingerprint:
+        logger.warning("Ignoring stale BM25 index for %s: corpus has changed since ingest", persona_id)
+        return None
+
+    with open(path / "docs.json") as f:
+        docs = json.load(f)
+
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAY_FILES}
+    return BM25Index(
+        vocabulary={term: i for i, term in enumerate(meta["vocabulary"])},
+        term_offsets=arrays["term_offsets"],
+        postings_docs=arrays["postings_docs"],
+        postings_tfs=arrays["postings_tfs"],
+        doc_lengths=arrays["doc_lengths"],
+        ids=docs["ids"],
+        documents=docs["documents"],
+        metadatas=docs["metadatas"],
+        idf=arrays["idf"],
+    )
+
+
+def build_index_from_collection(persona_id: str) -> BM25Index:
+    """Build a persona's index from the documents currently in ChromaDB."""
+    all_docs = get_all_documents(persona_id)
+    return build_index(
+        all_docs.get("ids", []),
+        all_docs.get("documents", []),
+        all_docs.get("metadatas", []),
+    )
+
+
+def get_or_build_index(persona_id: str) -> BM25Index:
+    """Get the BM25 index for a persona.
+
+    Prefers the on-disk artifact written at ingest time; falls back to
+    rebuilding from ChromaDB when it is missing or stale.
+    """
+    index = _index_cache.get(persona_id)
+    if index is None:
+        with _cache_lock:
+            index = _index_cache.get(persona_id)
+            if index is None:
+                index = load_index(persona_id, expected_fingerprint=get_corpus_fingerprint(persona_id))
+                if index is None:
+                    index = build_index_from_collection(persona_id)
+                _index_cache[persona_id] = index
+    return index
+
+
+def preload_indexes(persona_ids: list[str]):
+    """Load (or build) indexes up front so the first chat request doesn't pay for it."""
+    for persona_id in persona_ids:
+        get_or_build_index(persona_id)._refresh()
 
 
 def invalidate_cache(persona_id: str | None = None):
@@ -49,28 +661,42 @@ def invalidate_cache(persona_id: str | None = None):
         _index_cache.pop(persona_id, None)
     else:
         _index_cache.clear()
+    invalidate_collection_cache(persona_id)
 
 
 def bm25_search(persona_id: str, query: str, top_k: int = 10) -> list[dict]:
     """Search using BM25 keyword matching. Returns results sorted by BM25 score."""
     index = get_or_build_index(persona_id)
-    if index["bm25"] is None or not index["documents"]:
+    if not index.num_docs:
         return []
 
-    tokenized_query = _tokenize(query)
-    scores = index["bm25"].get_scores(tokenized_query)
-
-    # Get top-k indices sorted by score descending
-    sorted_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
-
     results = []
-    for idx in sorted_indices[:top_k]:
-        if scores[idx] <= 0:
-            break
+    for idx, score in index.search(_tokenize(query), top_k):
         results.append({
-            "content": index["documents"][idx],
-            "metadata": index["metadatas"][idx] if index["metadatas"] else {},
-            "id": index["ids"][idx] if index["ids"] else str(idx),
-            "score": float(scores[idx]),
+            "content": index.documents[idx],
+            "metadata": index.metadatas[idx] if index.metadatas else {},
+            "id": index.ids[idx],
+            "score": score,
         })
     return results
+
+
+def bm25_search_many(persona_id: str, queries: list[str], top_k: int = 10) -> list[list[dict]]:
+    """Batch version of `bm25_search`: one result list per query, in input order."""
+    index = get_or_build_index(persona_id)
+    if not index.num_docs:
+        return [[] for _ in queries]
+
+    batches = index.search_many([_tokenize(q) for q in queries], top_k)
+    return [
+        [
+            {
+                "content": index.documents[idx],
+                "metadata": index.metadatas[idx] if index.metadatas else {},
+                "id": index.ids[idx],
+                "score": score,
+            }
+            for idx, score in hits
+        ]
+        for hits in batches
+    ]
@@ -0,0 +1,160 @@
+"""Embedding function shared by the API server, ChromaDB collections and ingestion.
+
+Collections are opened with `get_embedding_function()` instead of ChromaDB's
+implicit default, and dense retrieval passes precomputed `query_embeddings`.
+This gives one place to:
+
+- choose the model (`embedding_model`): "all-MiniLM-L6-v2" runs ChromaDB's
+  bundled ONNX export (the model existing collections were built with); any
+  other name is loaded with sentence-transformers. Changing it requires
+  re-ingesting, since stored vectors must come from the same model;
+- set the inference batch size and thread count;
+- load the model eagerly at startup (`load()`), not on the first chat request;
+- cache query vectors in an LRU, so repeated questions and identical
+  rewritten queries are embedded once.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+
+from app.config import get_settings
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+
+class _ONNXMiniLM(ONNXMiniLM_L6_V2):
+    """ChromaDB's default ONNX model with a configurable intra-op thread count."""
+
+    def __init__(self, num_threads: int):
+        super().__init__()
+        self._num_threads = num_threads
+
+    @cached_property
+    def model(self):
+        so = self.ort.SessionOptions()
+        so.log_severity_level = 3
+        if self._num_threads > 0:
+            so.intra_op_num_threads = self._num_threads
+        return self.ort.InferenceSession(
+            os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME, "model.onnx"),
+            providers=self._preferred_providers or self.ort.get_available_providers(),
+            sess_options=so,
+        )
+
+
+class PersonaEmbeddingFunction(EmbeddingFunction[Documents]):
+    def __init__(self, model_name: str, batch_size: int, num_threads: int, query_cache_size: int):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.query_cache_size = query_cache_size
+
+        self._onnx: _ONNXMiniLM | None = None
+        self._st_model = None
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.query_hits = 0
+        self.query_misses = 0
+
+    def load(self):
+        """Download (if needed) and initialize the model. Safe to call repeatedly."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if self.model_name == DEFAULT_MODEL:
+                onnx = _ONNXMiniLM(self.num_threads)
+                onnx._download_model_if_not_exists()
+                # Build the lazily-created session and tokenizer now
+                _ = onnx.model
+                _ = onnx.tokenizer
+                self._onnx = onnx
+            else:
+                from sentence_transformers import SentenceTransformer
+                import torch
+
+                if self.num_threads > 0:
+                    torch.set_num_threads(self.num_threads)
+                self._st_model = SentenceTransformer(self.model_name, device="cpu")
+            self._loaded = True
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text."""
+        self.load()
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self._onnx is not None:
+            return self._onnx._forward(list(texts), batch_size=self.batch_size)
+        return self._st_model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return list(self.embed(input))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed one query, served from the LRU cache when seen recently."""
+        with self._cache_lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+                self.query_hits += 1
+                return vector
+        vector = self.embed([text])[0]
+        vector.flags.writeable = False  # shared between callers
+        with self._cache_lock:
+            self.query_misses += 1
+            self._query_cache[text] = vector
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def stats(self) -> dict:
+        lookups = self.query_hits + self.query_misses
+        return {
+            "model": self.model_name,
+            "loaded": self._loaded,
+            "query_cache_entries": len(self._query_cache),
+            "query_cache_hits": self.query_hits,
+            "query_cache_misses": self.query_misses,
+            "query_cache_hit_rate": round(self.query_hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_embedding_function: PersonaEmbeddingFunction | None = None
+_lock = threading.Lock()
+
+
+def get_embedding_function() -> PersonaEmbeddingFunction:
+    """The shared embedding function, configured from settings (not yet loaded)."""
+    global _embedding_function
+    if _embedding_function is None:
+        with _lock:
+            if _embedding_function is None:
+                settings = get_settings()
+                _embedding_function = PersonaEmbeddingFunction(
+                    model_name=settings.embedding_model,
+                    batch_size=settings.embedding_batch_size,
+                    num_threads=settings.embedding_num_threads,
+                    query_cache_size=settings.embedding_query_cache_size,
+                )
+    return _embedding_function
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Embed a single query as a float32 vector."""
+    return get_embedding_function().embed_query(text)
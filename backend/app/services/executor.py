@@ -0,0 +1,50 @@
+"""Bounded thread pool for blocking retrieval work.
+
+ChromaDB queries, BM25 scoring and cross-encoder inference are synchronous
+and CPU/disk bound. Running them directly inside `async` handlers stalls the
+event loop, and with it every other user's SSE token stream. They are
+dispatched here instead, on a pool sized by `retrieval_max_workers` so a
+burst of requests can't spawn unbounded threads.
+"""
+
+import asyncio
+import contextvars
+import functools
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from app.config import get_settings
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        settings = get_settings()
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.retrieval_max_workers,
+            thread_name_prefix="retrieval",
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], /, *args, **kwargs) -> T:
+    """Run a blocking call on the retrieval pool without blocking the event loop.
+
+    Like `asyncio.to_thread`, the caller's context variables are propagated.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -4,11 +4,35 @@ Reciprocal Rank Fusion (RRF) merges multiple ranked lists into a single ranking
 without needing to normalize scores across different retrieval methods.
 
 Formula: RRF_score(d) = Σ 1 / (k + rank_i(d)) for each retrieval method i
+
+`hybrid_search_async` is what the request path uses: both legs run on the
+retrieval thread pool concurrently instead of blocking the event loop.
+`hybrid_search_many` serves offline sweeps over many queries: the BM25 leg
+of the whole batch is scored at once with `bm25_search_many`.
+
+Each leg and the fusion are timed as the "dense_search", "bm25_search" and
+"rrf" stages (see `app.services.metrics`).
 """
 
+import asyncio
+
 from app.config import get_settings
+from app.services.executor import run_blocking
+from app.services.metrics import span
 from app.services.vectorstore import query_collection
-from app.services.bm25_index import bm25_search
+from app.services.bm25_index import bm25_search, bm25_search_many
+
+
+def dense_search(persona_id: str, query: str, top_k: int) -> list[dict]:
+    """`query_collection`, timed as the "dense_search" stage."""
+    with span("dense_search"):
+        return query_collection(persona_id, query, top_k=top_k)
+
+
+def sparse_search(persona_id: str, query: str, top_k: int) -> list[dict]:
+    """`bm25_search`, timed as the "bm25_search" stage."""
+    with span("bm25_search"):
+        return bm25_search(persona_id, query, top_k=top_k)
 
 
 def reciprocal_rank_fusion(
@@ -24,6 +48,11 @@ def reciprocal_rank_fusion(
     Returns:
         Fused list sorted by combined RRF score
     """
+    with span("rrf"):
+        return _fuse(result_lists, k)
+
+
+def _fuse(result_lists: tuple[list[dict], ...], k: int) -> list[dict]:
     doc_scores: dict[str, dict] = {}
 
     for results in result_lists:
@@ -54,13 +83,13 @@ def hybrid_search(persona_id: str, query: str, top_k: int | None = None) -> list
     candidates = top_k or settings.hybrid_search_top_k
 
     # Dense retrieval (embedding similarity via ChromaDB)
-    embedding_results = query_collection(persona_id, query, top_k=candidates)
+    embedding_results = dense_search(persona_id, query, top_k=candidates)
 
     if not settings.enable_hybrid_search:
         return embedding_results[:candidates]
 
     # Sparse retrieval (BM25 keyword matching)
-    bm25_results = bm25_search(persona_id, query, top_k=candidates)
+    bm25_results = sparse_search(persona_id, query, top_k=candidates)
 
     # Fuse with RRF
     fused = reciprocal_rank_fusion(
@@ -70,3 +99,58 @@ def hybrid_search(persona_id: str, query: str, top_k: int | None = None) -> list
     )
 
     return fused[:candidates]
+
+
+def hybrid_search_many(persona_id: str, queries: list[str], top_k: int | None = None) -> list[list[dict]]:
+    """`hybrid_search` for a batch of queries, with one batched BM25 leg.
+
+    Returns one fused list per query, in input order.
+    """
+    settings = get_settings()
+    candidates = top_k or settings.hybrid_search_top_k
+
+    embedding_results = [dense_search(persona_id, query, top_k=candidates) for query in queries]
+    if not settings.enable_hybrid_search:
+        return [results[:candidates] for results in embedding_results]
+
+    with span("bm25_search"):
+        bm25_results = bm25_search_many(persona_id, queries, top_k=candidates)
+
+    return [
+        reciprocal_rank_fusion(dense, sparse, k=settings.rrf_k)[:candidates]
+        for dense, sparse in zip(embedding_results, bm25_results)
+    ]
+
+
+async def candidate_lists_async(
+    persona_id: str,
+    query: str,
+    top_k: int | None = None,
+    include_sparse: bool | None = None,
+) -> list[list[dict]]:
+    """Ranked lists from each retrieval leg for one query, run concurrently off the event loop.
+
+    Returns [dense] or [dense, bm25]; sparse defaults to `enable_hybrid_search`.
+    """
+    settings = get_settings()
+    candidates = top_k or settings.hybrid_search_top_k
+    if include_sparse is None:
+        include_sparse = settings.enable_hybrid_search
+
+    legs = [run_blocking(dense_search, persona_id, query, top_k=candidates)]
+    if include_sparse:
+        legs.append(run_blocking(sparse_search, persona_id, query, top_k=candidates))
+    return list(await asyncio.gather(*legs))
+
+
+async def hybrid_search_async(persona_id: str, query: str, top_k: int | None = None) -> list[dict]:
+    """Async `hybrid_search`: dense and sparse legs run concurrently off the event loop."""
+    settings = get_settings()
+    candidates = top_k or settings.hybrid_search_top_k
+
+    result_lists = await candidate_lists_async(persona_id, query, top_k=candidates)
+    if len(result_lists) == 1:
+        return result_lists[0][:candidates]
+
+    fused = reciprocal_rank_fusion(*result_lists, k=settings.rrf_k)
+    return fused[:candidates]
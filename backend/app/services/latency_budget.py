@@ -0,0 +1,101 @@
+"""Per-request latency budget for the retrieval pipeline.
+
+The feature flags in `Settings` are static: when the LLM provider is slow,
+every request still pays for the rewrite and LLM-rerank round trips before
+the first token. A `LatencyBudget` gives a request a deadline instead. Before
+an optional stage runs, its recent p95 latency (tracked process-wide per
+stage) is compared with the time left:
+
+- not enough time → the stage is skipped;
+- enough time → it runs, but is cut off if it overruns what is left.
+
+Every decision is recorded so it can be reported with the response.
+
+A skipped stage produces no new samples, so its p95 could never improve.
+Two things let it recover: samples older than `_MAX_AGE` seconds are
+forgotten (with too few left the stage is allowed again), and a small
+fraction of requests (`probe_rate`) runs a stage its p95 rules out anyway.
+A stage cut off before finishing is recorded as infinitely slow: its real
+latency is unknown, only that it needed more than it was given.
+"""
+
+import math
+import random
+import time
+from collections import deque
+
+# Recent (time recorded, latency in seconds) per stage
+_WINDOW = 100
+_MIN_SAMPLES = 5
+_MAX_AGE = 300.0
+_samples: dict[str, deque[tuple[float, float]]] = {}
+
+
+def record_stage_latency(stage: str, seconds: float, cut_off: bool = False):
+    _samples.setdefault(stage, deque(maxlen=_WINDOW)).append(
+        (time.monotonic(), math.inf if cut_off else seconds)
+    )
+
+
+def stage_p95(stage: str) -> float | None:
+    """Recent p95 latency of a stage, or None until enough samples exist."""
+    samples = _samples.get(stage)
+    if samples is None:
+        return None
+    expired = time.monotonic() - _MAX_AGE
+    while samples and samples[0][0] < expired:
+        samples.popleft()
+    if len(samples) < _MIN_SAMPLES:
+        return None
+    ordered = sorted(seconds for _, seconds in samples)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+class LatencyBudget:
+    def __init__(self, budget_ms: int, probe_rate: float = 0.0):
+        self.budget_ms = budget_ms
+        self.probe_rate = probe_rate
+        self.started = time.monotonic()
+        self.deadline = self.started + budget_ms / 1000
+        self.decisions: dict[str, str] = {}
+        self.probes: set[str] = set()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def allows(self, stage: str, reserve: float = 0.0) -> bool:
+        """Whether `stage` fits in the budget after keeping `reserve` seconds for later stages.
+
+        Stages without enough latency history are allowed while any time
+        remains, and so are `probe_rate` of the stages that don't fit.
+        """
+        available = self.remaining() - reserve
+        p95 = stage_p95(stage)
+        if p95 is None:
+            return available > 0
+        if available >= p95:
+            return True
+        if available > 0 and random.random() < self.probe_rate:
+            self.probes.add(stage)
+            return True
+        return False
+
+    def timeout_for(self, reserve: float = 0.0) -> float:
+        """How long a stage may run before it must be cut off."""
+        return max(0.0, self.remaining() - reserve)
+
+    def decide(self, stage: str, decision: str):
+        self.decisions[stage] = decision
+
+    def degraded(self) -> bool:
+        """Whether any stage was skipped, cut off or failed."""
+        return any(decision != "ran" for decision in self.decisions.values())
+
+    def report(self) -> dict:
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "decisions": self.decisions,
+            "probes": sorted(self.probes),
+        }
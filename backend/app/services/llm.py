@@ -1,10 +1,53 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
 from openai import AsyncOpenAI
 from app.config import get_settings
-from collections.abc import AsyncGenerator
+from app.services.executor import run_blocking
+from app.services.llm_cache import CompletionCache, get_completion_cache
+from collections.abc import AsyncGenerator, Iterator
 
 _client: AsyncOpenAI | None = None
 
 
+@dataclass
+class TokenUsage:
+    calls: int = 0
+    cached_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def add(self, usage):
+        self.calls += 1
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "cached_calls": self.cached_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+# Usage of LLM calls made in the current context (and tasks started from it)
+_usage: ContextVar[TokenUsage | None] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Accumulate token usage of every completion awaited inside the block."""
+    usage = TokenUsage()
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
 def get_llm_client() -> AsyncOpenAI:
     global _client
     if _client is None:
@@ -24,16 +67,24 @@ async def stream_chat_completion(
 ) -> AsyncGenerator[str, None]:
     settings = get_settings()
     client = get_llm_client()
+    usage = _usage.get()
     stream = await client.chat.completions.create(
         model=model or settings.llm_model,
         messages=messages,
         temperature=temperature,
         max_tokens=max_tokens,
         stream=True,
+        # The final chunk then carries the usage (and no choices)
+        **({"stream_options": {"include_usage": True}} if usage is not None else {}),
     )
+    last_usage = None
     async for chunk in stream:
         if chunk.choices and chunk.choices[0].delta.content:
             yield chunk.choices[0].delta.content
+        if getattr(chunk, "usage", None) is not None:
+            last_usage = chunk.usage
+    if usage is not None:
+        usage.add(last_usage)
 
 
 async def chat_completion(
@@ -41,15 +92,36 @@ async def chat_completion(
     model: str | None = None,
     temperature: float = 0.0,
     max_tokens: int = 256,
+    cache_namespace: str | None = None,
 ) -> str:
-    """Non-streaming completion for query rewriting, reranking, evaluation, etc."""
+    """Non-streaming completion for query rewriting, reranking, evaluation, etc.
+
+    Callers that pass `cache_namespace` are served from the completion cache
+    when ENABLE_LLM_CACHE is on.
+    """
     settings = get_settings()
+    model = model or settings.llm_model
+
+    cache = get_completion_cache() if cache_namespace else None
+    if cache is not None:
+        key = CompletionCache.make_key(model, messages, temperature, max_tokens)
+        cached = await run_blocking(cache.get, cache_namespace, key)
+        if cached is not None:
+            if (usage := _usage.get()) is not None:
+                usage.cached_calls += 1
+            return cached
+
     client = get_llm_client()
     response = await client.chat.completions.create(
-        model=model or settings.llm_model,
+        model=model,
         messages=messages,
         temperature=temperature,
         max_tokens=max_tokens,
         stream=False,
     )
-    return response.choices[0].message.content or ""
+    content = response.choices[0].message.content or ""
+    if (usage := _usage.get()) is not None:
+        usage.add(response.usage)
+    if cache is not None:
+        await run_blocking(cache.set, cache_namespace, key, content)
+    return content
@@ -0,0 +1,144 @@
+"""Persistent exact-match cache for non-streaming LLM completions.
+
+Query rewriting, LLM reranking and the evaluation judges all call
+`chat_completion` with deterministic settings, so identical inputs can be
+answered from disk instead of the network. Entries are content-addressed:
+the key is a SHA-256 of (model, messages, temperature, max_tokens), stored
+under a caller namespace ("query_rewrite", "rerank", "judge", ...) so one
+caller's entries can be inspected or cleared without touching the others.
+
+Storage is a single SQLite file in WAL mode, which lets the API server and
+evaluation runs share it concurrently. Once it holds more than `max_entries`
+rows the least recently used ones are deleted. The row count is tracked in
+memory (approximately: other processes' inserts and replaced rows aren't
+seen) and only checked against the table when it passes `max_entries`.
+
+Every method blocks on SQLite, so async code calls them via `run_blocking`.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from app.config import get_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    response    TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS completions_last_access ON completions (last_access);
+"""
+
+# Evict down to this fraction of max_entries so eviction isn't run on every insert
+_EVICT_TO = 0.9
+
+
+class CompletionCache:
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._count_lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self._count = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model: str, messages: list[dict], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, namespace: str, key: str) -> str | None:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT response FROM completions WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE completions SET last_access = ? WHERE namespace = ? AND key = ?",
+            (time.time(), namespace, key),
+        )
+        return row[0]
+
+    def set(self, namespace: str, key: str, response: str):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO completions (namespace, key, response, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, response, now, now),
+        )
+        with self._count_lock:
+            self._count += 1
+            if self._count <= self.max_entries:
+                return
+            self._count = self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Delete the least recently used rows if the table is over `max_entries`; returns the row count."""
+        count = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        if count <= self.max_entries:
+            return count
+        excess = count - int(self.max_entries * _EVICT_TO)
+        conn.execute(
+            "DELETE FROM completions WHERE rowid IN "
+            "(SELECT rowid FROM completions ORDER BY last_access LIMIT ?)",
+            (excess,),
+        )
+        return count - excess
+
+    def clear(self, namespace: str | None = None):
+        conn = self._conn()
+        if namespace is None:
+            conn.execute("DELETE FROM completions")
+        else:
+            conn.execute("DELETE FROM completions WHERE namespace = ?", (namespace,))
+        with self._count_lock:
+            self._count = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        """Entry counts per namespace."""
+        rows = self._conn().execute(
+            "SELECT namespace, COUNT(*) FROM completions GROUP BY namespace"
+        ).fetchall()
+        return dict(rows)
+
+
+_cache: CompletionCache | None = None
+_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache | None:
+    """The shared cache, or None when LLM caching is disabled."""
+    global _cache
+    settings = get_settings()
+    if not settings.enable_llm_cache:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = CompletionCache(settings.llm_cache_path, settings.llm_cache_max_entries)
+    return _cache
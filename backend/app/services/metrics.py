@@ -0,0 +1,187 @@
+"""Per-stage latency and token metrics for the chat pipeline.
+
+Pipeline code wraps each stage in `span(stage)`. Every span is observed in a
+process-wide latency histogram, and, inside `track_timings()`, also added to
+that request's `StageTimings` (so the sources event can report them in debug
+mode). Like `llm.track_usage`, the current request's timings live in a
+context variable, which `run_blocking` and new tasks inherit, so spans on
+the retrieval thread pool are attributed to the right request.
+
+`render()` returns every metric in the Prometheus text exposition format,
+served at `/api/metrics`. Histograms are plain cumulative bucket counters
+behind a lock; there is no dependency on a metrics client library.
+"""
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple((name, str(labels[name])) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, +Inf last), sum]
+        self._series: dict[tuple[tuple[str, str], ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple((name, str(labels[name])) for name in self.label_names)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, float("inf")), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels((*key, ('le', le)))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each chat pipeline stage.",
+    ("stage",),
+)
+REQUEST_TOKENS = Histogram(
+    "rag_request_llm_tokens",
+    "LLM tokens used per chat request (rewrite, HyDE, LLM rerank and the answer).",
+    ("kind",),
+    buckets=TOKEN_BUCKETS,
+)
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens used by chat requests.", ("kind",))
+REQUESTS = Counter("rag_chat_requests_total", "Chat requests by outcome.", ("outcome",))
+
+_METRICS = (REQUESTS, STAGE_SECONDS, REQUEST_TOKENS, LLM_TOKENS)
+
+
+class StageTimings:
+    """Stage latencies of one request, in milliseconds.
+
+    Stages that run more than once (multi-query retrieval searches every
+    variant) are summed, and `counts` says how many times each ran.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ms: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.ms[stage] = self.ms.get(stage, 0.0) + seconds * 1000
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "stages_ms": {stage: round(ms, 1) for stage, ms in self.ms.items()},
+                "counts": {stage: count for stage, count in self.counts.items() if count > 1},
+                "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            }
+
+
+_timings: ContextVar[StageTimings | None] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def track_timings() -> Iterator[StageTimings]:
+    """Collect the spans of every stage run inside the block (and tasks started from it)."""
+    timings = StageTimings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the block as `stage`, including when it raises or is cancelled."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_request(outcome: str, usage=None):
+    """Count a finished chat request and the LLM tokens it used (`llm.TokenUsage`)."""
+    REQUESTS.inc(outcome=outcome)
+    if usage is None or not usage.calls:
+        return
+    for kind, tokens in (("prompt", usage.prompt_tokens), ("completion", usage.completion_tokens)):
+        REQUEST_TOKENS.observe(tokens, kind=kind)
+        LLM_TOKENS.inc(tokens, kind=kind)
+
+
+def render() -> str:
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
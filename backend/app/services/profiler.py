@@ -0,0 +1,286 @@
+"""Sampling profiler for slow chat requests.
+
+With `enable_profiling`, a background thread samples the Python stack of
+every thread every `profile_interval_ms` while at least one chat request is
+in flight. When a request finishes, the samples taken during it are kept as
+a profile if:
+
+- the request was picked at random (`profile_sample_rate`), or
+- it took at least `profile_slow_ms`.
+
+The sampler has to run for every request, since slowness is only known at
+the end, but it only reads frames (`sys._current_frames`), so its cost is
+one short pass over the stacks per interval and nothing per function call
+(unlike cProfile, which also only sees the thread it was enabled on and
+would miss the retrieval thread pool).
+
+Samples are process-wide: work of other requests running at the same time
+shows up too. Threads waiting for work (an idle event loop, idle pool
+workers, `Condition.wait`) are left out.
+
+Each profile is a JSON file in `profile_dir` with the request's stage
+timings (`app.services.metrics`), token usage, the hottest functions by own
+and cumulative samples, and the stacks in folded format (one
+`thread;frame;...;frame count` line per stack, the input of flamegraph.pl
+and speedscope). Only the newest `profile_max_files` are kept. They are
+listed at `/api/admin/profiles`. At most `_MAX_SAMPLES` sampling passes are
+held in memory, however long a request runs.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{12}$"
+_TOP_FUNCTIONS = 25
+_MAX_INTERNED_STACKS = 100_000
+# Sampling passes kept (5 minutes at the default interval); older ones are
+# dropped, so a request running longer loses the start of its profile
+_MAX_SAMPLES = 30_000
+
+Frame = tuple[str, str, int]  # (filename, function, line)
+
+
+# Innermost frames of threads with nothing to do
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),  # asyncio loop waiting for I/O
+    ("runners.py", "run"),  # uvloop's loop (C code) waiting for I/O
+    ("base_events.py", "run_until_complete"),
+    ("base_events.py", "run_forever"),
+    ("thread.py", "_worker"),  # pool worker waiting for a task
+    ("threading.py", "wait"),
+}
+
+
+def _is_idle(stack: tuple[Frame, ...]) -> bool:
+    filename, function, _ = stack[-1]
+    return (os.path.basename(filename), function) in _IDLE_FRAMES
+
+
+class StackSampler:
+    """Samples all thread stacks while any request holds it (see `acquire`)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        # (time, [(thread name, stack)]) since the oldest request in flight, at most _MAX_SAMPLES
+        self._samples: deque[tuple[float, list[tuple[str, tuple[Frame, ...]]]]] = deque(maxlen=_MAX_SAMPLES)
+        self._stacks: dict[tuple[Frame, ...], tuple[Frame, ...]] = {}
+        self._active: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._stop: threading.Event | None = None
+        self._next_id = 0
+
+    def acquire(self) -> tuple[int, float]:
+        """Start recording for a request; returns (handle, start time)."""
+        with self._lock:
+            handle = self._next_id
+            self._next_id += 1
+            started = time.perf_counter()
+            self._active[handle] = started
+            if self._stop is None:
+                self._stop = threading.Event()
+                threading.Thread(target=self._run, args=(self._stop,), name="stack-sampler", daemon=True).start()
+            return handle, started
+
+    def release(self, handle: int, started: float) -> list[tuple[str, tuple[Frame, ...]]]:
+        """Stop recording for a request and return the (thread, stack) samples taken since it started."""
+        with self._lock:
+            self._active.pop(handle, None)
+            samples = [entry for at, entries in self._samples if at >= started for entry in entries]
+            if not self._active:
+                self._stop.set()
+                self._stop = None
+                self._samples.clear()
+                self._stacks.clear()
+        return samples
+
+    def _run(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        entries = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append((frame.f_code.co_filename, frame.f_code.co_name, frame.f_lineno))
+                frame = frame.f_back
+            stack.reverse()
+            stack = tuple(stack)
+            if stack and not _is_idle(stack):
+                entries.append((names.get(ident, str(ident)), stack))
+        now = time.perf_counter()
+        with self._lock:
+            if not self._active:
+                return
+            # Intern stacks so repeated samples share one tuple
+            if len(self._stacks) > _MAX_INTERNED_STACKS:
+                self._stacks.clear()
+            entries = [(name, self._stacks.setdefault(stack, stack)) for name, stack in entries]
+            self._samples.append((now, entries))
+            oldest = min(self._active.values())
+            while self._samples and self._samples[0][0] < oldest:
+                self._samples.popleft()
+
+
+@lru_cache(maxsize=65536)
+def _frame_label(frame: Frame) -> str:
+    filename, function, line = frame
+    for prefix in sys.path:
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{function} ({filename}:{line})"
+
+
+def summarize_samples(samples: list[tuple[str, tuple[Frame, ...]]]) -> dict:
+    """Folded stacks plus the top functions by own and cumulative samples."""
+    folded: Counter[str] = Counter()
+    own: Counter[str] = Counter()
+    cumulative: Counter[str] = Counter()
+    for thread, stack in samples:
+        labels = [_frame_label(frame) for frame in stack]
+        folded[";".join([thread, *labels])] += 1
+        own[labels[-1]] += 1
+        # A function counts once per sample, however deep it recurses
+        for function in {f"{name} ({os.path.basename(filename)})" for filename, name, _ in stack}:
+            cumulative[function] += 1
+    return {
+        "top_own": [{"frame": frame, "samples": count} for frame, count in own.most_common(_TOP_FUNCTIONS)],
+        "top_cumulative": [
+            {"function": function, "samples": count} for function, count in cumulative.most_common(_TOP_FUNCTIONS)
+        ],
+        "folded": [f"{stack} {count}" for stack, count in folded.most_common()],
+    }
+
+
+_sampler: StackSampler | None = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> StackSampler:
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StackSampler(get_settings().profile_interval_ms / 1000)
+    return _sampler
+
+
+def _write_profile(directory: Path, profile: dict, max_files: int):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{profile['id']}.json"
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(profile, f)
+    os.replace(tmp, path)
+    # Rotate: ids start with the UTC time, so name order is age order
+    for old in sorted(directory.glob("*.json"))[:-max_files]:
+        old.unlink(missing_ok=True)
+
+
+@contextmanager
+def profile_request(persona_id: str, timings, usage) -> Iterator[None]:
+    """Profile the block if profiling is on; keep the profile if the request
+    was sampled or turned out slow. `timings` and `usage` are the request's
+    `metrics.StageTimings` and `llm.TokenUsage`, read when it ends."""
+    settings = get_settings()
+    if not settings.enable_profiling:
+        yield
+        return
+
+    sampled = random.random() < settings.profile_sample_rate
+    started_at = datetime.now(timezone.utc)
+    sampler = get_sampler()
+    handle, started = sampler.acquire()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    finally:
+        samples = sampler.release(handle, started)
+        duration_ms = (time.perf_counter() - started) * 1000
+        slow = duration_ms >= settings.profile_slow_ms
+        if sampled or slow:
+            profile = {
+                "id": f"{started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:12]}",
+                "started_at": started_at.isoformat(timespec="milliseconds"),
+                "persona_id": persona_id,
+                "reason": "slow" if slow else "sampled",
+                "outcome": outcome,
+                "duration_ms": round(duration_ms, 1),
+                "interval_ms": settings.profile_interval_ms,
+                "samples": len(samples),
+                "timings": timings.as_dict(),
+                "tokens": usage.as_dict(),
+            }
+            # Summarize and write off the event loop
+            threading.Thread(
+                target=_save_profile,
+                args=(Path(settings.profile_dir), profile, samples, settings.profile_max_files),
+                name="profile-writer",
+                daemon=True,
+            ).start()
+
+
+def _save_profile(directory: Path, profile: dict, samples: list, max_files: int):
+    try:
+        profile.update(summarize_samples(samples))
+        _write_profile(directory, profile, max_files)
+    except Exception:
+        logger.exception("Could not write profile %s", profile["id"])
+
+
+def list_profiles(limit: int = 20, reason: str | None = None) -> list[dict]:
+    """Newest profiles first, without their stacks."""
+    directory = Path(get_settings().profile_dir)
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            with open(path) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue  # rotated away or being written
+        if reason is not None and profile.get("reason") != reason:
+            continue
+        profile.pop("folded", None)
+        profile.pop("top_cumulative", None)
+        profile["top_own"] = profile.get("top_own", [])[:5]
+        profiles.append(profile)
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+
+def load_profile(profile_id: str) -> dict | None:
+    path = Path(get_settings().profile_dir) / f"{profile_id}.json"
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
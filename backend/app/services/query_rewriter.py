@@ -23,7 +23,9 @@ async def rewrite_query(original_query: str, persona_name: str) -> str:
         },
         {"role": "user", "content": original_query},
     ]
-    rewritten = await chat_completion(messages, temperature=0.0, max_tokens=100)
+    rewritten = await chat_completion(
+        messages, temperature=0.0, max_tokens=100, cache_namespace="query_rewrite"
+    )
     return rewritten.strip().strip('"').strip("'")
 
 
@@ -45,5 +47,5 @@ async def generate_hyde_document(query: str, persona_name: str) -> str:
         },
         {"role": "user", "content": query},
     ]
-    hyde_doc = await chat_completion(messages, temperature=0.3, max_tokens=150)
+    hyde_doc = await chat_completion(messages, temperature=0.3, max_tokens=150, cache_namespace="hyde")
     return hyde_doc.strip()
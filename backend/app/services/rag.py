@@ -5,18 +5,42 @@ Pipeline flow:
   → RRF Fusion → Cross-Encoder Rerank → Context w/ Citations → LLM Generation
 
 Each stage is independently toggleable via config flags.
+
+With RETRIEVAL_MODE=fanout the rewrite no longer gates retrieval: the raw
+message is searched immediately while the rewrite and a HyDE passage are
+generated concurrently, each variant is searched as soon as its text is
+ready, and every ranked list that arrives in time is fused with RRF.
+
+Every stage is timed into the `/api/metrics` histograms (see
+`app.services.metrics`), along with each request's LLM token usage. With
+DEBUG=true the sources event also carries the request's stage timings.
+With ENABLE_PROFILING=true slow and sampled requests are profiled (see
+`app.services.profiler`).
 """
 
+import asyncio
 import json
+import time
 from pathlib import Path
 from collections.abc import AsyncGenerator
 
 from app.config import get_settings
-from app.services.hybrid_retriever import hybrid_search
-from app.services.vectorstore import query_collection
-from app.services.query_rewriter import rewrite_query
+from app.services.executor import run_blocking
+from app.services.hybrid_retriever import (
+    candidate_lists_async,
+    dense_search,
+    hybrid_search_async,
+    reciprocal_rank_fusion,
+)
+from app.services.embeddings import embed_query
+from app.services.latency_budget import LatencyBudget, record_stage_latency, stage_p95
+from app.services.metrics import record_request, record_stage, span, track_timings
+from app.services.profiler import profile_request
+from app.services.semantic_cache import get_semantic_cache
+from app.services.vectorstore import get_corpus_fingerprint, get_documents_by_ids
+from app.services.query_rewriter import generate_hyde_document, rewrite_query
 from app.services.reranker import rerank
-from app.services.llm import stream_chat_completion
+from app.services.llm import stream_chat_completion, track_usage
 from app.models.schemas import ChatMessage
 
 PERSONAS_DIR = Path(__file__).parent.parent / "personas"
@@ -101,82 +125,293 @@ def build_messages(
     return messages
 
 
+async def _timed(stage: str, awaitable, optional: bool = True):
+    """Await a pipeline stage and feed its latency into the budget's p95
+    tracking and the stage metrics.
+
+    Stages that fail still record how long they ran. An optional stage that
+    gets cut off counts as too slow for the budget; a cut-off retrieval (its
+    variant timed out) is left out of the budget's history.
+    """
+    started = time.monotonic()
+    cut_off = False
+    try:
+        return await awaitable
+    except asyncio.CancelledError:
+        cut_off = True
+        raise
+    finally:
+        elapsed = time.monotonic() - started
+        if optional or not cut_off:
+            record_stage_latency(stage, elapsed, cut_off=cut_off)
+        record_stage(stage, elapsed)
+
+
+def _retrieval_reserve() -> float:
+    return stage_p95("retrieval") or 0.0
+
+
+async def _fanout_candidates(
+    persona_id: str,
+    persona_name: str,
+    user_message: str,
+    budget: LatencyBudget | None = None,
+) -> tuple[list[dict], str | None]:
+    """Multi-query retrieval: raw message, rewrite and HyDE variants searched concurrently.
+
+    Variants that fail or miss `variant_timeout_seconds` are dropped rather
+    than holding up the request. Returns (fused_candidates, rewritten_query).
+    """
+    settings = get_settings()
+    top_k = settings.hybrid_search_top_k
+
+    async def search_variant(stage: str, generate, include_sparse: bool = True) -> tuple[str, list[list[dict]]]:
+        text = await _timed(stage, generate)
+        lists = await _timed("retrieval", candidate_lists_async(
+            persona_id, text, top_k=top_k,
+            include_sparse=include_sparse and settings.enable_hybrid_search,
+        ), optional=False)
+        return text, lists
+
+    def start_variant(stage: str, make_coro):
+        """Start `make_coro()` as a task, unless the budget skips the stage."""
+        timeout = settings.variant_timeout_seconds
+        if budget is not None:
+            if not budget.allows(stage, reserve=_retrieval_reserve()):
+                budget.decide(stage, "skipped")
+                return None
+            timeout = min(timeout, budget.timeout_for(reserve=_retrieval_reserve()))
+        return asyncio.create_task(asyncio.wait_for(make_coro(), timeout=timeout))
+
+    original = asyncio.create_task(
+        _timed("retrieval", candidate_lists_async(persona_id, user_message, top_k=top_k), optional=False)
+    )
+    variants = {}
+    if settings.enable_query_rewrite:
+        variants["rewrite"] = start_variant(
+            "rewrite", lambda: search_variant("rewrite", rewrite_query(user_message, persona_name))
+        )
+    if settings.enable_hyde:
+        # HyDE passages are written to sit close to real documents in
+        # embedding space, so they only drive the dense leg
+        variants["hyde"] = start_variant(
+            "hyde",
+            lambda: search_variant("hyde", generate_hyde_document(user_message, persona_name), include_sparse=False),
+        )
+    variants = {name: task for name, task in variants.items() if task is not None}
+
+    result_lists = list(await original)
+    rewritten_query = None
+    for name, outcome in zip(variants, await asyncio.gather(*variants.values(), return_exceptions=True)):
+        if isinstance(outcome, BaseException):
+            # Timed out or failed: keep whatever else arrived
+            if budget is not None:
+                budget.decide(name, "timeout" if isinstance(outcome, asyncio.TimeoutError) else "error")
+            continue
+        text, lists = outcome
+        result_lists.extend(lists)
+        if name == "rewrite":
+            rewritten_query = text
+        if budget is not None:
+            budget.decide(name, "ran")
+
+    if len(result_lists) == 1:
+        return result_lists[0][:top_k], rewritten_query
+    fused = reciprocal_rank_fusion(*result_lists, k=settings.rrf_k)
+    return fused[:top_k], rewritten_query
+
+
 async def retrieve_context(
     persona_id: str,
     persona_name: str,
     user_message: str,
+    budget: LatencyBudget | None = None,
 ) -> tuple[list[dict], str | None]:
     """Run the full retrieval pipeline: rewrite → hybrid search → rerank.
 
+    With the semantic cache enabled, a query close enough to a recent one
+    reuses that query's final documents and skips the pipeline. With a
+    `budget`, the optional rewrite and rerank stages are skipped or cut short
+    when their recent p95 latency no longer fits; decisions land on the budget,
+    and results of a run where any stage didn't run are not cached.
+
     Returns:
         (final_documents, rewritten_query)
     """
+    settings = get_settings()
+    if not settings.enable_semantic_cache:
+        return await _run_pipeline(persona_id, persona_name, user_message, budget)
+
+    cache = get_semantic_cache(persona_id)
+    with span("semantic_cache"):
+        query_embedding, fingerprint = await asyncio.gather(
+            run_blocking(embed_query, user_message),
+            run_blocking(get_corpus_fingerprint, persona_id),
+        )
+        entry = cache.lookup(query_embedding, fingerprint)
+        documents = None
+        if entry is not None:
+            documents = await run_blocking(get_documents_by_ids, persona_id, entry.doc_ids)
+    if documents is not None and len(documents) == len(entry.doc_ids):
+        if budget is not None:
+            budget.decide("semantic_cache", "hit")
+        return documents, entry.rewritten_query
+
+    final_docs, rewritten_query = await _run_pipeline(persona_id, persona_name, user_message, budget)
+    # Results of a degraded pipeline would outlive the slowdown that caused it
+    if final_docs and (budget is None or not budget.degraded()):
+        cache.store(query_embedding, fingerprint, [doc["id"] for doc in final_docs], rewritten_query)
+    return final_docs, rewritten_query
+
+
+async def _run_pipeline(
+    persona_id: str,
+    persona_name: str,
+    user_message: str,
+    budget: LatencyBudget | None = None,
+) -> tuple[list[dict], str | None]:
     settings = get_settings()
     rewritten_query = None
 
-    # Stage 1: Query rewriting
-    search_query = user_message
-    if settings.enable_query_rewrite:
-        try:
-            rewritten_query = await rewrite_query(user_message, persona_name)
-            search_query = rewritten_query
-        except Exception:
-            pass  # Fall back to original query
-
-    # Stage 2: Retrieval (hybrid or embedding-only)
-    if settings.enable_hybrid_search:
-        candidates = hybrid_search(
-            persona_id, search_query, top_k=settings.hybrid_search_top_k
+    if settings.retrieval_mode == "fanout":
+        # Stages 1-2 overlapped: variants are generated and searched concurrently
+        candidates, rewritten_query = await _fanout_candidates(
+            persona_id, persona_name, user_message, budget
         )
+        search_query = rewritten_query or user_message
     else:
-        candidates = query_collection(
-            persona_id, search_query, top_k=settings.hybrid_search_top_k
-        )
+        # Stage 1: Query rewriting
+        search_query = user_message
+        if settings.enable_query_rewrite:
+            if budget is not None and not budget.allows("rewrite", reserve=_retrieval_reserve()):
+                budget.decide("rewrite", "skipped")
+            else:
+                try:
+                    rewrite = _timed("rewrite", rewrite_query(user_message, persona_name))
+                    if budget is not None:
+                        rewrite = asyncio.wait_for(rewrite, timeout=budget.timeout_for(reserve=_retrieval_reserve()))
+                    rewritten_query = await rewrite
+                    search_query = rewritten_query
+                    if budget is not None:
+                        budget.decide("rewrite", "ran")
+                except asyncio.TimeoutError:
+                    if budget is not None:
+                        budget.decide("rewrite", "timeout")
+                except Exception:
+                    # Fall back to original query
+                    if budget is not None:
+                        budget.decide("rewrite", "error")
+
+        # Stage 2: Retrieval (hybrid or embedding-only)
+        if settings.enable_hybrid_search:
+            candidates = await _timed("retrieval", hybrid_search_async(
+                persona_id, search_query, top_k=settings.hybrid_search_top_k
+            ), optional=False)
+        else:
+            candidates = await _timed("retrieval", run_blocking(
+                dense_search, persona_id, search_query, top_k=settings.hybrid_search_top_k
+            ), optional=False)
 
     # Stage 3: Reranking
+    final_docs = candidates[: settings.rag_top_k]
     if settings.enable_reranker and len(candidates) > settings.rag_top_k:
-        final_docs = await rerank(search_query, candidates, top_k=settings.rag_top_k)
-    else:
-        final_docs = candidates[: settings.rag_top_k]
+        if budget is not None and not budget.allows("rerank"):
+            budget.decide("rerank", "skipped")
+        else:
+            reranking = _timed("rerank", rerank(search_query, candidates, top_k=settings.rag_top_k))
+            if budget is None:
+                final_docs = await reranking
+            else:
+                try:
+                    final_docs = await asyncio.wait_for(reranking, timeout=budget.timeout_for())
+                    budget.decide("rerank", "ran")
+                except asyncio.TimeoutError:
+                    budget.decide("rerank", "timeout")
 
     return final_docs, rewritten_query
 
 
+async def stream_answer(
+    persona: dict,
+    user_message: str,
+    conversation_history: list[ChatMessage],
+    context_block: str,
+) -> AsyncGenerator[str, None]:
+    """Stream the persona's reply given an already-built context block."""
+    messages = build_messages(persona, user_message, conversation_history, context_block)
+    async for token in stream_chat_completion(
+        messages=messages,
+        temperature=persona.get("temperature", 0.7),
+        max_tokens=persona.get("max_tokens", 1024),
+    ):
+        yield token
+
+
 async def generate_response(
     persona_id: str,
     user_message: str,
     conversation_history: list[ChatMessage],
+    latency_budget_ms: int | None = None,
 ) -> AsyncGenerator[str | dict, None]:
     """Full RAG pipeline: retrieve, build context, generate with citations.
 
+    `latency_budget_ms` overrides the configured per-request budget; the
+    stage decisions it caused are reported in the sources event. Stage
+    latencies and token usage go to the metrics, and in debug mode to the
+    sources event as well.
+
     Yields:
         str tokens during generation, then a dict with sources metadata at the end.
     """
+    settings = get_settings()
     persona = load_persona(persona_id)
 
-    # Retrieval pipeline
-    documents, rewritten_query = await retrieve_context(
-        persona_id, persona["name"], user_message
-    )
-
-    # Build context with citation numbers
-    context_block, sources = build_context_block(documents)
-
-    # Build messages for LLM
-    messages = build_messages(persona, user_message, conversation_history, context_block)
-
-    # Stream LLM response
-    async for token in stream_chat_completion(
-        messages=messages,
-        temperature=persona.get("temperature", 0.7),
-        max_tokens=persona.get("max_tokens", 1024),
-    ):
-        yield token
+    budget = None
+    if latency_budget_ms is None and settings.enable_latency_budget:
+        latency_budget_ms = settings.latency_budget_ms
+    if latency_budget_ms:
+        budget = LatencyBudget(latency_budget_ms, probe_rate=settings.latency_budget_probe_rate)
 
-    # After all tokens, yield sources metadata
-    if sources:
-        yield {
-            "type": "sources",
-            "sources": sources,
-            "rewritten_query": rewritten_query,
-        }
+    outcome = "error"
+    with track_usage() as usage, track_timings() as timings, profile_request(persona_id, timings, usage):
+        try:
+            # Retrieval pipeline
+            documents, rewritten_query = await retrieve_context(
+                persona_id, persona["name"], user_message, budget
+            )
+
+            # Build context with citation numbers
+            with span("context_build"):
+                context_block, sources = build_context_block(documents)
+
+            generation_started = time.perf_counter()
+            first_token = True
+            async for token in stream_answer(persona, user_message, conversation_history, context_block):
+                if first_token:
+                    now = time.perf_counter()
+                    record_stage("llm_ttft", now - generation_started)
+                    record_stage("first_token", now - timings.started)
+                    first_token = False
+                yield token
+            record_stage("llm_generation", time.perf_counter() - generation_started)
+            record_stage("total", time.perf_counter() - timings.started)
+            outcome = "ok"
+
+            # After all tokens, yield sources metadata
+            if sources or settings.debug:
+                event = {
+                    "type": "sources",
+                    "sources": sources,
+                    "rewritten_query": rewritten_query,
+                }
+                if budget is not None:
+                    event["latency_budget"] = budget.report()
+                if settings.debug:
+                    event["timings"] = timings.as_dict()
+                    event["tokens"] = usage.as_dict()
+                yield event
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        finally:
+            record_request(outcome, usage)
@@ -0,0 +1,166 @@
+"""Dynamic micro-batching for the local cross-encoder reranker.
+
+Each chat request reranks ~20 (query, document) pairs. Calling
+`CrossEncoder.predict` once per request leaves most of the model's CPU
+throughput unused when many users chat at once. Instead, requests enqueue
+their pairs here and a single worker coroutine:
+
+1. waits for the first pair, then keeps collecting until the batch holds
+   `rerank_max_batch_size` pairs or `rerank_max_wait_ms` has passed;
+2. sorts the batch by text length so each inference mini-batch pads to
+   similar sequence lengths;
+3. runs inference on the retrieval thread pool (never on the event loop);
+4. resolves each waiting request's futures with its scores.
+
+Batch sizes, queue wait and inference time are tracked for `/api/admin/reranker`.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from app.config import get_settings
+from app.services.executor import run_blocking
+
+# Upper edges of the batch-size histogram buckets
+_BATCH_SIZE_BUCKETS = (1, 4, 16, 32, 64, 128, 256)
+_WINDOW = 1000
+
+
+@dataclass
+class _PendingPair:
+    query: str
+    document: str
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class CrossEncoderBatcher:
+    def __init__(self, model, max_batch_size: int, max_wait_ms: float, predict_batch_size: int):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.predict_batch_size = predict_batch_size
+
+        self._queue: asyncio.Queue[_PendingPair] | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self.batches = 0
+        self.pairs = 0
+        self._batch_size_counts = [0] * (len(_BATCH_SIZE_BUCKETS) + 1)
+        self._queue_waits: deque[float] = deque(maxlen=_WINDOW)
+        self._inference_times: deque[float] = deque(maxlen=_WINDOW)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # First use, or a new event loop (e.g. successive asyncio.run calls)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def score(self, query: str, documents: list[str]) -> list[float]:
+        """Relevance scores for (query, document) pairs, batched with other requests."""
+        if not documents:
+            return []
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        futures = []
+        for document in documents:
+            future = loop.create_future()
+            self._queue.put_nowait(_PendingPair(query, document, future, now))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Requests cancelled while queued (e.g. client disconnected) need no scores
+            batch = [item for item in batch if not item.future.done()]
+            if batch:
+                await self._infer(batch)
+
+    async def _infer(self, batch: list[_PendingPair]):
+        # Length-bucketing: neighbours in each inference mini-batch pad to similar lengths
+        batch.sort(key=lambda item: len(item.query) + len(item.document))
+        started = time.monotonic()
+        for item in batch:
+            self._queue_waits.append(started - item.enqueued_at)
+        try:
+            scores = await run_blocking(
+                self.model.predict,
+                [(item.query, item.document) for item in batch],
+                batch_size=self.predict_batch_size,
+                show_progress_bar=False,
+            )
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        self._inference_times.append(time.monotonic() - started)
+        self._record_batch(len(batch))
+        for item, score in zip(batch, scores):
+            if not item.future.done():
+                item.future.set_result(float(score))
+
+    def _record_batch(self, size: int):
+        self.batches += 1
+        self.pairs += size
+        for i, edge in enumerate(_BATCH_SIZE_BUCKETS):
+            if size <= edge:
+                self._batch_size_counts[i] += 1
+                break
+        else:
+            self._batch_size_counts[-1] += 1
+
+    def stats(self) -> dict:
+        waits = sorted(self._queue_waits)
+        inference = list(self._inference_times)
+        labels = [f"<={edge}" for edge in _BATCH_SIZE_BUCKETS] + [f">{_BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "batches": self.batches,
+            "pairs": self.pairs,
+            "avg_batch_size": round(self.pairs / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": dict(zip(labels, self._batch_size_counts)),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_wait_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "p95": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 2) if waits else 0.0,
+                "max": round(waits[-1] * 1000, 2) if waits else 0.0,
+            },
+            "avg_inference_ms": round(sum(inference) / len(inference) * 1000, 2) if inference else 0.0,
+        }
+
+
+_batcher: CrossEncoderBatcher | None = None
+
+
+def get_batcher(model) -> CrossEncoderBatcher:
+    global _batcher
+    if _batcher is None or _batcher.model is not model:
+        settings = get_settings()
+        _batcher = CrossEncoderBatcher(
+            model,
+            max_batch_size=settings.rerank_max_batch_size,
+            max_wait_ms=settings.rerank_max_wait_ms,
+            predict_batch_size=settings.rerank_predict_batch_size,
+        )
+    return _batcher
+
+
+def batcher_stats() -> dict | None:
+    return _batcher.stats() if _batcher is not None else None
@@ -0,0 +1,101 @@
+"""LRU cache of cross-encoder relevance scores.
+
+Repeated and near-repeated questions ("What is value investing?",
+"what is  Value Investing") send the same (query, chunk) pairs to the
+cross-encoder on every request. Scores are cached per pair, keyed by a hash
+of the normalized query (lowercased, whitespace collapsed) and the Chroma
+chunk id, so only pairs not seen before reach the model.
+
+Each entry also stores a hash of the chunk's content: when re-ingestion
+changes a chunk's text under the same id, the stale score is treated as a
+miss and replaced.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+from app.config import get_settings
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class RerankScoreCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # (query hash, chunk id) → (content hash, score)
+        self._entries: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get_many(self, query: str, documents: list[dict]) -> list[float | None]:
+        """Cached score per document (None for misses), in the given order."""
+        query_hash = _hash(_normalize_query(query))
+        scores = []
+        for doc in documents:
+            doc_id = doc.get("id")
+            entry = self._entries.get((query_hash, doc_id)) if doc_id is not None else None
+            if entry is not None and entry[0] == _hash(doc["content"]):
+                self._entries.move_to_end((query_hash, doc_id))
+                self.hits += 1
+                scores.append(entry[1])
+                continue
+            if entry is not None:
+                self.stale += 1
+            self.misses += 1
+            scores.append(None)
+        return scores
+
+    def put_many(self, query: str, documents: list[dict], scores: list[float]):
+        query_hash = _hash(_normalize_query(query))
+        for doc, score in zip(documents, scores):
+            doc_id = doc.get("id")
+            if doc_id is None:
+                continue
+            key = (query_hash, doc_id)
+            self._entries[key] = (_hash(doc["content"]), float(score))
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_cache: RerankScoreCache | None = None
+
+
+def get_score_cache() -> RerankScoreCache | None:
+    """The shared score cache, or None when it is disabled."""
+    global _cache
+    settings = get_settings()
+    if not settings.enable_rerank_cache:
+        return None
+    if _cache is None:
+        _cache = RerankScoreCache(settings.rerank_cache_max_entries)
+    return _cache
+
+
+def score_cache_stats() -> dict | None:
+    return _cache.stats() if _cache is not None else None
@@ -5,14 +5,26 @@ After initial retrieval (BM25 + embedding), a cross-encoder scores each
 
 Two implementations:
 1. LLM-based reranker (default) - uses the existing OpenRouter LLM
-2. Cross-encoder model (optional) - uses sentence-transformers locally
+2. Cross-encoder model (optional) - uses sentence-transformers locally,
+   in fp32 or int8 (see reranker_backends)
 
 The LLM reranker sends all candidates in a single prompt and asks for
 a relevance ranking, which is both practical and effective.
+
+`rerank` times whichever one runs as the "rerank_cross_encoder" or
+"rerank_llm" stage.
 """
 
 import re
+import threading
+
+from app.config import get_settings
+from app.services.executor import run_blocking
 from app.services.llm import chat_completion
+from app.services.metrics import span
+from app.services.rerank_batcher import get_batcher
+from app.services.rerank_cache import get_score_cache
+from app.services.reranker_backends import load_cross_encoder
 
 
 async def rerank_with_llm(
@@ -52,7 +64,9 @@ async def rerank_with_llm(
     ]
 
     try:
-        response = await chat_completion(messages, temperature=0.0, max_tokens=100)
+        response = await chat_completion(
+            messages, temperature=0.0, max_tokens=100, cache_namespace="rerank"
+        )
         # Parse the ranking: extract numbers from the response
         numbers = [int(n) for n in re.findall(r"\d+", response)]
         # Filter valid indices and deduplicate while preserving order
@@ -79,6 +93,7 @@ async def rerank_with_llm(
 
 _cross_encoder = None
 _cross_encoder_loaded = False
+_cross_encoder_lock = threading.Lock()
 
 
 def _load_cross_encoder():
@@ -86,34 +101,45 @@ def _load_cross_encoder():
     global _cross_encoder, _cross_encoder_loaded
     if _cross_encoder_loaded:
         return _cross_encoder
-    _cross_encoder_loaded = True
-    try:
-        from sentence_transformers import CrossEncoder
-        _cross_encoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
-    except ImportError:
-        _cross_encoder = None
+    # Reranking runs on the retrieval thread pool; load the model only once
+    with _cross_encoder_lock:
+        if _cross_encoder_loaded:
+            return _cross_encoder
+        try:
+            _cross_encoder = load_cross_encoder()
+        except ImportError:
+            _cross_encoder = None
+        _cross_encoder_loaded = True
     return _cross_encoder
 
 
-def rerank_with_cross_encoder(
-    query: str,
-    documents: list[dict],
-    top_k: int = 5,
-) -> list[dict] | None:
-    """Rerank using a local cross-encoder model. Returns None if model unavailable."""
-    model = _load_cross_encoder()
-    if model is None:
-        return None
-
-    pairs = [(query, doc["content"]) for doc in documents]
-    scores = model.predict(pairs)
-
+def _top_by_score(documents: list[dict], scores, top_k: int) -> list[dict]:
     scored_docs = list(zip(documents, scores))
     scored_docs.sort(key=lambda x: x[1], reverse=True)
 
     return [doc for doc, _ in scored_docs[:top_k]]
 
 
+async def _cross_encoder_scores(model, query: str, documents: list[dict]) -> list[float]:
+    """Score documents, sending only pairs missing from the score cache to the model."""
+    cache = get_score_cache()
+    scores = cache.get_many(query, documents) if cache is not None else [None] * len(documents)
+    misses = [i for i, score in enumerate(scores) if score is None]
+    if not misses:
+        return scores
+
+    texts = [documents[i]["content"] for i in misses]
+    if get_settings().enable_rerank_batching:
+        new_scores = await get_batcher(model).score(query, texts)
+    else:
+        new_scores = await run_blocking(model.predict, [(query, text) for text in texts])
+    for i, score in zip(misses, new_scores):
+        scores[i] = float(score)
+    if cache is not None:
+        cache.put_many(query, [documents[i] for i in misses], new_scores)
+    return scores
+
+
 async def rerank(
     query: str,
     documents: list[dict],
@@ -123,10 +149,13 @@ async def rerank(
     if not documents:
         return []
 
-    # Try local cross-encoder (faster, no API cost)
-    result = rerank_with_cross_encoder(query, documents, top_k)
-    if result is not None:
-        return result
+    # Try local cross-encoder (faster, no API cost), off the event loop
+    model = await run_blocking(_load_cross_encoder)
+    if model is not None:
+        with span("rerank_cross_encoder"):
+            scores = await _cross_encoder_scores(model, query, documents)
+        return _top_by_score(documents, scores, top_k)
 
     # Fall back to LLM-based reranking
-    return await rerank_with_llm(query, documents, top_k)
+    with span("rerank_llm"):
+        return await rerank_with_llm(query, documents, top_k)
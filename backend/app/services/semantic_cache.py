@@ -0,0 +1,164 @@
+"""Semantic retrieval cache: reuse the final reranked documents for near-duplicate queries.
+
+Traffic per persona is repetitive ("What is value investing?" arrives in
+dozens of phrasings). Each persona keeps a small cache mapping query
+embeddings to the chunk ids `retrieve_context` returned; a new query whose
+embedding has cosine similarity ≥ `semantic_cache_threshold` with a cached
+one skips rewrite, hybrid search and reranking entirely.
+
+Entries are evicted LRU beyond `semantic_cache_max_entries`, expire after
+`semantic_cache_ttl_seconds`, and are all dropped when the persona's corpus
+fingerprint changes (i.e. after re-ingestion). Lookups whose best match falls
+between `semantic_cache_near_miss_threshold` and the hit threshold are counted
+as near misses to help tune the threshold.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.config import get_settings
+
+
+@dataclass
+class CacheEntry:
+    embedding: np.ndarray  # L2-normalized
+    doc_ids: list[str]
+    rewritten_query: str | None
+    created_at: float
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        threshold: float,
+        near_miss_threshold: float,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.near_miss_threshold = near_miss_threshold
+
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        self._next_key = 0
+        self._fingerprint: str | None = None
+        self._matrix: np.ndarray | None = None
+        self._matrix_keys: list[int] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.near_misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_fingerprint(self, fingerprint: str):
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+            self._fingerprint = fingerprint
+
+    def _expire(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self.expirations += len(expired)
+            self._matrix = None
+
+    def lookup(self, embedding: np.ndarray, fingerprint: str) -> CacheEntry | None:
+        """Return the most similar live entry at or above the threshold, if any."""
+        self._check_fingerprint(fingerprint)
+        self._expire(time.monotonic())
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            self._matrix = np.stack([self._entries[key].embedding for key in self._matrix_keys])
+        similarities = self._matrix @ _normalize(embedding)
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+
+        if similarity >= self.threshold:
+            key = self._matrix_keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        if similarity >= self.near_miss_threshold:
+            self.near_misses += 1
+        return None
+
+    def store(
+        self,
+        embedding: np.ndarray,
+        fingerprint: str,
+        doc_ids: list[str],
+        rewritten_query: str | None,
+    ):
+        self._check_fingerprint(fingerprint)
+        self._entries[self._next_key] = CacheEntry(
+            embedding=_normalize(embedding),
+            doc_ids=doc_ids,
+            rewritten_query=rewritten_query,
+            created_at=time.monotonic(),
+        )
+        self._next_key += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._matrix = None
+
+    def clear(self):
+        self._entries.clear()
+        self._matrix = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "near_misses": self.near_misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "miss_rate": round(self.misses / lookups, 4) if lookups else 0.0,
+            "near_miss_rate": round(self.near_misses / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+_caches: dict[str, SemanticCache] = {}
+
+
+def get_semantic_cache(persona_id: str) -> SemanticCache:
+    if persona_id not in _caches:
+        settings = get_settings()
+        _caches[persona_id] = SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            ttl_seconds=settings.semantic_cache_ttl_seconds,
+            threshold=settings.semantic_cache_threshold,
+            near_miss_threshold=settings.semantic_cache_near_miss_threshold,
+        )
+    return _caches[persona_id]
+
+
+def semantic_cache_stats() -> dict[str, dict]:
+    """Per-persona hit/miss/near-miss statistics."""
+    return {persona_id: cache.stats() for persona_id, cache in _caches.items()}
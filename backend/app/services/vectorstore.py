@@ -1,34 +1,77 @@
+import hashlib
+import threading
+import time
+
 import chromadb
 from app.config import get_settings
+from app.services.embeddings import embed_query, get_embedding_function
 
 
 _client: chromadb.ClientAPI | None = None
+_lock = threading.Lock()
+
+# Collection handles and (count, fetched_at) per persona, so hot-path queries
+# don't re-resolve the collection and re-count it every time
+_collections: dict[str, chromadb.Collection] = {}
+_counts: dict[str, tuple[int, float]] = {}
+_fingerprints: dict[str, tuple[str, float]] = {}
 
 
 def get_chroma_client() -> chromadb.ClientAPI:
     global _client
     if _client is None:
-        settings = get_settings()
-        _client = chromadb.PersistentClient(path=settings.chroma_db_path)
+        with _lock:
+            if _client is None:
+                settings = get_settings()
+                _client = chromadb.PersistentClient(path=settings.chroma_db_path)
     return _client
 
 
 def get_collection(persona_id: str) -> chromadb.Collection:
-    client = get_chroma_client()
-    return client.get_or_create_collection(
-        name=persona_id,
-        metadata={"hnsw:space": "cosine"},
-    )
+    collection = _collections.get(persona_id)
+    if collection is None:
+        client = get_chroma_client()
+        collection = client.get_or_create_collection(
+            name=persona_id,
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=get_embedding_function(),
+        )
+        _collections[persona_id] = collection
+    return collection
+
+
+def get_collection_count(persona_id: str) -> int:
+    """Number of chunks in a persona's collection, cached for `collection_count_ttl_seconds`."""
+    cached = _counts.get(persona_id)
+    now = time.monotonic()
+    if cached is not None and now - cached[1] < get_settings().collection_count_ttl_seconds:
+        return cached[0]
+    count = get_collection(persona_id).count()
+    _counts[persona_id] = (count, now)
+    return count
+
+
+def invalidate_collection_cache(persona_id: str | None = None):
+    """Forget cached collection handles and counts. Call after re-ingestion."""
+    if persona_id:
+        _collections.pop(persona_id, None)
+        _counts.pop(persona_id, None)
+        _fingerprints.pop(persona_id, None)
+    else:
+        _collections.clear()
+        _counts.clear()
+        _fingerprints.clear()
 
 
 def query_collection(persona_id: str, query: str, top_k: int = 5) -> list[dict]:
     """Semantic search via ChromaDB embeddings. Returns results with IDs and scores."""
-    collection = get_collection(persona_id)
-    if collection.count() == 0:
+    count = get_collection_count(persona_id)
+    if count == 0:
         return []
+    collection = get_collection(persona_id)
     results = collection.query(
-        query_texts=[query],
-        n_results=min(top_k, collection.count()),
+        query_embeddings=[embed_query(query)],
+        n_results=min(top_k, count),
         include=["documents", "metadatas", "distances"],
     )
     documents = []
@@ -45,9 +88,57 @@ def query_collection(persona_id: str, query: str, top_k: int = 5) -> list[dict]:
     return documents
 
 
+def get_documents_by_ids(persona_id: str, ids: list[str]) -> list[dict]:
+    """Fetch chunks by id, in the order given. Ids no longer in the collection are skipped."""
+    if not ids:
+        return []
+    results = get_collection(persona_id).get(ids=ids, include=["documents", "metadatas"])
+    by_id = {
+        doc_id: {"content": doc, "metadata": meta or {}, "id": doc_id}
+        for doc_id, doc, meta in zip(results["ids"], results["documents"], results["metadatas"])
+    }
+    return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+
 def get_all_documents(persona_id: str) -> dict:
     """Retrieve all documents from a persona's collection for BM25 indexing."""
     collection = get_collection(persona_id)
     if collection.count() == 0:
         return {"ids": [], "documents": [], "metadatas": []}
     return collection.get(include=["documents", "metadatas"])
+
+
+def get_document_ids(persona_id: str) -> list[str]:
+    """List the chunk ids in a persona's collection (no documents or embeddings)."""
+    collection = get_collection(persona_id)
+    if collection.count() == 0:
+        return []
+    return collection.get(include=[])["ids"]
+
+
+def corpus_fingerprint(ids: list[str]) -> str:
+    """Order-independent fingerprint of a collection's contents.
+
+    Chunk ids are content hashes (see `ingestion.ingest.generate_id`), so the
+    set of ids changes whenever any chunk is added, removed or edited.
+    """
+    digest = hashlib.md5()
+    for doc_id in sorted(ids):
+        digest.update(doc_id.encode())
+        digest.update(b"\n")
+    return f"{len(ids)}-{digest.hexdigest()}"
+
+
+def get_corpus_fingerprint(persona_id: str) -> str:
+    """Fingerprint of a persona's collection, cached like `get_collection_count`.
+
+    Lets caches notice a re-ingest (even one run by another process) within
+    `collection_count_ttl_seconds`.
+    """
+    cached = _fingerprints.get(persona_id)
+    now = time.monotonic()
+    if cached is not None and now - cached[1] < get_settings().collection_count_ttl_seconds:
+        return cached[0]
+    fingerprint = corpus_fingerprint(get_document_ids(persona_id))
+    _fingerprints[persona_id] = (fingerprint, now)
+    return fingerprint
@@ -0,0 +1,93 @@
+"""Micro-benchmark: `chunk_document` (sentence lists) vs `chunk_spans` (offsets).
+
+Runs both chunkers over the scraped Gutenberg books in two shapes:
+
+- per document: every cleaned passage chunked separately, as ingestion does;
+- whole book: each book's passages joined with blank lines into one long
+  text, which stresses the sentence-window and merge stages.
+
+`chunk_spans` is timed with a character counter and max 500 / min 50, the
+same sizing as `chunk_document`, so the comparison isolates the algorithm,
+and with the default approximate token counter.
+
+Usage:
+    python -m benchmarks.chunker
+    python -m benchmarks.chunker --repeat 5 --files data/raw/gutenberg_franklin.jsonl
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from ingestion.chunker import approx_token_count, chunk_document, chunk_spans
+from ingestion.cleaner import clean_text, is_useful
+from ingestion.ingest import RAW_DATA_DIR, read_raw_documents
+
+
+def load_books(files: list[Path]) -> list[tuple[str, list[tuple[str, str]]]]:
+    """(book name, [(cleaned text, doc_type), ...]) per raw file."""
+    books = []
+    for path in files:
+        docs = []
+        for doc in read_raw_documents(path):
+            cleaned = clean_text(doc["content"])
+            if is_useful(cleaned):
+                docs.append((cleaned, doc["doc_type"]))
+        if docs:
+            books.append((path.name, docs))
+    return books
+
+
+def run_chunkers(texts: list[tuple[str, str]]) -> dict[str, Callable[..., list]]:
+    return {
+        "chunk_document (chars)": lambda: [chunk_document(text, doc_type) for text, doc_type in texts],
+        "chunk_spans (chars)": lambda: [
+            chunk_spans(text, doc_type, max_tokens=500, min_tokens=50, count_tokens=len)
+            for text, doc_type in texts
+        ],
+        "chunk_spans (approx tokens)": lambda: [
+            chunk_spans(text, doc_type, count_tokens=approx_token_count) for text, doc_type in texts
+        ],
+    }
+
+
+def bench(label: str, texts: list[tuple[str, str]], repeat: int):
+    size_mb = sum(len(text) for text, _ in texts) / 1e6
+    print(f"\n{label}: {len(texts)} texts, {size_mb:.2f} MB")
+    baseline = None
+    for name, fn in run_chunkers(texts).items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        chunks = sum(len(r) for r in result)
+        baseline = baseline or best
+        print(f"  {name:28s} {best * 1000:8.1f} ms  {size_mb / best:7.2f} MB/s  "
+              f"{chunks:7d} chunks  {baseline / best:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chunkers on Gutenberg books")
+    parser.add_argument(
+        "--files", nargs="*", type=Path, default=None,
+        help="Raw files to use (default: data/raw/gutenberg_*)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per chunker (best is reported)")
+    args = parser.parse_args()
+
+    files = args.files or sorted(RAW_DATA_DIR.glob("gutenberg_*"))
+    books = load_books(files)
+    if not books:
+        print(f"No Gutenberg data found in {RAW_DATA_DIR} — run `make scrape` or pass --files")
+        return
+
+    per_document = [doc for _, docs in books for doc in docs]
+    whole_books = [("\n\n".join(text for text, _ in docs), "book") for _, docs in books]
+    bench("Per document", per_document, args.repeat)
+    bench("Whole books", whole_books, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Benchmark: BeautifulSoup tree vs streaming extraction of Gutenberg books.
+
+For each book, times both paths of `GutenbergScraper` and measures their
+peak Python memory with tracemalloc (in separate runs, since tracing slows
+everything down):
+
+- tree:   read the whole page into a string, `BeautifulSoup(..., "html.parser")`,
+          decompose boilerplate, `find_all(["p", "blockquote"])`;
+- stream: `iter_book_file`, which feeds the file to an event-driven parser in
+          64 KB chunks and yields passages as they close.
+
+Both must produce identical passages. Books come from the scraper HTTP cache
+(run `make scrape` once); `--synthetic MB` generates a Gutenberg-like book
+instead, for machines without network access.
+
+Usage:
+    python -m benchmarks.gutenberg_parse
+    python -m benchmarks.gutenberg_parse --synthetic 8 --repeat 5
+    python -m benchmarks.gutenberg_parse --files book.html other.html.gz
+"""
+
+import argparse
+import gzip
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from scrapers.gutenberg import (
+    ConfuciusGutenbergScraper,
+    FranklinGutenbergScraper,
+    GutenbergScraper,
+    MarcusAureliusGutenbergScraper,
+)
+from scrapers.http_cache import DEFAULT_CACHE_DIR, HTTPCache
+
+WORDS = (
+    "the of and to in that he was it his with as for had be is not on but my "
+    "virtue reason nature friend men life good mind time world duty soul wisdom "
+    "industry frugality character honour fortune temperance justice labour"
+).split()
+
+
+def synthetic_book(path: Path, megabytes: float, seed: int = 0):
+    """Write a Gutenberg-style HTML book: boilerplate header/footer, license
+    <pre>, chapters of paragraphs with inline markup, and verse blockquotes."""
+    rng = random.Random(seed)
+
+    def sentence() -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+        if rng.random() < 0.2:
+            i = rng.randrange(len(words))
+            words[i] = f"<i>{words[i]}</i>"
+        return " ".join(words).capitalize() + rng.choice([".", ".", ";", "&mdash;", "!"])
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n<html><head><title>Book</title><style>p { margin: 0 }</style></head><body>\n")
+        f.write('<section class="pg-boilerplate pg-header"><div class="pg-header">'
+                "<p>The Project Gutenberg eBook of a book, for use anywhere at no cost.</p></div></section>\n")
+        f.write("<pre>This eBook is for the use of anyone anywhere in the United States.</pre>\n")
+        chapter = 0
+        while f.tell() < megabytes * 1e6:
+            chapter += 1
+            f.write(f'<div class="chapter"><h2><a id="ch{chapter}"></a>CHAPTER {chapter}</h2>\n')
+            for _ in range(rng.randint(10, 40)):
+                if rng.random() < 0.1:
+                    lines = "<br />\n".join(sentence() for _ in range(4))
+                    f.write(f'<blockquote><p class="poem">{lines}</p></blockquote>\n')
+                else:
+                    f.write("<p>\n" + " ".join(sentence() for _ in range(rng.randint(1, 8))) + "\n</p>\n")
+            f.write("</div>\n")
+        f.write('<div class="pg-boilerplate pg-footer"><p>End of the Project Gutenberg eBook.</p>'
+                "<p>Donate to Project Gutenberg: https://www.gutenberg.org/donate/</p></div>\n")
+        f.write("</body></html>\n")
+
+
+def cached_books() -> list[tuple[Path, str, dict]]:
+    """(gzipped body, encoding, book) for every Gutenberg book in the HTTP cache."""
+    cache = HTTPCache(DEFAULT_CACHE_DIR)
+    books = []
+    for cls in (FranklinGutenbergScraper, MarcusAureliusGutenbergScraper, ConfuciusGutenbergScraper):
+        for book in cls().books:
+            entry = cache.get(book["url"])
+            if entry is not None:
+                books.append((cache.body_path(entry), entry.encoding, book))
+    return books
+
+
+def read_text(path: Path, encoding: str) -> str:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding=encoding, errors="replace", newline="") as f:
+        return f.read()
+
+
+def run_tree(scraper: GutenbergScraper, path: Path, encoding: str, book: dict) -> list[str]:
+    return [doc.content for doc in scraper._parse_book(read_text(path, encoding), book)]
+
+
+def run_stream(scraper: GutenbergScraper, path: Path, encoding: str, book: dict) -> list[str]:
+    return [doc.content for doc in scraper.iter_book_file(path, encoding, book)]
+
+
+def measure(fn, repeat: int) -> tuple[float, float, list[str]]:
+    """(best seconds, peak traced MB, result)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tree vs streaming Gutenberg extraction")
+    parser.add_argument("--files", nargs="*", type=Path, default=None, help="HTML files (.html or .html.gz)")
+    parser.add_argument("--synthetic", type=float, default=None, help="Generate a book of this many MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per path (best is reported)")
+    args = parser.parse_args()
+
+    scraper = GutenbergScraper(persona_id="benchmark", books=[])
+    tmp = tempfile.TemporaryDirectory()
+    if args.files:
+        inputs = [(path, "utf-8", {"url": str(path), "title": path.name}) for path in args.files]
+    elif args.synthetic:
+        path = Path(tmp.name) / "synthetic.html"
+        synthetic_book(path, args.synthetic)
+        inputs = [(path, "utf-8", {"url": "synthetic", "title": f"synthetic {args.synthetic:g} MB"})]
+    else:
+        inputs = cached_books()
+        if not inputs:
+            print(f"No Gutenberg books in {DEFAULT_CACHE_DIR} — run `make scrape`, or pass --synthetic MB")
+            return
+
+    print(f"{'book':45s} {'size':>8s}  {'path':6s} {'time':>9s} {'peak mem':>10s} {'passages':>8s}")
+    for path, encoding, book in inputs:
+        size_mb = len(read_text(path, encoding).encode(encoding, errors="replace")) / 1e6
+        tree_s, tree_mb, tree = measure(lambda: run_tree(scraper, path, encoding, book), args.repeat)
+        stream_s, stream_mb, stream = measure(lambda: run_stream(scraper, path, encoding, book), args.repeat)
+        for name, seconds, peak, result in (("tree", tree_s, tree_mb, tree), ("stream", stream_s, stream_mb, stream)):
+            print(f"{book['title'][:45]:45s} {size_mb:6.2f}MB  {name:6s} {seconds * 1000:7.0f}ms "
+                  f"{peak:8.1f}MB {len(result):8d}")
+        print(f"{'':45s} {'':8s}  speedup {tree_s / stream_s:.2f}x, memory {tree_mb / stream_mb:.1f}x lower, "
+              f"identical output: {'yes' if tree == stream else 'NO'}")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""Benchmark: retrieval stages on synthetic persona corpora of growing size.
+
+For each corpus size (1k, 10k, 100k, 1M chunks) a synthetic persona is
+generated, ingested into a temporary ChromaDB and BM25 index, and the
+retrieval stages are timed one query at a time:
+
+- embed_query:      query embedding (LRU cache cleared first);
+- query_collection: dense HNSW search (query vector already cached);
+- bm25_search:      sparse search on the memory-mapped index artifact;
+- bm25_search_many: the same queries scored in batches of `--batch-size`
+                    with one sparse matrix product (latency is per query,
+                    amortized over its batch);
+- hybrid_search:    both legs plus reciprocal rank fusion;
+- rerank:           local cross-encoder over the hybrid candidates, when the
+                    model is installed and cached (never the LLM fallback).
+
+Each stage reports p50/p95/p99 latency, sequential throughput and the peak
+RSS of the process while it ran. Every size runs in a fresh process, so
+memory figures don't carry over from smaller corpora.
+
+Chunks are drawn from a Zipfian vocabulary mixed with per-topic
+vocabularies, so term statistics and posting lengths look like real text.
+By default they are embedded with a deterministic hashing embedding (`hash`)
+so nothing is downloaded; `--embedding model` uses the configured embedding
+model instead. Nothing calls an LLM or the network.
+
+Results are written as JSON and compared with a stored baseline (the
+committed `benchmarks/baselines/retrieval.json`, recorded on one CPU with
+the default options): any stage slower (or with a larger peak RSS) than the
+baseline by more than `--tolerance` is reported as a regression and the exit
+status is 1. `--save-baseline` still reports regressions against the old
+baseline, then replaces it. Timings depend on the machine, so compare runs
+on the same hardware and re-record the baseline when it changes.
+
+Usage:
+    python -m benchmarks.retrieval
+    python -m benchmarks.retrieval --sizes 1k 10k 100k 1m
+    python -m benchmarks.retrieval --save-baseline
+    python -m benchmarks.retrieval --baseline benchmarks/baselines/retrieval.json --tolerance 0.3
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_OUTPUT = Path("benchmarks/results/retrieval.json")
+DEFAULT_BASELINE = Path("benchmarks/baselines/retrieval.json")
+
+# Metric → True if higher is better
+COMPARED_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "qps": True, "peak_rss_mb": False}
+
+VOCAB_SIZE = 50_000
+NUM_TOPICS = 256
+TOPIC_VOCAB_SIZE = 2_000
+TOPIC_SHARE = 0.7  # fraction of a chunk's tokens drawn from its topic
+ZIPF_EXPONENT = 1.1
+CHUNK_TOKENS = (40, 120)  # ~500 characters, like ingestion's chunks
+QUERY_TOKENS = (3, 8)
+GENERATE_BATCH = 10_000
+
+
+def parse_size(value: str) -> int:
+    """Parse a corpus size such as 1000, 10k or 1m."""
+    match = re.fullmatch(r"(\d+)([km]?)", value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid corpus size: {value}")
+    return int(match.group(1)) * {"": 1, "k": 1_000, "m": 1_000_000}[match.group(2)]
+
+
+def size_label(size: int) -> str:
+    if size >= 1_000_000 and size % 1_000_000 == 0:
+        return f"{size // 1_000_000}m"
+    if size >= 1_000 and size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+class SyntheticCorpus:
+    """Deterministic generator of synthetic chunks and queries over one vocabulary."""
+
+    def __init__(self, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        vocab_rng = np.random.default_rng(seed + 1)
+        syllables = [c + v for c in "bcdfghklmnprstvz" for v in "aeiou"]
+        words = set()
+        while len(words) < VOCAB_SIZE:
+            n = vocab_rng.integers(1, 5)
+            words.add("".join(syllables[i] for i in vocab_rng.integers(0, len(syllables), n)))
+        self.vocab = sorted(words, key=lambda w: (len(w), w))  # short words are the frequent ones
+        self.word_ids = {word: i for i, word in enumerate(self.vocab)}
+        self.topics = vocab_rng.integers(0, VOCAB_SIZE, (NUM_TOPICS, TOPIC_VOCAB_SIZE))
+
+    def _token_ids(self, lengths: np.ndarray) -> np.ndarray:
+        """Word ids for len(lengths) texts, concatenated."""
+        total = int(lengths.sum())
+        topics = np.repeat(self.rng.integers(0, NUM_TOPICS, len(lengths)), lengths)
+        ranks = self.rng.zipf(ZIPF_EXPONENT, total) - 1
+        from_topic = self.rng.random(total) < TOPIC_SHARE
+        return np.where(
+            from_topic,
+            self.topics[topics, ranks % TOPIC_VOCAB_SIZE],
+            ranks % VOCAB_SIZE,
+        )
+
+    def _texts(self, count: int, token_range: tuple[int, int]) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """(texts, token ids, per-text offsets into the ids)."""
+        lengths = self.rng.integers(token_range[0], token_range[1] + 1, count)
+        ids = self._token_ids(lengths)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        words = [self.vocab[i] for i in ids.tolist()]
+        texts = [" ".join(words[offsets[i]:offsets[i + 1]]) for i in range(count)]
+        return texts, ids, offsets
+
+    def chunks(self, count: int):
+        """Yield (texts, token ids, offsets) batches totalling `count` chunks."""
+        for start in range(0, count, GENERATE_BATCH):
+            yield self._texts(min(GENERATE_BATCH, count - start), CHUNK_TOKENS)
+
+    def queries(self, count: int) -> list[str]:
+        texts, _, _ = self._texts(count, QUERY_TOKENS)
+        return texts
+
+
+class HashingEmbedding:
+    """Bag-of-words embedding: the sum of a fixed random vector per token,
+    L2-normalized. Unknown tokens are hashed into the vocabulary."""
+
+    def __init__(self, corpus: SyntheticCorpus, dim: int, seed: int = 0):
+        self.word_ids = corpus.word_ids
+        rng = np.random.default_rng(seed + 2)
+        self.vectors = rng.standard_normal((VOCAB_SIZE, dim)).astype(np.float32)
+
+    def from_ids(self, ids: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        counts = sparse.csr_matrix(
+            (np.ones(len(ids), dtype=np.float32), (rows, ids)),
+            shape=(len(offsets) - 1, VOCAB_SIZE),
+        )
+        embeddings = np.asarray(counts @ self.vectors, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        ids, offsets = [], [0]
+        for text in texts:
+            for token in re.findall(r"\w+", text.lower()):
+                word_id = self.word_ids.get(token)
+                ids.append(word_id if word_id is not None else zlib.crc32(token.encode()) % VOCAB_SIZE)
+            offsets.append(len(ids))
+        return self.from_ids(np.array(ids, dtype=np.int64), np.array(offsets))
+
+
+def install_hashing_embedding(hashing: HashingEmbedding):
+    """Make the shared embedding function embed with `hashing` (no model load)."""
+    from app.services import embeddings
+
+    function = embeddings.get_embedding_function()
+    function.model_name = "synthetic-hashing"
+    function._loaded = True
+    function.embed = hashing.embed
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's RSS high-water mark (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    """Peak RSS since the last reset (or since start if resets aren't supported)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return _peak_rss_mb()
+
+
+def summarize(latencies: list[float], peak_rss_mb: float) -> dict:
+    ms = np.array(latencies) * 1000
+    return {
+        "queries": len(latencies),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "qps": round(len(latencies) / float(np.sum(latencies)), 1),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+
+
+def time_stage(fn, queries: list[str], warmup: list[str]) -> dict:
+    for query in warmup:
+        fn(query)
+    gc.collect()
+    _reset_peak_rss()
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, _peak_rss_mb())
+
+
+def time_batched_stage(fn, queries: list[str], warmup: list[str], batch_size: int) -> dict:
+    """`time_stage` for a function taking a list of queries; each query is
+    charged its batch's time divided by the batch size."""
+    fn(warmup)
+    gc.collect()
+    _reset_peak_rss()
+    latencies = []
+    for i in range(0, len(queries), batch_size):
+        batch = queries[i:i + batch_size]
+        start = time.perf_counter()
+        fn(batch)
+        latencies.extend([(time.perf_counter() - start) / len(batch)] * len(batch))
+    return summarize(latencies, _peak_rss_mb())
+
+
+async def _time_rerank(rerank, candidates: dict[str, list[dict]], queries: list[str], warmup: list[str], top_k: int):
+    for query in warmup:
+        await rerank(query, candidates[query], top_k)
+    gc.collect()
+    _reset_peak_rss()
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await rerank(query, candidates[query], top_k)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, _peak_rss_mb())
+
+
+def _load_reranker():
+    """The local cross-encoder, or (None, reason) if it isn't available offline."""
+    from app.services import reranker
+
+    try:
+        model = reranker._load_cross_encoder()
+    except Exception as e:
+        return None, f"cross-encoder failed to load: {e.__class__.__name__}"
+    if model is None:
+        return None, "sentence-transformers is not installed"
+    return model, None
+
+
+def run_size(size: int, workdir: str, options: dict) -> dict:
+    """Generate, ingest and benchmark one corpus. Runs in a fresh process."""
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+    from app.config import get_settings
+
+    settings = get_settings()
+    settings.chroma_db_path = str(Path(workdir) / "chroma")
+    settings.bm25_index_path = str(Path(workdir) / "bm25")
+    settings.enable_hybrid_search = True
+    settings.enable_rerank_cache = False  # every rerank call must score its pairs
+
+    from app.services.bm25_index import bm25_search, bm25_search_many, build_index, get_or_build_index, invalidate_cache, save_index
+    from app.services.embeddings import embed_query, get_embedding_function
+    from app.services.hybrid_retriever import hybrid_search
+    from app.services.reranker import rerank
+    from app.services.vectorstore import get_chroma_client, get_collection, query_collection
+
+    persona_id = f"synthetic-{size_label(size)}"
+    corpus = SyntheticCorpus(options["seed"])
+    hashing = None
+    if options["embedding"] == "hash":
+        hashing = HashingEmbedding(corpus, options["dim"], options["seed"])
+        install_hashing_embedding(hashing)
+    result = {"chunks": size}
+
+    # Ingest
+    collection = get_collection(persona_id)
+    max_batch = get_chroma_client().get_max_batch_size()
+    all_ids, all_texts = [], []
+    generate_seconds = embed_seconds = upsert_seconds = 0.0
+    start = time.perf_counter()
+    batches = corpus.chunks(size)
+    while True:
+        t0 = time.perf_counter()
+        batch = next(batches, None)
+        generate_seconds += time.perf_counter() - t0
+        if batch is None:
+            break
+        texts, token_ids, offsets = batch
+        t0 = time.perf_counter()
+        if hashing is not None:
+            vectors = hashing.from_ids(token_ids, offsets)
+        else:
+            vectors = get_embedding_function().embed(texts)
+        embed_seconds += time.perf_counter() - t0
+        ids = [f"{persona_id}-{len(all_ids) + i}" for i in range(len(texts))]
+        metadatas = [
+            {"source": f"synthetic/{(len(all_ids) + i) // 50}", "doc_type": "book", "persona_id": persona_id}
+            for i in range(len(texts))
+        ]
+        t0 = time.perf_counter()
+        for i in range(0, len(texts), max_batch):
+            collection.add(
+                ids=ids[i:i + max_batch],
+                embeddings=vectors[i:i + max_batch],
+                documents=texts[i:i + max_batch],
+                metadatas=metadatas[i:i + max_batch],
+            )
+        upsert_seconds += time.perf_counter() - t0
+        all_ids.extend(ids)
+        all_texts.extend(texts)
+    result["ingest"] = {
+        "seconds": round(time.perf_counter() - start, 2),
+        "generate_seconds": round(generate_seconds, 2),
+        "embed_seconds": round(embed_seconds, 2),
+        "upsert_seconds": round(upsert_seconds, 2),
+        "chunks_per_second": round(size / upsert_seconds, 1),
+    }
+
+    start = time.perf_counter()
+    index = build_index(all_ids, all_texts, [{} for _ in all_ids])
+    save_index(persona_id, index)
+    result["ingest"]["bm25_build_seconds"] = round(time.perf_counter() - start, 2)
+    del index, all_ids, all_texts, batches
+    gc.collect()
+
+    # Load the index artifact the way the server does, then warm up
+    invalidate_cache(persona_id)
+    start = time.perf_counter()
+    get_or_build_index(persona_id)._refresh()
+    result["bm25_load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    result["rss_mb"] = round(_rss_mb(), 1)
+
+    queries = corpus.queries(options["queries"] + options["warmup"])
+    warmup, queries = queries[:options["warmup"]], queries[options["warmup"]:]
+    top_k = settings.hybrid_search_top_k
+
+    def embed_uncached(query: str):
+        get_embedding_function()._query_cache.pop(query, None)
+        embed_query(query)
+
+    stages = {
+        "embed_query": embed_uncached,
+        "query_collection": lambda q: query_collection(persona_id, q, top_k=top_k),
+        "bm25_search": lambda q: bm25_search(persona_id, q, top_k=top_k),
+        "hybrid_search": lambda q: hybrid_search(persona_id, q, top_k=top_k),
+    }
+    result["stages"] = {}
+    result["skipped"] = {}
+    for name, fn in stages.items():
+        result["stages"][name] = time_stage(fn, queries, warmup)
+        if name == "bm25_search":
+            result["stages"]["bm25_search_many"] = time_batched_stage(
+                lambda batch: bm25_search_many(persona_id, batch, top_k=top_k),
+                queries, warmup, options["batch_size"],
+            )
+
+    model, reason = (None, "disabled with --no-rerank") if options["no_rerank"] else _load_reranker()
+    if model is None:
+        result["skipped"]["rerank"] = reason
+    else:
+        candidates = {q: hybrid_search(persona_id, q, top_k=top_k) for q in warmup + queries}
+        result["stages"]["rerank"] = asyncio.run(
+            _time_rerank(rerank, candidates, queries, warmup, settings.rag_top_k)
+        )
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    """Regressions of `results` against `baseline`, as printable lines."""
+    regressions = []
+    for label, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(label)
+        if previous is None:
+            continue
+        for stage, metrics in current["stages"].items():
+            old = previous.get("stages", {}).get(stage)
+            if old is None:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                if metric not in old or not old[metric]:
+                    continue
+                new_value, old_value = metrics[metric], old[metric]
+                change = (old_value - new_value if higher_is_better else new_value - old_value) / old_value
+                if metric.endswith("_ms") and new_value - old_value < min_delta_ms:
+                    continue
+                if change > tolerance:
+                    regressions.append(
+                        f"{label:>5s} {stage:17s} {metric:12s} {old_value:>10g} -> {new_value:<10g} "
+                        f"({change:+.0%} worse)"
+                    )
+    return regressions
+
+
+def print_results(results: dict, baseline: dict | None):
+    for label, result in results["sizes"].items():
+        ingest = result["ingest"]
+        print(f"\n{label} chunks: ingest {ingest['seconds']:.1f}s ({ingest['chunks_per_second']:.0f} chunks/s), "
+              f"BM25 build {ingest['bm25_build_seconds']:.1f}s, load {result['bm25_load_ms']:.0f}ms, "
+              f"RSS {result['rss_mb']:.0f} MB")
+        print(f"  {'stage':17s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'qps':>9s} {'peak RSS':>10s}  vs baseline p95")
+        previous = (baseline or {}).get("sizes", {}).get(label, {}).get("stages", {})
+        for stage, m in result["stages"].items():
+            old = previous.get(stage)
+            delta = f"{m['p95_ms'] / old['p95_ms'] - 1:+.0%}" if old and old.get("p95_ms") else ""
+            print(f"  {stage:17s} {m['p50_ms']:7.2f}ms {m['p95_ms']:7.2f}ms {m['p99_ms']:7.2f}ms "
+                  f"{m['qps']:9.1f} {m['peak_rss_mb']:8.0f}MB  {delta}")
+        for stage, reason in result["skipped"].items():
+            print(f"  {stage:17s} skipped: {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval stages on synthetic corpora")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[1_000, 10_000, 100_000],
+                        help="Corpus sizes in chunks, e.g. 1k 10k 100k 1m")
+    parser.add_argument("--queries", type=int, default=300, help="Timed queries per stage")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed queries before each stage")
+    parser.add_argument("--embedding", choices=["hash", "model"], default="hash",
+                        help="hash: deterministic offline embedding; model: the configured embedding model")
+    parser.add_argument("--batch-size", type=int, default=32, help="Queries per bm25_search_many call")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the hash embedding")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-rerank", action="store_true", help="Skip the cross-encoder stage")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative slowdown (or RSS growth) reported as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1,
+                        help="Ignore latency differences smaller than this")
+    args = parser.parse_args()
+
+    import chromadb
+
+    options = {
+        "embedding": args.embedding,
+        "dim": args.dim,
+        "seed": args.seed,
+        "queries": args.queries,
+        "warmup": args.warmup,
+        "batch_size": args.batch_size,
+        "no_rerank": args.no_rerank,
+    }
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "chromadb": chromadb.__version__,
+            **{key: value for key, value in options.items() if key != "no_rerank"},
+        },
+        "sizes": {},
+    }
+
+    context = multiprocessing.get_context("spawn")
+    for size in sorted(set(args.sizes)):
+        label = size_label(size)
+        print(f"Benchmarking {label} chunks...", flush=True)
+        with tempfile.TemporaryDirectory(prefix="retrieval-bench-") as workdir:
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                results["sizes"][label] = pool.submit(run_size, size, workdir, options).result()
+
+    baseline = None
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatched = [key for key in ("embedding", "dim", "seed", "queries") if baseline["meta"].get(key) != options[key]]
+        if mismatched:
+            print(f"\nWarning: baseline was run with different {', '.join(mismatched)}")
+        machine = [key for key in ("cpu_count", "python", "chromadb") if baseline["meta"].get(key) != results["meta"][key]]
+        if machine:
+            print(f"\nWarning: baseline was recorded with a different {', '.join(machine)}; "
+                  f"absolute timings may not be comparable")
+        missing = [label for label in results["sizes"] if label not in baseline.get("sizes", {})]
+        if missing:
+            print(f"\nNo baseline for {', '.join(missing)} chunks")
+    print_results(results, baseline)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if baseline is None:
+        regressions = []
+        if not args.save_baseline:
+            print(f"No baseline at {args.baseline} — run with --save-baseline to store one")
+    else:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+        else:
+            print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+    if args.save_baseline:
+        # Accepts these results (regressions included) as the new reference
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
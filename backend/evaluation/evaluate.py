@@ -8,19 +8,30 @@ Evaluates three dimensions:
 This is a lightweight alternative to RAGAS that uses the same LLM
 (via OpenRouter) as the judge, requiring no additional dependencies.
 
+Each question is retrieved once and the answer is generated from those same
+documents. The context-relevance judge runs while the answer streams, and the
+other two judges run in parallel once it is done. `--concurrency N`
+evaluates up to N questions at a time. Every result records per-stage
+wall-clock latency (retrieval, time to first token, generation, judging) and
+token usage.
+
 Usage:
     python -m evaluation.evaluate
     python -m evaluation.evaluate --persona charlie-munger
     python -m evaluation.evaluate --verbose
+    python -m evaluation.evaluate --concurrency 8
+    python -m evaluation.evaluate --llm-cache   # reuse cached rewrite/rerank/judge completions
 """
 
 import asyncio
 import json
 import argparse
+import time
 from pathlib import Path
 
-from app.services.rag import retrieve_context, load_persona, build_context_block
-from app.services.llm import chat_completion, stream_chat_completion
+from app.config import get_settings
+from app.services.rag import retrieve_context, load_persona, build_context_block, stream_answer
+from app.services.llm import TokenUsage, chat_completion, track_usage
 
 # Test questions per persona — designed to test different retrieval scenarios
 TEST_QUESTIONS: dict[str, list[str]] = {
@@ -87,7 +98,9 @@ async def score_context_relevance(query: str, contexts: list[str]) -> float:
             "content": f"Query: {query}\n\nRetrieved Documents:\n{context_text}\n\nRelevance Score:",
         },
     ]
-    response = await chat_completion(messages, temperature=0.0, max_tokens=10)
+    response = await chat_completion(
+        messages, temperature=0.0, max_tokens=10, cache_namespace="judge"
+    )
     try:
         return min(10.0, max(0.0, float(response.strip())))
     except ValueError:
@@ -116,7 +129,9 @@ async def score_faithfulness(answer: str, contexts: list[str]) -> float:
             ),
         },
     ]
-    response = await chat_completion(messages, temperature=0.0, max_tokens=10)
+    response = await chat_completion(
+        messages, temperature=0.0, max_tokens=10, cache_namespace="judge"
+    )
     try:
         return min(10.0, max(0.0, float(response.strip())))
     except ValueError:
@@ -140,23 +155,35 @@ async def score_answer_relevancy(query: str, answer: str) -> float:
             "content": f"Question: {query}\n\nAnswer:\n{answer}\n\nRelevancy Score:",
         },
     ]
-    response = await chat_completion(messages, temperature=0.0, max_tokens=10)
+    response = await chat_completion(
+        messages, temperature=0.0, max_tokens=10, cache_namespace="judge"
+    )
     try:
         return min(10.0, max(0.0, float(response.strip())))
     except ValueError:
         return 5.0
 
 
-async def generate_answer(persona_id: str, query: str) -> str:
-    """Generate a full answer for evaluation (non-streaming)."""
-    from app.services.rag import generate_response
-    from app.models.schemas import ChatMessage
+async def generate_answer(persona_id: str, query: str, documents: list[dict]) -> tuple[str, float | None]:
+    """Generate a full answer from already-retrieved documents (non-streaming).
+
+    Returns (answer, seconds to the first token).
+    """
+    persona = load_persona(persona_id)
+    context_block, _ = build_context_block(documents)
 
+    started = time.perf_counter()
+    first_token = None
     tokens = []
-    async for item in generate_response(persona_id, query, []):
-        if isinstance(item, str):
-            tokens.append(item)
-    return "".join(tokens)
+    async for token in stream_answer(persona, query, [], context_block):
+        if first_token is None:
+            first_token = time.perf_counter() - started
+        tokens.append(token)
+    return "".join(tokens), first_token
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
 
 
 async def evaluate_single(
@@ -166,20 +193,34 @@ async def evaluate_single(
 ) -> dict:
     """Evaluate a single query through the full RAG pipeline."""
     persona = load_persona(persona_id)
+    started = time.perf_counter()
 
-    # Retrieve context
-    documents, rewritten_query = await retrieve_context(
-        persona_id, persona["name"], query
-    )
+    # Retrieve context (once: generation uses the same documents)
+    with track_usage() as retrieval_usage:
+        documents, rewritten_query = await retrieve_context(
+            persona_id, persona["name"], query
+        )
+    retrieval_s = time.perf_counter() - started
     contexts = [doc["content"] for doc in documents]
 
-    # Generate answer
-    answer = await generate_answer(persona_id, query)
-
-    # Score all three dimensions
-    ctx_score = await score_context_relevance(query, contexts)
-    faith_score = await score_faithfulness(answer, contexts)
-    relevancy_score = await score_answer_relevancy(query, answer)
+    with track_usage() as judge_usage:
+        # Context relevance doesn't need the answer: judge it during generation
+        ctx_task = asyncio.create_task(score_context_relevance(query, contexts))
+
+        # Generate answer
+        generation_started = time.perf_counter()
+        with track_usage() as generation_usage:
+            answer, first_token_s = await generate_answer(persona_id, query, documents)
+        generation_s = time.perf_counter() - generation_started
+
+        # Score the answer-dependent dimensions in parallel
+        judging_started = time.perf_counter()
+        ctx_score, faith_score, relevancy_score = await asyncio.gather(
+            ctx_task,
+            score_faithfulness(answer, contexts),
+            score_answer_relevancy(query, answer),
+        )
+        judging_s = time.perf_counter() - judging_started
 
     result = {
         "query": query,
@@ -190,6 +231,19 @@ async def evaluate_single(
         "faithfulness": faith_score,
         "answer_relevancy": relevancy_score,
         "avg_score": round((ctx_score + faith_score + relevancy_score) / 3, 2),
+        # Judging is the wait after generation; the context judge overlaps it
+        "latency_ms": {
+            "retrieval": _ms(retrieval_s),
+            "first_token": _ms(first_token_s),
+            "generation": _ms(generation_s),
+            "judging": _ms(judging_s),
+            "total": _ms(time.perf_counter() - started),
+        },
+        "tokens": {
+            "retrieval": retrieval_usage.as_dict(),
+            "generation": generation_usage.as_dict(),
+            "judging": judge_usage.as_dict(),
+        },
     }
 
     if verbose:
@@ -199,27 +253,63 @@ async def evaluate_single(
     return result
 
 
-async def evaluate_persona(persona_id: str, verbose: bool = False) -> dict:
-    """Evaluate all test questions for a single persona."""
+def _print_scores(result: dict):
+    latency = result["latency_ms"]
+    print(
+        f"    Context: {result['context_relevance']:.1f} | "
+        f"Faithful: {result['faithfulness']:.1f} | "
+        f"Relevant: {result['answer_relevancy']:.1f} | "
+        f"Avg: {result['avg_score']:.1f} | "
+        f"{latency['total'] / 1000:.1f}s (retrieval {latency['retrieval'] / 1000:.1f}s, "
+        f"generation {latency['generation'] / 1000:.1f}s, judging {latency['judging'] / 1000:.1f}s)"
+    )
+
+
+def _total_tokens(results: list[dict]) -> dict:
+    totals = TokenUsage()
+    for r in results:
+        for stage in r["tokens"].values():
+            totals.calls += stage["calls"]
+            totals.cached_calls += stage["cached_calls"]
+            totals.prompt_tokens += stage["prompt_tokens"]
+            totals.completion_tokens += stage["completion_tokens"]
+    return totals.as_dict()
+
+
+async def evaluate_persona(
+    persona_id: str,
+    verbose: bool = False,
+    semaphore: asyncio.Semaphore | None = None,
+) -> dict:
+    """Evaluate all test questions for a single persona.
+
+    With a `semaphore`, questions run concurrently (bounded by it) and their
+    scores are printed as they finish; results keep the question order.
+    """
     questions = TEST_QUESTIONS.get(persona_id, [])
     if not questions:
         return {"persona_id": persona_id, "error": "No test questions defined"}
 
-    print(f"\n{'='*60}")
-    print(f"Evaluating: {persona_id}")
-    print(f"{'='*60}")
+    if semaphore is None:
+        print(f"\n{'='*60}")
+        print(f"Evaluating: {persona_id}")
+        print(f"{'='*60}")
 
-    results = []
-    for i, query in enumerate(questions, 1):
-        print(f"  [{i}/{len(questions)}] {query[:60]}...")
-        result = await evaluate_single(persona_id, query, verbose)
-        results.append(result)
-        print(
-            f"    Context: {result['context_relevance']:.1f} | "
-            f"Faithful: {result['faithfulness']:.1f} | "
-            f"Relevant: {result['answer_relevancy']:.1f} | "
-            f"Avg: {result['avg_score']:.1f}"
-        )
+        results = []
+        for i, query in enumerate(questions, 1):
+            print(f"  [{i}/{len(questions)}] {query[:60]}...")
+            result = await evaluate_single(persona_id, query, verbose)
+            results.append(result)
+            _print_scores(result)
+    else:
+        async def bounded(query: str) -> dict:
+            async with semaphore:
+                result = await evaluate_single(persona_id, query, verbose)
+            print(f"  [{persona_id}] {query[:60]}")
+            _print_scores(result)
+            return result
+
+        results = await asyncio.gather(*(bounded(query) for query in questions))
 
     # Aggregate scores
     avg_ctx = sum(r["context_relevance"] for r in results) / len(results)
@@ -233,30 +323,55 @@ async def evaluate_persona(persona_id: str, verbose: bool = False) -> dict:
         "avg_faithfulness": round(avg_faith, 2),
         "avg_answer_relevancy": round(avg_rel, 2),
         "overall_score": round((avg_ctx + avg_faith + avg_rel) / 3, 2),
+        "avg_latency_ms": {
+            stage: round(sum(r["latency_ms"][stage] or 0 for r in results) / len(results), 1)
+            for stage in results[0]["latency_ms"]
+        },
+        "tokens": _total_tokens(results),
         "details": results,
     }
 
-    print(f"\n  Summary for {persona_id}:")
-    print(f"    Context Relevance:  {avg_ctx:.2f}/10")
-    print(f"    Faithfulness:       {avg_faith:.2f}/10")
-    print(f"    Answer Relevancy:   {avg_rel:.2f}/10")
-    print(f"    Overall:            {summary['overall_score']:.2f}/10")
-
+    if semaphore is None:
+        _print_summary(summary)
     return summary
 
 
+def _print_summary(summary: dict):
+    print(f"\n  Summary for {summary['persona_id']}:")
+    print(f"    Context Relevance:  {summary['avg_context_relevance']:.2f}/10")
+    print(f"    Faithfulness:       {summary['avg_faithfulness']:.2f}/10")
+    print(f"    Answer Relevancy:   {summary['avg_answer_relevancy']:.2f}/10")
+    print(f"    Overall:            {summary['overall_score']:.2f}/10")
+    print(f"    Avg latency:        {summary['avg_latency_ms']['total'] / 1000:.2f}s per question")
+
+
 async def run_full_evaluation(
     persona_ids: list[str] | None = None,
     verbose: bool = False,
+    concurrency: int = 1,
 ):
-    """Run evaluation across all (or specified) personas."""
+    """Run evaluation across all (or specified) personas.
+
+    `concurrency` > 1 evaluates that many questions at a time, across personas.
+    """
     if persona_ids is None:
         persona_ids = list(TEST_QUESTIONS.keys())
 
-    all_results = []
-    for pid in persona_ids:
-        result = await evaluate_persona(pid, verbose)
-        all_results.append(result)
+    started = time.perf_counter()
+    if concurrency > 1:
+        semaphore = asyncio.Semaphore(concurrency)
+        all_results = await asyncio.gather(*(
+            evaluate_persona(pid, verbose, semaphore) for pid in persona_ids
+        ))
+        for result in all_results:
+            if "error" not in result:
+                _print_summary(result)
+    else:
+        all_results = []
+        for pid in persona_ids:
+            result = await evaluate_persona(pid, verbose)
+            all_results.append(result)
+    elapsed = time.perf_counter() - started
 
     # Overall summary
     valid = [r for r in all_results if "error" not in r]
@@ -269,6 +384,14 @@ async def run_full_evaluation(
             print(f"  {r['persona_id']:25s} → {r['overall_score']:.2f}/10")
         print(f"\n  {'Overall Average':25s} → {overall:.2f}/10")
 
+        tokens = _total_tokens([d for r in valid for d in r["details"]])
+        questions = sum(r["num_questions"] for r in valid)
+        print(
+            f"\n  {questions} questions in {elapsed:.1f}s (concurrency {concurrency}), "
+            f"{tokens['calls']} LLM calls ({tokens['cached_calls']} cached), "
+            f"{tokens['prompt_tokens']} prompt + {tokens['completion_tokens']} completion tokens"
+        )
+
     # Save results
     output_path = Path("evaluation/results.json")
     output_path.parent.mkdir(exist_ok=True)
@@ -289,10 +412,21 @@ def main():
         "--verbose", action="store_true",
         help="Include answer and context previews in output",
     )
+    parser.add_argument(
+        "--llm-cache", action="store_true",
+        help="Serve repeated rewrite/rerank/judge completions from the local LLM cache",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=1,
+        help="Questions evaluated at a time (default: 1, sequential)",
+    )
     args = parser.parse_args()
 
+    if args.llm_cache:
+        get_settings().enable_llm_cache = True
+
     persona_ids = [args.persona] if args.persona else None
-    asyncio.run(run_full_evaluation(persona_ids, args.verbose))
+    asyncio.run(run_full_evaluation(persona_ids, args.verbose, args.concurrency))
 
 
 if __name__ == "__main__":
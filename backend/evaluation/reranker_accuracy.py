@@ -0,0 +1,80 @@
+"""Compare int8 cross-encoder scores against fp32 on real retrieval candidates.
+
+For every evaluation question, hybrid search retrieves the same candidate
+set the chat pipeline would rerank (one batched BM25 pass per persona); both backends score it, and the report
+shows how far the quantized scores drift (max absolute difference), whether
+the ordering survives (Spearman correlation) and how many of the final
+top-k documents stay the same, along with per-backend scoring time.
+
+Requires sentence-transformers (and torch) plus an ingested ChromaDB.
+
+Usage:
+    python -m evaluation.reranker_accuracy
+    python -m evaluation.reranker_accuracy --persona warren-buffett --top-k 5
+"""
+
+import argparse
+import time
+
+from app.config import get_settings
+from app.services.hybrid_retriever import hybrid_search_many
+from app.services.reranker_backends import compare_scores, load_cross_encoder
+from evaluation.evaluate import TEST_QUESTIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check int8 reranker accuracy against fp32")
+    parser.add_argument(
+        "--persona", type=str, default=None,
+        help="Check a specific persona (e.g., charlie-munger)",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=None,
+        help="Documents kept after reranking (default: RAG_TOP_K)",
+    )
+    args = parser.parse_args()
+
+    settings = get_settings()
+    top_k = args.top_k or settings.rag_top_k
+    persona_ids = [args.persona] if args.persona else list(TEST_QUESTIONS.keys())
+
+    models = {backend: load_cross_encoder(backend) for backend in ("fp32", "int8")}
+    timings = {backend: 0.0 for backend in models}
+    results = []
+
+    for pid in persona_ids:
+        questions = TEST_QUESTIONS[pid]
+        retrieved = hybrid_search_many(pid, questions, top_k=settings.hybrid_search_top_k)
+        for question, candidates in zip(questions, retrieved):
+            if not candidates:
+                continue
+            pairs = [(question, doc["content"]) for doc in candidates]
+            scores = {}
+            for backend, model in models.items():
+                start = time.perf_counter()
+                scores[backend] = model.predict(pairs, show_progress_bar=False)
+                timings[backend] += time.perf_counter() - start
+            comparison = compare_scores(scores["fp32"], scores["int8"], top_k)
+            results.append(comparison)
+            print(
+                f"  {pid:20s} spearman={comparison['spearman']:.3f} "
+                f"top{top_k}={comparison['top_k_overlap']:.2f} "
+                f"max_diff={comparison['max_abs_diff']:.3f}  {question[:50]}"
+            )
+
+    if not results:
+        print("No candidates retrieved — run ingestion first.")
+        return
+
+    n = len(results)
+    print(f"\n{'='*60}")
+    print(f"  Queries:               {n}")
+    print(f"  Mean Spearman:         {sum(r['spearman'] for r in results) / n:.4f}")
+    print(f"  Mean top-{top_k} overlap:   {sum(r['top_k_overlap'] for r in results) / n:.4f}")
+    print(f"  Worst max |diff|:      {max(r['max_abs_diff'] for r in results):.4f}")
+    for backend, seconds in timings.items():
+        print(f"  {backend} scoring time:     {seconds * 1000 / n:.1f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
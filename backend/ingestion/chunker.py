@@ -8,9 +8,22 @@ Strategies:
 
 This is a significant improvement over naive fixed-size chunking because
 it preserves semantic coherence within each chunk.
+
+`chunk_spans` applies the same strategies without building intermediate
+strings: it returns (start, end) character offsets into the text, sizes
+chunks with a pluggable token counter instead of characters, and leaves it
+to the caller to slice out the final chunk text.
 """
 
 import re
+from collections.abc import Callable
+from functools import lru_cache
+from itertools import accumulate
+
+# Same boundaries as `_split_sentences`; matching the punctuation instead of
+# looking behind for it lets the regex engine skip ahead to candidates
+_SENTENCE_BOUNDARY = re.compile(r"[.!?](\s+)")
+_PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n")
 
 
 def _split_sentences(text: str) -> list[str]:
@@ -122,3 +135,165 @@ def chunk_document(
         merged_chunks.append(buffer)
 
     return merged_chunks
+
+
+def approx_token_count(text: str) -> int:
+    """~4 characters per token, the usual rule of thumb for English BPE vocabularies."""
+    return (len(text) + 3) // 4
+
+
+@lru_cache
+def get_token_counter(name: str) -> Callable[[str], int]:
+    """Token counter by name: "approx" (len / 4), "chars", "words" or "tiktoken" (cl100k_base)."""
+    if name == "approx":
+        return approx_token_count
+    if name == "chars":
+        return len
+    if name == "words":
+        return lambda text: len(text.split())
+    if name == "tiktoken":
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode_ordinary(text))
+    raise ValueError(f"Unknown token counter: {name}")
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _paragraph_spans(text: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Non-empty, whitespace-trimmed paragraph spans of text[start:end]."""
+    spans = []
+    pos = start
+    for match in _PARAGRAPH_BOUNDARY.finditer(text, start, end):
+        span = _strip_span(text, pos, match.start())
+        if span[0] < span[1]:
+            spans.append(span)
+        pos = match.end()
+    span = _strip_span(text, pos, end)
+    if span[0] < span[1]:
+        spans.append(span)
+    return spans
+
+
+def _sentence_spans(text: str, start: int, end: int, out: list[tuple[int, int]]):
+    """Append the sentence spans of a trimmed paragraph. Boundaries consume all
+    whitespace between sentences, so the spans need no further trimming."""
+    pos = start
+    for match in _SENTENCE_BOUNDARY.finditer(text, start, end):
+        out.append((pos, match.start(1)))
+        pos = match.end()
+    out.append((pos, end))
+
+
+# Counters that only depend on a span's length are computed without slicing
+_LENGTH_COUNTERS: dict[Callable[[str], int], Callable[[int], int]] = {
+    len: lambda n: n,
+    approx_token_count: lambda n: (n + 3) // 4,
+}
+
+
+def chunk_spans(
+    text: str,
+    doc_type: str,
+    max_tokens: int = 128,
+    overlap_sentences: int = 1,
+    min_tokens: int = 12,
+    count_tokens: Callable[[str], int] = approx_token_count,
+) -> list[tuple[int, int]]:
+    """Split text into semantically coherent chunks, returned as (start, end) offsets.
+
+    Same strategy as `chunk_document`, but sized in tokens. Every sentence is
+    counted once; a chunk's size is the sum of its sentences' counts, taken
+    from prefix sums, and chunks are sentence-index ranges until the end, so
+    overlapping and merged chunks never copy text. On cleaned (single-spaced)
+    text, `text[start:end]` equals the sentences joined with spaces.
+
+    Args:
+        text: Document text (offsets refer to this exact string)
+        doc_type: Document type ("quote", "paragraph", "article", etc.)
+        max_tokens: Maximum tokens per chunk
+        overlap_sentences: Number of sentences to overlap between chunks
+        min_tokens: Minimum tokens; smaller chunks get merged
+        count_tokens: Token counter applied to each sentence
+
+    Returns:
+        List of (start, end) character offsets into `text`
+    """
+    start, end = _strip_span(text, 0, len(text))
+    if start == end:
+        return []
+
+    # Quotes stay intact
+    if doc_type == "quote":
+        return [(start, end)]
+
+    # Short texts stay intact
+    length_count = _LENGTH_COUNTERS.get(count_tokens)
+    if length_count is not None:
+        if length_count(end - start) <= max_tokens:
+            return [(start, end)]
+    elif count_tokens(text[start:end]) <= max_tokens:
+        return [(start, end)]
+
+    # Stage 1: paragraphs → sentences (global sentence index ranges per paragraph)
+    sentences: list[tuple[int, int]] = []
+    paragraphs: list[tuple[int, int]] = []
+    for para_start, para_end in _paragraph_spans(text, start, end):
+        first = len(sentences)
+        _sentence_spans(text, para_start, para_end, sentences)
+        paragraphs.append((first, len(sentences)))
+
+    if length_count is not None:
+        counts = (length_count(b - a) for a, b in sentences)
+    else:
+        counts = (count_tokens(text[a:b]) for a, b in sentences)
+    prefix = [0, *accumulate(counts)]
+
+    def tokens(lo: int, hi: int) -> int:
+        return prefix[hi] - prefix[lo]
+
+    # Stage 2: long paragraphs become sliding sentence windows
+    raw: list[tuple[int, int]] = []
+    for lo, hi in paragraphs:
+        if prefix[hi] - prefix[lo] <= max_tokens:
+            raw.append((lo, hi))
+            continue
+        first = lo
+        for i in range(lo + 1, hi):
+            if prefix[i + 1] - prefix[first] > max_tokens:
+                raw.append((first, i))
+                # Keep overlap_sentences for context, unless they alone leave no room
+                first = max(i - overlap_sentences, first + 1)
+                while first < i and prefix[i + 1] - prefix[first] > max_tokens:
+                    first += 1
+        raw.append((first, hi))
+
+    # Stage 3: merge small adjacent chunks (a union of ranges, so overlap isn't duplicated)
+    merged: list[tuple[int, int]] = []
+    buffer = None
+    for lo, hi in raw:
+        if buffer and tokens(buffer[0], hi) <= max_tokens:
+            buffer = (buffer[0], hi)
+        else:
+            if buffer and tokens(*buffer) >= min_tokens:
+                merged.append(buffer)
+            elif buffer:
+                # Too small on its own, prepend to next
+                lo = buffer[0]
+            buffer = (lo, hi)
+
+    if buffer and tokens(*buffer) >= min_tokens:
+        merged.append(buffer)
+    elif buffer and merged:
+        # Append tiny remainder to last chunk
+        merged[-1] = (merged[-1][0], buffer[1])
+    elif buffer:
+        merged.append(buffer)
+
+    return [(sentences[lo][0], sentences[hi - 1][1]) for lo, hi in merged]
@@ -1,15 +1,90 @@
-"""Main ingestion pipeline: read raw JSON → clean → chunk → upsert to ChromaDB."""
+"""Main ingestion pipeline: read raw JSONL/JSON → clean → chunk → embed → upsert to ChromaDB.
 
-import json
+Raw files are streamed: JSONL (optionally gzipped) is read a line at a time
+and cleaned/chunked in batches of at most `--batch-size` chunks, so memory
+stays bounded regardless of file size. Legacy JSON array files are still read.
+With `--workers N`, whole files are cleaned and chunked on N processes
+(a bounded window of files in flight); the main process still diffs and
+upserts them one at a time in file order, so the result is identical to the
+serial run.
+
+Ingestion is incremental. A manifest per persona (`data/manifests/<persona>.json`)
+records each raw file's hash and the content hash of every chunk it produced.
+On the next run, unchanged files are skipped without being parsed, only new
+or changed chunks are embedded and upserted, and chunks that no longer come
+out of any file are deleted from the collection. The BM25 artifact is patched
+with the same diff instead of being rebuilt. `--full` ignores the manifests
+and re-embeds everything (still deleting chunks that have disappeared).
+
+Embeddings are computed here rather than inside `collection.upsert`, in large
+batches on a pool of worker processes (each running the same embedding
+function the server uses). While the pool embeds one file, the main process
+upserts the previous file and cleans/chunks the next one.
+
+Finally the BM25 index artifact of every persona whose chunks changed is
+written so the server can load it at startup.
+
+Usage:
+    python -m ingestion.ingest
+    python -m ingestion.ingest --embed-workers 4 --embed-batch-size 512
+    python -m ingestion.ingest --embed-workers 0   # embed in this process
+    python -m ingestion.ingest --full              # ignore manifests, re-embed every chunk
+    python -m ingestion.ingest --batch-size 5000   # chunks held in memory per batch
+    python -m ingestion.ingest --workers 4         # clean/chunk files on 4 processes
+    python -m ingestion.ingest --chunker spans     # token-sized chunks with char offsets
+"""
+
+import argparse
+import gzip
 import hashlib
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
+import numpy as np
+
 from ingestion.cleaner import clean_text, is_useful
-from ingestion.chunker import chunk_document
-from app.services.vectorstore import get_collection
+from ingestion.chunker import chunk_document, chunk_spans, get_token_counter
+from app.config import get_settings
+from app.services.embeddings import PersonaEmbeddingFunction, get_embedding_function
+from app.services.vectorstore import (
+    corpus_fingerprint,
+    get_collection,
+    get_document_ids,
+    get_documents_by_ids,
+)
+from app.services.bm25_index import build_index_from_collection, load_index, save_index
 
 
 RAW_DATA_DIR = Path("data/raw")
+RAW_FILE_PATTERNS = ("*.jsonl", "*.jsonl.gz", "*.json")
+MANIFEST_DIR = Path("data/manifests")
+MANIFEST_VERSION = 1
+UPSERT_BATCH_SIZE = 500
+
+
+@dataclass
+class PreparedBatch:
+    """Cleaned, chunked and deduplicated chunks from (part of) one raw file."""
+    name: str
+    persona_id: str
+    ids: list[str] = field(default_factory=list)
+    texts: list[str] = field(default_factory=list)
+    metadatas: list[dict] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class ChunkingOptions:
+    """How documents are chunked: "sentences" (character-sized `chunk_document`) or
+    "spans" (token-sized `chunk_spans`, recording char_start/char_end in metadata)."""
+    chunker: str = "sentences"
+    token_counter: str = "approx"
 
 
 def generate_id(text: str, source: str) -> str:
@@ -17,74 +92,460 @@ def generate_id(text: str, source: str) -> str:
     return hashlib.md5(f"{source}:{text}".encode()).hexdigest()
 
 
-def ingest_file(filepath: Path):
-    """Process one raw JSON file and upsert to ChromaDB."""
-    print(f"\nProcessing {filepath.name}...")
+def file_hash(filepath: Path) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    with open(filepath) as f:
-        documents = json.load(f)
 
-    if not documents:
-        print(f"  No documents in {filepath.name}")
+def chunk_hash(text: str, metadata: dict) -> str:
+    """Hash of everything stored for a chunk, so metadata-only edits are re-upserted too."""
+    payload = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def load_manifests() -> dict[str, dict]:
+    """Per-persona manifests: {"files": {filename: {"hash": ..., "chunks": {chunk_id: chunk_hash}}}}."""
+    manifests = {}
+    for path in MANIFEST_DIR.glob("*.json"):
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            manifests[path.stem] = manifest
+    return manifests
+
+
+def save_manifest(persona_id: str, manifest: dict):
+    MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+    path = MANIFEST_DIR / f"{persona_id}.json"
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": manifest["files"]}, f, ensure_ascii=False)
+    tmp.replace(path)
+
+
+def list_raw_files() -> list[Path]:
+    return sorted(path for pattern in RAW_FILE_PATTERNS for path in RAW_DATA_DIR.glob(pattern))
+
+
+def read_raw_documents(filepath: Path) -> Iterator[dict]:
+    """Yield raw document records from a JSONL, gzipped JSONL or legacy JSON array file."""
+    if filepath.suffix == ".json":
+        with open(filepath) as f:
+            yield from json.load(f)
         return
+    opener = gzip.open if filepath.suffix == ".gz" else open
+    with opener(filepath, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
 
-    persona_id = documents[0]["persona_id"]
-    collection = get_collection(persona_id)
+def chunk_with_offsets(text: str, doc_type: str, options: ChunkingOptions) -> list[tuple[str, dict]]:
+    """Chunk texts, plus extra metadata per chunk (character offsets for the span chunker)."""
+    if options.chunker == "spans":
+        spans = chunk_spans(text, doc_type, count_tokens=get_token_counter(options.token_counter))
+        return [(text[start:end], {"char_start": start, "char_end": end}) for start, end in spans]
+    return [(chunk, {}) for chunk in chunk_document(text, doc_type)]
 
-    ids = []
-    texts = []
-    metadatas = []
+
+def prepare_batches(
+    filepath: Path,
+    batch_size: int,
+    options: ChunkingOptions = ChunkingOptions(),
+) -> Iterator[PreparedBatch]:
+    """Clean and chunk one raw file, yielding at most `batch_size` chunks at a time."""
+    print(f"\nProcessing {filepath.name}...")
+
+    batch = None
+    persona_id = None
     seen_ids = set()
 
-    for doc in documents:
+    for doc in read_raw_documents(filepath):
+        if persona_id is None:
+            persona_id = doc["persona_id"]
+            batch = PreparedBatch(name=filepath.name, persona_id=persona_id)
+
         cleaned = clean_text(doc["content"])
         if not is_useful(cleaned):
             continue
 
-        chunks = chunk_document(cleaned, doc["doc_type"])
-
-        for chunk in chunks:
+        for chunk, offsets in chunk_with_offsets(cleaned, doc["doc_type"], options):
             doc_id = generate_id(chunk, doc["source"])
             if doc_id in seen_ids:
                 continue
             seen_ids.add(doc_id)
-            ids.append(doc_id)
-            texts.append(chunk)
-            metadatas.append({
+            batch.ids.append(doc_id)
+            batch.texts.append(chunk)
+            batch.metadatas.append({
                 "source": doc["source"],
                 "doc_type": doc["doc_type"],
                 "persona_id": doc["persona_id"],
+                **offsets,
             })
 
-    if not ids:
+        if len(batch.ids) >= batch_size:
+            yield batch
+            batch = PreparedBatch(name=filepath.name, persona_id=persona_id)
+
+    if persona_id is None:
+        print(f"  No documents in {filepath.name}")
+    elif not seen_ids:
         print(f"  No valid chunks from {filepath.name}")
+    elif batch.ids:
+        yield batch
+
+
+def _prepare_file_in_worker(
+    filepath: Path,
+    batch_size: int,
+    options: ChunkingOptions,
+) -> tuple[list[PreparedBatch], float]:
+    start = time.perf_counter()
+    batches = list(prepare_batches(filepath, batch_size, options))
+    return batches, time.perf_counter() - start
+
+
+def iter_prepared(
+    files: list[tuple[Path, str]],
+    workers: int,
+    batch_size: int,
+    options: ChunkingOptions,
+    stats: Counter,
+) -> Iterator[tuple[str, PreparedBatch]]:
+    """Yield (file hash, batch) in file order, cleaning/chunking on `workers` processes when > 1."""
+    if workers <= 1:
+        for filepath, digest in files:
+            batches = prepare_batches(filepath, batch_size, options)
+            while True:
+                start = time.perf_counter()
+                batch = next(batches, None)
+                stats["prepare_seconds"] += time.perf_counter() - start
+                if batch is None:
+                    break
+                stats["prepare_chunks"] += len(batch.ids)
+                yield digest, batch
         return
 
-    # Upsert in batches of 500
-    batch_size = 500
-    for i in range(0, len(ids), batch_size):
-        batch_ids = ids[i:i + batch_size]
-        batch_texts = texts[i:i + batch_size]
-        batch_meta = metadatas[i:i + batch_size]
-        collection.upsert(ids=batch_ids, documents=batch_texts, metadatas=batch_meta)
+    pending_files = iter(files)
+    in_flight: deque[tuple[str, Future]] = deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+
+        def submit_next():
+            item = next(pending_files, None)
+            if item is not None:
+                filepath, digest = item
+                in_flight.append((digest, pool.submit(_prepare_file_in_worker, filepath, batch_size, options)))
 
-    print(f"  Upserted {len(ids)} chunks to collection '{persona_id}'")
+        # Two files per worker keeps them busy without holding the whole corpus in memory
+        for _ in range(workers * 2):
+            submit_next()
+        while in_flight:
+            digest, future = in_flight.popleft()
+            batches, seconds = future.result()
+            submit_next()
+            stats["prepare_seconds"] += seconds
+            for batch in batches:
+                stats["prepare_chunks"] += len(batch.ids)
+                yield digest, batch
+
+
+# --- Embedding workers ---------------------------------------------------------
+
+_worker_embedding_function: PersonaEmbeddingFunction | None = None
+
+
+def _init_embedding_worker(num_threads: int):
+    global _worker_embedding_function
+    settings = get_settings()
+    _worker_embedding_function = PersonaEmbeddingFunction(
+        model_name=settings.embedding_model,
+        batch_size=settings.embedding_batch_size,
+        num_threads=num_threads,
+        query_cache_size=0,
+    )
+    _worker_embedding_function.load()
+
+
+def _embed_in_worker(texts: list[str]) -> np.ndarray:
+    return _worker_embedding_function.embed(texts)
+
+
+class Embedder:
+    """Embeds chunk batches on a process pool, or in-process when workers == 0."""
+
+    def __init__(self, workers: int, batch_size: int):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.pool = None
+        self.inline_seconds = 0.0
+
+    def submit(self, texts: list[str]) -> list[Future]:
+        """Start embedding `texts` in batches; returns one future per batch."""
+        if self.workers > 0 and self.pool is None:
+            # Started on first use, so runs with nothing to embed don't pay for it.
+            # Split the cores between workers instead of letting each one claim all of them.
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_embedding_worker,
+                initargs=(threads,),
+            )
+        futures = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            if self.pool is not None:
+                futures.append(self.pool.submit(_embed_in_worker, batch))
+            else:
+                start = time.perf_counter()
+                future = Future()
+                future.set_result(get_embedding_function().embed(batch))
+                futures.append(future)
+                self.inline_seconds += time.perf_counter() - start
+        return futures
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def upsert_prepared(prepared: PreparedBatch, embeddings: np.ndarray):
+    collection = get_collection(prepared.persona_id)
+    for i in range(0, len(prepared.ids), UPSERT_BATCH_SIZE):
+        collection.upsert(
+            ids=prepared.ids[i:i + UPSERT_BATCH_SIZE],
+            documents=prepared.texts[i:i + UPSERT_BATCH_SIZE],
+            metadatas=prepared.metadatas[i:i + UPSERT_BATCH_SIZE],
+            embeddings=embeddings[i:i + UPSERT_BATCH_SIZE],
+        )
+    print(f"  Upserted {len(prepared.ids)} chunks from {prepared.name} to collection '{prepared.persona_id}'")
+
+
+def update_bm25_index(
+    persona_id: str,
+    fingerprint_before: str,
+    upserted: list[str],
+    deleted: list[str],
+) -> str:
+    """Patch the persona's BM25 artifact with this run's diff, or rebuild it if that's not possible."""
+    fingerprint_after = corpus_fingerprint(get_document_ids(persona_id))
+    index = load_index(persona_id, expected_fingerprint=fingerprint_before)
+    action = "updated"
+    if index is not None:
+        index.remove_documents(deleted)
+        for i in range(0, len(upserted), UPSERT_BATCH_SIZE):
+            docs = get_documents_by_ids(persona_id, upserted[i:i + UPSERT_BATCH_SIZE])
+            index.add_documents(
+                [doc["id"] for doc in docs],
+                [doc["content"] for doc in docs],
+                [doc["metadata"] for doc in docs],
+            )
+    if index is None or index.fingerprint != fingerprint_after:
+        index = build_index_from_collection(persona_id)
+        action = "rebuilt"
+    path = save_index(persona_id, index)
+    print(f"  BM25 index for '{persona_id}' {action}: {index.num_docs} docs, "
+          f"{index.num_terms} terms → {path}")
+    return action
+
+
+def _rate(count: float, seconds: float) -> str:
+    return f"{count / seconds:,.0f}/s" if seconds > 0 else "-"
+
+
+def print_throughput(stats: Counter, files: int, workers: int, elapsed: float):
+    chunks = stats["prepare_chunks"]
+    upserted = stats["upserted_chunks"]
+    prepare_label = "worker time" if workers > 1 else "wall time"
+    print("\nStage throughput:")
+    print(f"  clean+chunk  {files} files → {chunks} chunks in {stats['prepare_seconds']:.1f}s "
+          f"{prepare_label} ({_rate(chunks, stats['prepare_seconds'])})")
+    print(f"  embed        {upserted} chunks, {stats['embed_wait_seconds']:.1f}s embedding in-process or waiting on workers")
+    print(f"  upsert       {upserted} chunks in {stats['upsert_seconds']:.1f}s "
+          f"({_rate(upserted, stats['upsert_seconds'])})")
+    print(f"  delete       {stats['delete_seconds']:.1f}s")
+    print(f"  bm25         {stats['bm25_seconds']:.1f}s")
+    print(f"  total        {chunks} chunks in {elapsed:.1f}s ({_rate(chunks, elapsed)})")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Ingest raw scraped data into ChromaDB")
+    parser.add_argument(
+        "--embed-workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+        help="Processes computing embeddings (0 = embed in the main process)",
+    )
+    parser.add_argument(
+        "--embed-batch-size", type=int, default=256,
+        help="Chunks per embedding task sent to a worker",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=2000,
+        help="Chunks cleaned, embedded and upserted together (bounds memory use)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Processes cleaning and chunking raw files (1 = in the main process)",
+    )
+    parser.add_argument(
+        "--chunker", choices=["sentences", "spans"], default="sentences",
+        help="sentences: character-sized chunks; spans: token-sized chunks with char offsets",
+    )
+    parser.add_argument(
+        "--token-counter", choices=["approx", "chars", "words", "tiktoken"], default="approx",
+        help="Token counter for --chunker spans (tiktoken must be installed)",
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Ignore manifests and re-embed every chunk",
+    )
+    args = parser.parse_args()
+    options = ChunkingOptions(chunker=args.chunker, token_counter=args.token_counter)
+
     if not RAW_DATA_DIR.exists():
         print(f"No raw data directory found at {RAW_DATA_DIR}")
         print("Run scrapers first: python -m scrapers.run_all")
         return
 
-    json_files = list(RAW_DATA_DIR.glob("*.json"))
-    if not json_files:
-        print(f"No JSON files found in {RAW_DATA_DIR}")
+    raw_files = list_raw_files()
+    if not raw_files:
+        print(f"No JSONL/JSON files found in {RAW_DATA_DIR}")
         return
 
-    print(f"Found {len(json_files)} data files to ingest")
-    for filepath in json_files:
-        ingest_file(filepath)
+    print(f"Found {len(raw_files)} data files to ingest")
+    start = time.perf_counter()
+    embedder = Embedder(args.embed_workers, args.embed_batch_size)
+
+    old_manifests = {} if args.full else load_manifests()
+    known_files = {
+        name: (persona_id, entry["hash"])
+        for persona_id, manifest in old_manifests.items()
+        for name, entry in manifest["files"].items()
+    }
+    new_manifests: dict[str, dict] = {persona_id: {"files": {}} for persona_id in old_manifests}
+    old_chunks: dict[str, dict[str, str | None]] = {}
+    fingerprints_before: dict[str, str] = {}
+    upserted: dict[str, list[str]] = {}
+    upserted_ids: dict[str, set[str]] = {}
+    diffs: dict[str, Counter] = {}
+    stats: Counter = Counter()
+
+    def previous_chunks(persona_id: str) -> dict[str, str | None]:
+        """Chunk id → hash as of the last run; falls back to the collection's ids (hash unknown)."""
+        if persona_id not in old_chunks:
+            if persona_id in old_manifests:
+                old_chunks[persona_id] = {
+                    chunk_id: digest
+                    for entry in old_manifests[persona_id]["files"].values()
+                    for chunk_id, digest in entry["chunks"].items()
+                }
+            else:
+                old_chunks[persona_id] = dict.fromkeys(get_document_ids(persona_id))
+            fingerprints_before[persona_id] = corpus_fingerprint(list(old_chunks[persona_id]))
+        return old_chunks[persona_id]
+
+    def diff_changes(batch: PreparedBatch, digest: str) -> PreparedBatch | None:
+        """Record a batch in the new manifest and keep only chunks not already stored as-is."""
+        persona_id = batch.persona_id
+        previous = previous_chunks(persona_id)
+        already = upserted_ids.setdefault(persona_id, set())
+        diff = diffs.setdefault(persona_id, Counter())
+        entry = new_manifests.setdefault(persona_id, {"files": {}})["files"].setdefault(
+            batch.name, {"hash": digest, "chunks": {}},
+        )
+
+        changes = PreparedBatch(name=batch.name, persona_id=persona_id)
+        for chunk_id, text, meta in zip(batch.ids, batch.texts, batch.metadatas):
+            h = chunk_hash(text, meta)
+            entry["chunks"][chunk_id] = h
+            if chunk_id in already or previous.get(chunk_id, "") == h:
+                diff["unchanged"] += 1
+                continue
+            diff["changed" if chunk_id in previous else "added"] += 1
+            changes.ids.append(chunk_id)
+            changes.texts.append(text)
+            changes.metadatas.append(meta)
+            already.add(chunk_id)
+            upserted.setdefault(persona_id, []).append(chunk_id)
+        return changes if changes.ids else None
+
+    def finish(prepared: PreparedBatch, futures: list[Future]):
+        wait_start = time.perf_counter()
+        embeddings = np.concatenate([future.result() for future in futures])
+        upsert_start = time.perf_counter()
+        upsert_prepared(prepared, embeddings)
+        stats["embed_wait_seconds"] += upsert_start - wait_start
+        stats["upsert_seconds"] += time.perf_counter() - upsert_start
+        stats["upserted_chunks"] += len(prepared.ids)
+
+    to_process = []
+    for filepath in raw_files:
+        digest = file_hash(filepath)
+        known = known_files.get(filepath.name)
+        if known is not None and known[1] == digest:
+            persona_id = known[0]
+            new_manifests[persona_id]["files"][filepath.name] = old_manifests[persona_id]["files"][filepath.name]
+            diffs.setdefault(persona_id, Counter())["files_skipped"] += 1
+        else:
+            to_process.append((filepath, digest))
+
+    # Pipeline: the pool embeds batch N while batch N-1 is upserted and N+1 is chunked
+    pending = None
+    try:
+        for digest, batch in iter_prepared(to_process, args.workers, args.batch_size, options, stats):
+            changes = diff_changes(batch, digest)
+            submitted = (changes, embedder.submit(changes.texts)) if changes else None
+            if pending:
+                finish(*pending)
+            pending = submitted
+        if pending:
+            finish(*pending)
+    finally:
+        embedder.shutdown()
+    stats["embed_wait_seconds"] += embedder.inline_seconds
+
+    # Chunks no file produces any more (edited, removed, or whose raw file is gone)
+    delete_start = time.perf_counter()
+    deleted: dict[str, list[str]] = {}
+    for persona_id, manifest in new_manifests.items():
+        current = {chunk_id for entry in manifest["files"].values() for chunk_id in entry["chunks"]}
+        stale = [chunk_id for chunk_id in previous_chunks(persona_id) if chunk_id not in current]
+        if stale:
+            collection = get_collection(persona_id)
+            for i in range(0, len(stale), UPSERT_BATCH_SIZE):
+                collection.delete(ids=stale[i:i + UPSERT_BATCH_SIZE])
+            deleted[persona_id] = stale
+            diffs.setdefault(persona_id, Counter())["deleted"] += len(stale)
+    stats["delete_seconds"] = time.perf_counter() - delete_start
+
+    print("\nChanges:")
+    for persona_id in sorted(diffs):
+        diff = diffs[persona_id]
+        print(f"  {persona_id:25s} +{diff['added']} added, ~{diff['changed']} changed, "
+              f"-{diff['deleted']} deleted, {diff['unchanged']} unchanged, "
+              f"{diff['files_skipped']} files skipped")
+
+    modified = sorted(set(upserted) | set(deleted))
+    bm25_start = time.perf_counter()
+    if modified:
+        print("\nUpdating BM25 indexes...")
+        for persona_id in modified:
+            update_bm25_index(
+                persona_id,
+                fingerprints_before[persona_id],
+                upserted.get(persona_id, []),
+                deleted.get(persona_id, []),
+            )
+    stats["bm25_seconds"] = time.perf_counter() - bm25_start
+
+    if to_process:
+        print_throughput(stats, len(to_process), args.workers, time.perf_counter() - start)
+
+    # Written last, so an interrupted run is simply redone next time
+    for persona_id, manifest in new_manifests.items():
+        save_manifest(persona_id, manifest)
 
     print("\nIngestion complete!")
 
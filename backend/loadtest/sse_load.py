@@ -0,0 +1,208 @@
+"""SSE load generator for `/api/chat`.
+
+Runs closed-loop load at each concurrency level: N workers each open a chat
+stream, read it to the end, and start the next one, `--rounds` times. For
+every stream it records:
+
+- TTFB: time until the response status and headers arrive;
+- TTFT: time until the first `{"token": ...}` event;
+- inter-token latency: the gaps between consecutive token events;
+- tokens/s: tokens over the time from first to last token;
+- failures: non-200 responses, `{"error": ...}` events, streams that end
+  without `[DONE]`, timeouts and connection errors.
+
+Each level prints p50/p95/p99 of these and the aggregate token throughput.
+To avoid paying for OpenRouter, run the backend against `loadtest.stub_llm`:
+
+    python -m loadtest.stub_llm --port 9000
+    OPENROUTER_BASE_URL=http://127.0.0.1:9000/v1 OPENROUTER_API_KEY=stub make backend
+    python -m loadtest.sse_load --concurrency 1 8 32 64
+
+Usage:
+    python -m loadtest.sse_load
+    python -m loadtest.sse_load --url http://localhost:8000 --persona charlie-munger --rounds 5
+    python -m loadtest.sse_load --concurrency 16 --output loadtest_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+
+import httpx
+import numpy as np
+
+MESSAGES = [
+    "What is the most important lesson you have learned?",
+    "How should I think about making difficult decisions?",
+    "What habits would you recommend to a young person?",
+    "How do you deal with failure?",
+    "What role does patience play in a good life?",
+    "How should I choose what to read?",
+    "What mistakes do intelligent people make most often?",
+    "How do you think about money and happiness?",
+]
+
+
+@dataclass
+class StreamResult:
+    status: int | None = None
+    ttfb: float | None = None
+    ttft: float | None = None
+    total: float | None = None
+    token_times: list[float] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if len(self.token_times) < 2:
+            return None
+        return (len(self.token_times) - 1) / (self.token_times[-1] - self.token_times[0])
+
+
+async def run_stream(client: httpx.AsyncClient, url: str, payload: dict, timeout: float) -> StreamResult:
+    result = StreamResult()
+    start = time.perf_counter()
+    done = False
+    try:
+        async with asyncio.timeout(timeout):
+            async with client.stream("POST", url, json=payload) as resp:
+                result.status = resp.status_code
+                result.ttfb = time.perf_counter() - start
+                if resp.status_code != 200:
+                    await resp.aread()
+                    result.error = f"HTTP {resp.status_code}"
+                    return result
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        done = True
+                        break
+                    event = json.loads(data)
+                    if "token" in event:
+                        now = time.perf_counter() - start
+                        if result.ttft is None:
+                            result.ttft = now
+                        result.token_times.append(now)
+                    elif "error" in event:
+                        result.error = f"error event: {event['error'][:80]}"
+        if result.error is None and not done:
+            result.error = "stream ended without [DONE]"
+    except TimeoutError:
+        result.error = "timeout"
+    except httpx.HTTPError as e:
+        result.error = e.__class__.__name__
+    finally:
+        result.total = time.perf_counter() - start
+    return result
+
+
+def percentiles(values: list[float], scale: float = 1000.0) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    array = np.array(values) * scale
+    return {name: round(float(np.percentile(array, q)), 1) for name, q in (("p50", 50), ("p95", 95), ("p99", 99))}
+
+
+def summarize(results: list[StreamResult], wall_seconds: float, concurrency: int) -> dict:
+    ok = [r for r in results if r.ok]
+    gaps = [b - a for r in ok for a, b in zip(r.token_times, r.token_times[1:])]
+    rates = [rate for r in ok if (rate := r.tokens_per_second) is not None]
+    errors: dict[str, int] = {}
+    for r in results:
+        if not r.ok:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    tokens = sum(len(r.token_times) for r in ok)
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "failures": len(results) - len(ok),
+        "failure_rate": round((len(results) - len(ok)) / len(results), 4) if results else 0.0,
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 2),
+        "requests_per_second": round(len(results) / wall_seconds, 2),
+        "ttfb_ms": percentiles([r.ttfb for r in ok]),
+        "ttft_ms": percentiles([r.ttft for r in ok if r.ttft is not None]),
+        "inter_token_ms": percentiles(gaps),
+        "total_ms": percentiles([r.total for r in ok]),
+        "stream_tokens_per_second": percentiles(rates, scale=1.0),
+        "aggregate_tokens_per_second": round(tokens / wall_seconds, 1),
+    }
+
+
+async def run_level(url: str, persona_id: str, concurrency: int, rounds: int, timeout: float) -> dict:
+    results: list[StreamResult] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(timeout)) as client:
+        async def worker(worker_id: int):
+            for i in range(rounds):
+                message = MESSAGES[(worker_id + i) % len(MESSAGES)]
+                payload = {"persona_id": persona_id, "message": message, "conversation_history": []}
+                results.append(await run_stream(client, url, payload, timeout))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        wall_seconds = time.perf_counter() - start
+    return summarize(results, wall_seconds, concurrency)
+
+
+def print_level(summary: dict):
+    def fmt(metric: dict) -> str:
+        return "/".join("-" if metric[q] is None else f"{metric[q]:.0f}" for q in ("p50", "p95", "p99"))
+
+    print(f"{summary['concurrency']:>5d} {summary['requests']:>6d} {summary['failures']:>6d} "
+          f"{summary['requests_per_second']:>7.2f} {fmt(summary['ttfb_ms']):>17s} {fmt(summary['ttft_ms']):>17s} "
+          f"{fmt(summary['inter_token_ms']):>14s} {fmt(summary['stream_tokens_per_second']):>14s} "
+          f"{summary['aggregate_tokens_per_second']:>8.0f}")
+    for error, count in summary["errors"].items():
+        print(f"{'':6s}{count} x {error}")
+
+
+async def run(args) -> tuple[str, list[dict]]:
+    base_url = args.url.rstrip("/")
+    persona_id = args.persona
+    if persona_id is None:
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(f"{base_url}/api/personas")
+            resp.raise_for_status()
+            persona_id = resp.json()["personas"][0]["id"]
+
+    print(f"Load testing {base_url}/api/chat as {persona_id}, {args.rounds} stream(s) per worker")
+    print(f"{'conc':>5s} {'reqs':>6s} {'fails':>6s} {'req/s':>7s} {'TTFB ms p50/95/99':>17s} "
+          f"{'TTFT ms p50/95/99':>17s} {'ITL ms 50/95/99':>14s} {'tok/s 50/95/99':>14s} {'agg tok/s':>8s}")
+    summaries = []
+    for concurrency in args.concurrency:
+        summary = await run_level(f"{base_url}/api/chat", persona_id, concurrency, args.rounds, args.timeout)
+        print_level(summary)
+        summaries.append(summary)
+    return persona_id, summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/chat with concurrent SSE streams")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--persona", default=None, help="Persona id (default: the first listed)")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 32],
+                        help="Concurrent streams per level")
+    parser.add_argument("--rounds", type=int, default=3, help="Streams each worker runs per level")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds before a stream counts as failed")
+    parser.add_argument("--output", default=None, help="Write the per-level summaries as JSON")
+    args = parser.parse_args()
+
+    persona_id, summaries = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"url": args.url, "persona_id": persona_id, "levels": summaries}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
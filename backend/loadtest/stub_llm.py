@@ -0,0 +1,221 @@
+"""OpenAI-compatible stub LLM server for load tests.
+
+Serves `POST /v1/chat/completions` (streaming and non-streaming) with
+synthetic text, so `/api/chat` can be load-tested without calling
+OpenRouter. Point the backend at it with:
+
+    OPENROUTER_BASE_URL=http://127.0.0.1:9000/v1 OPENROUTER_API_KEY=stub
+
+Every completion waits `--ttft-ms` (± `--jitter`) before the first token,
+then emits tokens at `--tokens-per-second`; a non-streaming completion
+returns once its last token would have been sent. `--error-rate` of the
+requests fail: with `--error-mode http` they get an OpenAI-style error
+response before any token (the OpenAI client retries these, see
+`max_retries`), with `--error-mode stream` the stream is cut off halfway.
+
+`GET /stats` reports requests served, errors injected and streams in flight.
+
+Usage:
+    python -m loadtest.stub_llm
+    python -m loadtest.stub_llm --port 9000 --ttft-ms 400 --tokens-per-second 40 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "the of and to in a is that for it as with was on be by this are or his have from at which "
+    "but not an they you one all we can their has been if more when will would who so no "
+    "wisdom virtue patience reason habit money mind character discipline time learning"
+).split()
+
+
+@dataclass
+class StubConfig:
+    ttft_ms: float = 300.0
+    tokens_per_second: float = 50.0
+    completion_tokens: int = 200  # capped by the request's max_tokens
+    jitter: float = 0.2  # ± fraction applied to the TTFT and token gaps
+    error_rate: float = 0.0
+    error_mode: str = "http"  # "http" (status before streaming) or "stream" (cut off mid-stream)
+    error_status: int = 500
+    seed: int | None = None
+
+
+def _completion_text(count: int, rng: random.Random) -> list[str]:
+    """`count` tokens: words with leading spaces, in sentences."""
+    tokens = []
+    for i in range(count):
+        word = rng.choice(WORDS)
+        if i == 0 or tokens[-1].endswith("."):
+            word = word.capitalize()
+        if rng.random() < 0.08 or i == count - 1:
+            word += "."
+        tokens.append(word if i == 0 else " " + word)
+    return tokens
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Stub LLM")
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "streams": 0, "in_flight": 0, "max_in_flight": 0, "errors": 0, "tokens": 0}
+
+    def jittered(seconds: float) -> float:
+        return max(0.0, seconds * (1 + rng.uniform(-config.jitter, config.jitter)))
+
+    async def emit(tokens: list[str]):
+        """Yield tokens on the configured schedule, measured from the first one."""
+        await asyncio.sleep(jittered(config.ttft_ms / 1000))
+        start = time.monotonic()
+        gap = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        due = 0.0
+        for i, token in enumerate(tokens):
+            if i:
+                due += jittered(gap)
+                delay = start + due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            stats["tokens"] += 1
+            yield token
+
+    def error_response() -> JSONResponse:
+        return JSONResponse(
+            status_code=config.error_status,
+            content={"error": {"message": "Injected stub error", "type": "server_error", "code": config.error_status}},
+        )
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        fail = rng.random() < config.error_rate
+        if fail and config.error_mode == "http":
+            stats["errors"] += 1
+            return error_response()
+
+        count = max(1, min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens))
+        tokens = _completion_text(count, rng)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get("model", "stub")
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": count, "total_tokens": prompt_tokens + count}
+
+        if not body.get("stream"):
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            try:
+                text = "".join([token async for token in emit(tokens)])
+            finally:
+                stats["in_flight"] -= 1
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+        cut_at = len(tokens) // 2 if fail else None
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def event_stream():
+            stats["streams"] += 1
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            try:
+                yield chunk({"role": "assistant", "content": ""})
+                sent = 0
+                async for token in emit(tokens):
+                    if sent == cut_at:
+                        stats["errors"] += 1
+                        error = {"error": {"message": "Injected stub error", "type": "server_error"}}
+                        yield f"data: {json.dumps(error)}\n\n"
+                        return
+                    yield chunk({"content": token})
+                    sent += 1
+                yield chunk({}, "stop")
+                if include_usage:
+                    payload = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [],
+                        "usage": usage,
+                    }
+                    yield f"data: {json.dumps(payload)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Token rate after the first (0 = no delay)")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Tokens per completion (capped by max_tokens)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="± fraction of random variation in delays")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-mode", choices=["http", "stream"], default="http",
+                        help="http: error status before streaming; stream: cut the stream off halfway")
+    parser.add_argument("--error-status", type=int, default=500, help="Status code for http errors")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = StubConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_mode=args.error_mode,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    print(f"Stub LLM on http://{args.host}:{args.port}/v1 "
+          f"(TTFT {config.ttft_ms:g}ms, {config.tokens_per_second:g} tok/s, error rate {config.error_rate:g})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import asdict, dataclass, field
+import gzip
 import json
+import os
 from pathlib import Path
 
+from scrapers.fetcher import Fetcher
+
 
 @dataclass
 class ScrapedDocument:
@@ -13,6 +19,49 @@ class ScrapedDocument:
     metadata: dict = field(default_factory=dict)
 
 
+class DocumentWriter:
+    """Writes documents one JSON object per line (JSONL) as they arrive.
+
+    The file is gzip-compressed when its name ends in ".gz". Documents go to a
+    temporary file next to `path` (line-buffered for plain files, so progress
+    can be followed there), which replaces `path` only when the block exits
+    cleanly with at least one document. A failed or empty scrape leaves the
+    previous file untouched.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        self.tmp_path = path.with_name(f".{path.name}.tmp")
+        if path.suffix == ".gz":
+            self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+        else:
+            self._file = open(self.tmp_path, "w", encoding="utf-8", buffering=1)
+
+    def write(self, doc: ScrapedDocument):
+        self._file.write(json.dumps(asdict(doc), ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self, commit: bool = True):
+        """Close the file and move it onto `path`, or discard it if `commit`
+        is false or nothing was written."""
+        try:
+            self._file.close()
+        except BaseException:
+            self.tmp_path.unlink(missing_ok=True)
+            raise
+        if commit and self.count:
+            os.replace(self.tmp_path, self.path)
+        else:
+            self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "DocumentWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+
 class BaseScraper(ABC):
     def __init__(self, persona_id: str, output_dir: str = "data/raw"):
         self.persona_id = persona_id
@@ -20,22 +69,56 @@ class BaseScraper(ABC):
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
     @abstractmethod
+    def ascrape(self, fetcher: Fetcher) -> AsyncIterator[ScrapedDocument]:
+        """Yield documents as they are scraped, fetching through the shared `fetcher`."""
+
     def scrape(self) -> list[ScrapedDocument]:
-        pass
+        """Scrape synchronously with a private fetcher."""
+        async def collect():
+            async with Fetcher() as fetcher:
+                return [doc async for doc in self.ascrape(fetcher)]
+
+        return asyncio.run(collect())
+
+    async def asave_stream(self, documents: AsyncIterable[ScrapedDocument], filename: str) -> Path | None:
+        """`save_stream` for an async document stream."""
+        path = self.output_dir / filename
+        with DocumentWriter(path) as writer:
+            async for doc in documents:
+                writer.write(doc)
+        if writer.count == 0:
+            print(f"No documents to save to {path}")
+            return None
+        print(f"Saved {writer.count} documents to {path}")
+        return path
 
-    def save(self, documents: list[ScrapedDocument], filename: str):
+    def save_stream(self, documents: Iterable[ScrapedDocument], filename: str) -> Path | None:
+        """Write documents to a JSONL file (gzipped for ".gz" names) while they are produced."""
         path = self.output_dir / filename
-        data = [
-            {
-                "content": doc.content,
-                "source": doc.source,
-                "persona_id": doc.persona_id,
-                "doc_type": doc.doc_type,
-                "metadata": doc.metadata,
-            }
-            for doc in documents
-        ]
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"Saved {len(documents)} documents to {path}")
+        with DocumentWriter(path) as writer:
+            for doc in documents:
+                writer.write(doc)
+        if writer.count == 0:
+            print(f"No documents to save to {path}")
+            return None
+        print(f"Saved {writer.count} documents to {path}")
         return path
+
+
+async def map_in_order(fn: Callable[..., Awaitable], items: Iterable) -> AsyncIterator[tuple]:
+    """Run `fn(item)` for all items concurrently; yield (item, result) in item order.
+
+    A failed item yields its exception as the result, so one bad page doesn't
+    abort the rest. Pending calls are cancelled if the consumer stops early.
+    """
+    items = list(items)
+    tasks = [asyncio.ensure_future(fn(item)) for item in items]
+    try:
+        for item, task in zip(items, tasks):
+            try:
+                yield item, await task
+            except Exception as e:
+                yield item, e
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,10 +1,10 @@
 """Scrape Warren Buffett content from buffettfaq.com and other sources."""
 
-import httpx
+from collections.abc import AsyncIterator
+
 from bs4 import BeautifulSoup
 from scrapers.base import BaseScraper, ScrapedDocument
-
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+from scrapers.fetcher import Fetcher
 
 
 class BuffettFAQScraper(BaseScraper):
@@ -16,18 +16,22 @@ class BuffettFAQScraper(BaseScraper):
     def __init__(self):
         super().__init__(persona_id="warren-buffett")
 
-    def scrape(self) -> list[ScrapedDocument]:
+    async def ascrape(self, fetcher: Fetcher) -> AsyncIterator[ScrapedDocument]:
         print(f"Scraping BuffettFAQ: {self.URL}")
-        documents = []
 
         try:
-            resp = httpx.get(self.URL, timeout=60, follow_redirects=True, headers=HEADERS)
-            resp.raise_for_status()
+            documents = await fetcher.get_parsed(self.URL, self._parse, timeout=60)
         except Exception as e:
             print(f"Error fetching BuffettFAQ: {e}")
-            return documents
+            return
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        print(f"Found {len(documents)} passages from BuffettFAQ")
+        for doc in documents:
+            yield doc
+
+    def _parse(self, html: str) -> list[ScrapedDocument]:
+        documents = []
+        soup = BeautifulSoup(html, "html.parser")
 
         for p in soup.find_all(["p", "blockquote"]):
             text = p.get_text(strip=True)
@@ -50,7 +54,6 @@ class BuffettFAQScraper(BaseScraper):
                 metadata={"url": self.URL},
             ))
 
-        print(f"Found {len(documents)} passages from BuffettFAQ")
         return documents
 
 
@@ -62,18 +65,22 @@ class OldSchoolValueBuffettScraper(BaseScraper):
     def __init__(self):
         super().__init__(persona_id="warren-buffett")
 
-    def scrape(self) -> list[ScrapedDocument]:
+    async def ascrape(self, fetcher: Fetcher) -> AsyncIterator[ScrapedDocument]:
         print(f"Scraping Old School Value Buffett quotes: {self.URL}")
-        documents = []
 
         try:
-            resp = httpx.get(self.URL, timeout=30, follow_redirects=True, headers=HEADERS)
-            resp.raise_for_status()
+            documents = await fetcher.get_parsed(self.URL, self._parse, timeout=30)
         except Exception as e:
             print(f"Error: {e}")
-            return documents
+            return
+
+        print(f"Found {len(documents)} passages from Old School Value")
+        for doc in documents:
+            yield doc
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+    def _parse(self, html: str) -> list[ScrapedDocument]:
+        documents = []
+        soup = BeautifulSoup(html, "html.parser")
         content = soup.find("article") or soup.find("div", class_="entry-content") or soup
 
         for tag in content(["script", "style", "nav", "footer"]):
@@ -98,16 +105,13 @@ class OldSchoolValueBuffettScraper(BaseScraper):
                 metadata={"url": self.URL},
             ))
 
-        print(f"Found {len(documents)} passages from Old School Value")
         return documents
 
 
 if __name__ == "__main__":
     for Cls, fname in [
-        (BuffettFAQScraper, "buffettfaq.json"),
-        (OldSchoolValueBuffettScraper, "osv_buffett.json"),
+        (BuffettFAQScraper, "buffettfaq_buffett.jsonl"),
+        (OldSchoolValueBuffettScraper, "osv_buffett.jsonl"),
     ]:
         s = Cls()
-        docs = s.scrape()
-        if docs:
-            s.save(docs, fname)
+        s.save_stream(s.scrape(), fname)
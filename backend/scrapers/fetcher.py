@@ -0,0 +1,323 @@
+"""Shared async HTTP client for the scrapers.
+
+One `Fetcher` serves every scraper in a run:
+
+- a single `httpx.AsyncClient`, so connections are kept alive and reused
+  across pages of the same site;
+- a global concurrency limit plus a per-host limit, so running all scrapers
+  at once stays polite to each site;
+- retries with exponential backoff (and jitter) on connection errors,
+  timeouts, 429 and 5xx responses, honoring `Retry-After`;
+- an optional process pool for HTML parsing, which is CPU-bound and would
+  otherwise stall the event loop (Gutenberg books are several MB each);
+- an optional `HTTPCache`: conditional GETs, parse results reused for
+  unchanged pages, and an offline mode (see `scrapers.http_cache`).
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+
+from scrapers.http_cache import HTTPCache, OfflineCacheMiss, parse_key
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class Page:
+    url: str
+    text: str
+    sha256: str | None  # None without a cache
+    unchanged: bool  # same body as the cached copy (304, equal hash or offline)
+
+
+@dataclass
+class Download:
+    url: str
+    path: Path  # gzipped when served from the cache
+    encoding: str
+    sha256: str
+    unchanged: bool
+    temporary: bool  # delete once parsed
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Fetcher:
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        per_host: int = 4,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+        parse_workers: int = 0,
+        cache: HTTPCache | None = None,
+        offline: bool = False,
+    ):
+        """
+        max_concurrency: requests in flight across all hosts
+        per_host: requests in flight per host
+        retries: extra attempts after a retryable failure
+        backoff: base delay in seconds, doubled on every retry
+        parse_workers: processes for `parse()`; 0 parses on a thread
+        cache: page cache for conditional requests and parse reuse
+        offline: serve every page from `cache`, never touching the network
+        """
+        if offline and cache is None:
+            raise ValueError("offline mode needs a cache")
+        self.cache = cache
+        self.offline = offline
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            headers=HEADERS,
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self._executor = (
+            ProcessPoolExecutor(parse_workers, mp_context=multiprocessing.get_context("spawn"))
+            if parse_workers > 0 else None
+        )
+
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+        self.bytes = 0
+        self.fetch_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.cache_hits = 0
+        self.parses_skipped = 0
+
+    async def get_text(self, url: str, timeout: float | None = None) -> str:
+        """GET a page and return its decoded body. Raises after the last retry."""
+        return (await self.fetch(url, timeout)).text
+
+    async def fetch(self, url: str, timeout: float | None = None) -> Page:
+        """GET a page, revalidating the cached copy if there is one."""
+        entry = self.cache.get(url) if self.cache else None
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"not in the HTTP cache: {url}")
+            self.cache_hits += 1
+            return Page(url, self.cache.read_text(entry), entry.sha256, unchanged=True)
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        resp = await self._get(url, timeout, headers)
+
+        if resp.status_code == 304 and entry is not None:
+            self.not_modified += 1
+            self.cache.touch(entry)
+            return Page(url, self.cache.read_text(entry), entry.sha256, unchanged=True)
+        resp.raise_for_status()
+        self.bytes += len(resp.content)
+        if self.cache is None:
+            return Page(url, resp.text, None, unchanged=False)
+
+        stored = self.cache.put(
+            url, resp.content, resp.encoding or "utf-8",
+            resp.headers.get("ETag"), resp.headers.get("Last-Modified"), previous=entry,
+        )
+        unchanged = entry is not None and entry.sha256 == stored.sha256
+        self.unchanged += unchanged
+        return Page(url, resp.text, stored.sha256, unchanged)
+
+    async def download(self, url: str, timeout: float | None = None) -> Download:
+        """GET a page into a file in chunks, so the body is never held in memory.
+
+        Like `fetch()`, revalidates (or, offline, reuses) the cached copy; an
+        unchanged page is served from the cached gzipped body.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"not in the HTTP cache: {url}")
+            self.cache_hits += 1
+            return Download(url, self.cache.body_path(entry), entry.encoding, entry.sha256, True, False)
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        fd, name = tempfile.mkstemp(prefix="scrape-", suffix=".html")
+        os.close(fd)
+        path = Path(name)
+        try:
+            resp = await self._get(url, timeout, headers, into=path)
+            if resp.status_code == 304 and entry is not None:
+                path.unlink()
+                self.not_modified += 1
+                self.cache.touch(entry)
+                return Download(url, self.cache.body_path(entry), entry.encoding, entry.sha256, True, False)
+            resp.raise_for_status()
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+        self.bytes += path.stat().st_size
+        sha256 = _file_sha256(path)
+        encoding = resp.charset_encoding or "utf-8"
+        if self.cache is not None:
+            self.cache.put_file(
+                url, path, sha256, encoding,
+                resp.headers.get("ETag"), resp.headers.get("Last-Modified"), previous=entry,
+            )
+        unchanged = entry is not None and entry.sha256 == sha256
+        self.unchanged += unchanged
+        return Download(url, path, encoding, sha256, unchanged, temporary=True)
+
+    async def _get(self, url: str, timeout: float | None, headers: dict, into: Path | None = None) -> httpx.Response:
+        """GET with retries. With `into`, a successful body is streamed to that file."""
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            try:
+                # Per-host slot first, so requests queued behind a busy host
+                # don't hold global slots that other hosts could use
+                async with self._hosts[host], self._global:
+                    start = time.perf_counter()
+                    kwargs = {"timeout": timeout} if timeout is not None else {}
+                    if into is None:
+                        resp = await self._client.get(url, headers=headers, **kwargs)
+                    else:
+                        resp = await self._stream(url, headers, kwargs, into)
+                    self.fetch_seconds += time.perf_counter() - start
+                    self.requests += 1
+                if resp.status_code in RETRY_STATUSES and attempt < self.retries:
+                    delay = self._retry_after(resp) or self._delay(attempt)
+                else:
+                    if resp.is_error:
+                        self.failed += 1
+                    return resp
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    self.failed += 1
+                    raise
+                delay = self._delay(attempt)
+            attempt += 1
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    async def _stream(self, url: str, headers: dict, kwargs: dict, path: Path) -> httpx.Response:
+        async with self._client.stream("GET", url, headers=headers, **kwargs) as resp:
+            if resp.is_success:
+                with open(path, "wb") as f:
+                    async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            else:
+                await resp.aread()
+        return resp
+
+    def _delay(self, attempt: int) -> float:
+        return self.backoff * 2 ** attempt + random.uniform(0, self.backoff)
+
+    @staticmethod
+    def _retry_after(resp: httpx.Response) -> float | None:
+        value = resp.headers.get("Retry-After", "")
+        return min(float(value), 60.0) if value.isdigit() else None
+
+    async def parse(self, fn: Callable, *args):
+        """Run a (picklable) parse function off the event loop."""
+        start = time.perf_counter()
+        try:
+            if self._executor is not None:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            return await asyncio.to_thread(fn, *args)
+        finally:
+            self.parse_seconds += time.perf_counter() - start
+
+    async def get_parsed(self, url: str, fn: Callable, *args, timeout: float | None = None):
+        """Fetch a page and return `fn(text, *args)`, run through `parse()`.
+
+        With a cache, an unchanged page whose last parse used the same parser
+        returns that result without parsing again.
+        """
+        page = await self.fetch(url, timeout)
+        return await self._parse_cached(url, page.sha256, page.unchanged, fn, args, page.text)
+
+    async def get_parsed_file(self, url: str, fn: Callable, *args, timeout: float | None = None):
+        """`get_parsed` for large pages: the page is downloaded to a file and
+        `fn(path, encoding, *args)` reads it from there (gzipped if the path ends in .gz)."""
+        download = await self.download(url, timeout)
+        try:
+            sha256 = download.sha256 if self.cache is not None else None
+            return await self._parse_cached(
+                url, sha256, download.unchanged, fn, args, download.path, download.encoding,
+            )
+        finally:
+            if download.temporary:
+                download.path.unlink(missing_ok=True)
+
+    async def _parse_cached(self, url: str, sha256: str | None, unchanged: bool, fn: Callable, args: tuple, *body):
+        if sha256 is None:
+            return await self.parse(fn, *body, *args)
+
+        key = parse_key(fn, args)
+        if unchanged:
+            cached = self.cache.get_parsed(url, sha256, key)
+            if cached is not None:
+                self.parses_skipped += 1
+                return cached
+        result = await self.parse(fn, *body, *args)
+        self.cache.put_parsed(url, sha256, key, result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "failed": self.failed,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "offline_hits": self.cache_hits,
+            "parses_skipped": self.parses_skipped,
+            "megabytes": round(self.bytes / 1e6, 2),
+            "fetch_seconds": round(self.fetch_seconds, 2),
+            "parse_seconds": round(self.parse_seconds, 2),
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def __aenter__(self) -> "Fetcher":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
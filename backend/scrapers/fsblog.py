@@ -1,10 +1,10 @@
 """Scrape Farnam Street blog articles for multiple personas."""
 
-import httpx
-from bs4 import BeautifulSoup
-from scrapers.base import BaseScraper, ScrapedDocument
+from collections.abc import AsyncIterator
 
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+from bs4 import BeautifulSoup
+from scrapers.base import BaseScraper, ScrapedDocument, map_in_order
+from scrapers.fetcher import Fetcher
 
 
 class FSBlogScraper(BaseScraper):
@@ -14,26 +14,26 @@ class FSBlogScraper(BaseScraper):
         super().__init__(persona_id=persona_id)
         self.urls = urls
 
-    def scrape(self) -> list[ScrapedDocument]:
+    async def ascrape(self, fetcher: Fetcher) -> AsyncIterator[ScrapedDocument]:
         print(f"Scraping Farnam Street blog for {self.persona_id}...")
-        documents = []
+        total = 0
 
-        for url in self.urls:
-            try:
-                docs = self._scrape_article(url)
-                documents.extend(docs)
-                print(f"  {url.split('/')[-2] if url.endswith('/') else url.split('/')[-1]}: {len(docs)} passages")
-            except Exception as e:
-                print(f"  Error on {url}: {e}")
+        async for url, docs in map_in_order(lambda url: self._scrape_article(fetcher, url), self.urls):
+            if isinstance(docs, Exception):
+                print(f"  Error on {url}: {docs}")
+                continue
+            total += len(docs)
+            print(f"  {url.split('/')[-2] if url.endswith('/') else url.split('/')[-1]}: {len(docs)} passages")
+            for doc in docs:
+                yield doc
 
-        print(f"Total: {len(documents)} passages from FS Blog for {self.persona_id}")
-        return documents
+        print(f"Total: {total} passages from FS Blog for {self.persona_id}")
 
-    def _scrape_article(self, url: str) -> list[ScrapedDocument]:
-        resp = httpx.get(url, timeout=30, follow_redirects=True, headers=HEADERS)
-        resp.raise_for_status()
+    async def _scrape_article(self, fetcher: Fetcher, url: str) -> list[ScrapedDocument]:
+        return await fetcher.get_parsed(url, self._parse_article, url, timeout=30)
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+    def _parse_article(self, html: str, url: str) -> list[ScrapedDocument]:
+        soup = BeautifulSoup(html, "html.parser")
         article = soup.find("article") or soup.find("div", {"class": "entry-content"})
         if not article:
             article = soup.find("main") or soup
@@ -97,10 +97,8 @@ class FSBlogBuffettScraper(FSBlogScraper):
 
 if __name__ == "__main__":
     for Cls, fname in [
-        (FSBlogMungerScraper, "fsblog_munger.json"),
-        (FSBlogBuffettScraper, "fsblog_buffett.json"),
+        (FSBlogMungerScraper, "fsblog_munger.jsonl"),
+        (FSBlogBuffettScraper, "fsblog_buffett.jsonl"),
     ]:
         s = Cls()
-        docs = s.scrape()
-        if docs:
-            s.save(docs, fname)
+        s.save_stream(s.scrape(), fname)
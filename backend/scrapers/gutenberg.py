@@ -1,14 +1,39 @@
 """Scrape full texts from Project Gutenberg for Franklin, Marcus Aurelius, and Confucius."""
 
-import httpx
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+
 from bs4 import BeautifulSoup
-from scrapers.base import BaseScraper, ScrapedDocument
+from scrapers.base import BaseScraper, ScrapedDocument, map_in_order
+from scrapers.fetcher import Fetcher
+from scrapers.html_stream import iter_paragraphs
+
+BOILERPLATE_CLASSES = {"pg-boilerplate", "pg-header", "pg-footer"}
+
+BOILERPLATE_KEYWORDS = [
+    "gutenberg", "copyright", "license", "donate", "ebook",
+    "plain text", "utf-8", "project gutenberg", "transcriber"
+]
+
 
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+def _is_boilerplate_element(tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+    """Gutenberg header/footer divs and <pre> license blocks."""
+    if tag == "pre":
+        return True
+    if tag == "div":
+        classes = (dict(attrs).get("class") or "").split()
+        return not BOILERPLATE_CLASSES.isdisjoint(classes)
+    return False
 
 
 class GutenbergScraper(BaseScraper):
-    """Generic Gutenberg HTML book scraper."""
+    """Generic Gutenberg HTML book scraper.
+
+    Books are downloaded to a file and extracted with the streaming parser
+    (`iter_book_file`), which keeps memory flat for multi-MB books.
+    `_parse_book` is the equivalent BeautifulSoup version, kept as the
+    reference for `python -m benchmarks.gutenberg_parse`.
+    """
 
     def __init__(self, persona_id: str, books: list[dict]):
         """
@@ -17,27 +42,37 @@ class GutenbergScraper(BaseScraper):
         super().__init__(persona_id=persona_id)
         self.books = books
 
-    def scrape(self) -> list[ScrapedDocument]:
-        documents = []
-        for book in self.books:
-            try:
-                docs = self._scrape_book(book)
-                documents.extend(docs)
-                print(f"  {book['title']}: {len(docs)} passages")
-            except Exception as e:
-                print(f"  Error scraping {book['title']}: {e}")
-        print(f"Total: {len(documents)} passages for {self.persona_id}")
-        return documents
+    async def ascrape(self, fetcher: Fetcher) -> AsyncIterator[ScrapedDocument]:
+        total = 0
+        async for book, docs in map_in_order(lambda book: self._scrape_book(fetcher, book), self.books):
+            if isinstance(docs, Exception):
+                print(f"  Error scraping {book['title']}: {docs}")
+                continue
+            total += len(docs)
+            print(f"  {book['title']}: {len(docs)} passages")
+            for doc in docs:
+                yield doc
+        print(f"Total: {total} passages for {self.persona_id}")
 
-    def _scrape_book(self, book: dict) -> list[ScrapedDocument]:
+    async def _scrape_book(self, fetcher: Fetcher, book: dict) -> list[ScrapedDocument]:
         print(f"Scraping: {book['title']}...")
-        resp = httpx.get(book["url"], timeout=60, follow_redirects=True, headers=HEADERS)
-        resp.raise_for_status()
+        return await fetcher.get_parsed_file(book["url"], self._parse_book_file, book, timeout=60)
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+    def _parse_book_file(self, path: Path, encoding: str, book: dict) -> list[ScrapedDocument]:
+        return list(self.iter_book_file(path, encoding, book))
+
+    def iter_book_file(self, path: Path, encoding: str, book: dict) -> Iterator[ScrapedDocument]:
+        """Yield a downloaded book's passages as the file is parsed."""
+        for text in iter_paragraphs(path, encoding, ("p", "blockquote"), _is_boilerplate_element):
+            doc = self._passage(text, book)
+            if doc is not None:
+                yield doc
+
+    def _parse_book(self, html: str, book: dict) -> list[ScrapedDocument]:
+        soup = BeautifulSoup(html, "html.parser")
 
         # Remove Gutenberg header/footer boilerplate
-        for div in soup.find_all("div", class_=["pg-boilerplate", "pg-header", "pg-footer"]):
+        for div in soup.find_all("div", class_=list(BOILERPLATE_CLASSES)):
             div.decompose()
         for pre in soup.find_all("pre"):
             pre.decompose()
@@ -45,26 +80,27 @@ class GutenbergScraper(BaseScraper):
         documents = []
         # Extract paragraphs
         for p in soup.find_all(["p", "blockquote"]):
-            text = p.get_text(strip=True)
-            # Skip short/boilerplate
-            if len(text) < 50:
-                continue
-            if any(kw in text.lower() for kw in [
-                "gutenberg", "copyright", "license", "donate", "ebook",
-                "plain text", "utf-8", "project gutenberg", "transcriber"
-            ]):
-                continue
-
-            documents.append(ScrapedDocument(
-                content=text,
-                source=f"{book['title']} (Project Gutenberg)",
-                persona_id=self.persona_id,
-                doc_type=book.get("doc_type", "book"),
-                metadata={"url": book["url"]},
-            ))
+            doc = self._passage(p.get_text(strip=True), book)
+            if doc is not None:
+                documents.append(doc)
 
         return documents
 
+    def _passage(self, text: str, book: dict) -> ScrapedDocument | None:
+        # Skip short/boilerplate
+        if len(text) < 50:
+            return None
+        if any(kw in text.lower() for kw in BOILERPLATE_KEYWORDS):
+            return None
+
+        return ScrapedDocument(
+            content=text,
+            source=f"{book['title']} (Project Gutenberg)",
+            persona_id=self.persona_id,
+            doc_type=book.get("doc_type", "book"),
+            metadata={"url": book["url"]},
+        )
+
 
 class FranklinGutenbergScraper(GutenbergScraper):
     def __init__(self):
@@ -115,11 +151,9 @@ class ConfuciusGutenbergScraper(GutenbergScraper):
 
 if __name__ == "__main__":
     for Cls, fname in [
-        (FranklinGutenbergScraper, "gutenberg_franklin.json"),
-        (MarcusAureliusGutenbergScraper, "gutenberg_marcus_aurelius.json"),
-        (ConfuciusGutenbergScraper, "gutenberg_confucius.json"),
+        (FranklinGutenbergScraper, "gutenberg_franklin.jsonl"),
+        (MarcusAureliusGutenbergScraper, "gutenberg_marcus_aurelius.jsonl"),
+        (ConfuciusGutenbergScraper, "gutenberg_confucius.jsonl"),
     ]:
         s = Cls()
-        docs = s.scrape()
-        if docs:
-            s.save(docs, fname)
+        s.save_stream(s.scrape(), fname)
@@ -0,0 +1,157 @@
+"""On-disk cache of scraped pages, used by `Fetcher`.
+
+For every URL the cache keeps the last response body (gzipped) with its
+ETag, Last-Modified, encoding and sha256, plus the result of the last parse
+of that body. On the next run:
+
+- the fetcher sends a conditional GET (If-None-Match / If-Modified-Since);
+  a 304 is served from the cache without downloading the page again;
+- a full 200 whose body hash matches the cached one counts as unchanged too
+  (for servers that ignore conditional requests);
+- when the body is unchanged and the parser is the same, the cached parse
+  result is returned and HTML parsing is skipped. A parser is identified by
+  the function, its arguments and the source of its module and of the
+  shared parsing modules (`PARSER_MODULES`), so editing a scraper or the
+  extractor re-parses every page it handles.
+
+In offline mode nothing is fetched: every page comes from the cache (a miss
+is an error), which makes parser changes quick to iterate and benchmark.
+"""
+
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path("data/http_cache")
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    sha256: str
+    encoding: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = 0.0
+
+
+class OfflineCacheMiss(Exception):
+    pass
+
+
+# Shared parsing code every scraper's parse functions build on
+PARSER_MODULES = ("scrapers.base", "scrapers.html_stream")
+
+
+@lru_cache
+def _module_hash(module_name: str) -> str:
+    module = sys.modules.get(module_name) or importlib.import_module(module_name)
+    path = getattr(module, "__file__", None)
+    if not path:
+        return ""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def parse_key(fn, args: tuple) -> str:
+    """Identity of a parse call: the function (with its bound scraper), its
+    extra arguments and the source of the module defining it and of
+    `PARSER_MODULES`."""
+    modules = (fn.__module__, *PARSER_MODULES)
+    payload = pickle.dumps((fn, args)) + "".join(_module_hash(name) for name in modules).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class HTTPCache:
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> Path:
+        return self.directory / (hashlib.sha256(url.encode()).hexdigest()[:32] + suffix)
+
+    def get(self, url: str) -> CacheEntry | None:
+        try:
+            entry = CacheEntry(**json.loads(self._path(url, ".json").read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+        return entry if entry.url == url and self.body_path(entry).exists() else None
+
+    def body_path(self, entry: CacheEntry) -> Path:
+        """The gzipped body of a cached page."""
+        return self._path(entry.url, ".body.gz")
+
+    def read_text(self, entry: CacheEntry) -> str:
+        body = gzip.decompress(self.body_path(entry).read_bytes())
+        return body.decode(entry.encoding, errors="replace")
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        encoding: str,
+        etag: str | None,
+        last_modified: str | None,
+        previous: CacheEntry | None = None,
+    ) -> CacheEntry:
+        entry = CacheEntry(url, hashlib.sha256(body).hexdigest(), encoding, etag, last_modified, time.time())
+        if previous is None or previous.sha256 != entry.sha256:
+            _write_atomic(self._path(url, ".body.gz"), gzip.compress(body, compresslevel=6))
+        self._save_entry(entry)
+        return entry
+
+    def put_file(
+        self,
+        url: str,
+        source: Path,
+        sha256: str,
+        encoding: str,
+        etag: str | None,
+        last_modified: str | None,
+        previous: CacheEntry | None = None,
+    ) -> CacheEntry:
+        """`put` for a body downloaded to a file; compressed in chunks, never fully in memory."""
+        entry = CacheEntry(url, sha256, encoding, etag, last_modified, time.time())
+        if previous is None or previous.sha256 != sha256:
+            path = self._path(url, ".body.gz")
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            with open(source, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp, path)
+        self._save_entry(entry)
+        return entry
+
+    def _save_entry(self, entry: CacheEntry):
+        # Written after the body: an entry is only visible once its body is complete
+        _write_atomic(self._path(entry.url, ".json"), json.dumps(entry.__dict__).encode())
+
+    def touch(self, entry: CacheEntry):
+        """Record a successful revalidation (304)."""
+        entry.fetched_at = time.time()
+        self._save_entry(entry)
+
+    def get_parsed(self, url: str, sha256: str, key: str):
+        """The cached parse result for this body and parser, or None."""
+        try:
+            with open(self._path(url, ".parsed.pickle"), "rb") as f:
+                cached_sha, cached_key, result = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            return None
+        return result if (cached_sha, cached_key) == (sha256, key) else None
+
+    def put_parsed(self, url: str, sha256: str, key: str, result):
+        _write_atomic(self._path(url, ".parsed.pickle"), pickle.dumps((sha256, key, result)))
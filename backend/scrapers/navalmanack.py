@@ -1,10 +1,10 @@
 """Scrape The Almanack of Naval Ravikant from navalmanack.com."""
 
-import httpx
-from bs4 import BeautifulSoup
-from scrapers.base import BaseScraper, ScrapedDocument
+from collections.abc import AsyncIterator
 
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+from bs4 import BeautifulSoup
+from scrapers.base import BaseScraper, ScrapedDocument, map_in_order
+from scrapers.fetcher import Fetcher
 
 # Skip non-content pages
 SKIP_SLUGS = [
@@ -21,18 +21,33 @@ class NavalmanackScraper(BaseScraper):
     def __init__(self):
         super().__init__(persona_id="naval-ravikant")
 
-    def scrape(self) -> list[ScrapedDocument]:
+    async def ascrape(self, fetcher: Fetcher) -> AsyncIterator[ScrapedDocument]:
         print("Scraping Navalmanack table of contents...")
-        documents = []
 
         try:
-            resp = httpx.get(self.TOC_URL, timeout=30, headers=HEADERS, follow_redirects=True)
-            resp.raise_for_status()
+            html = await fetcher.get_text(self.TOC_URL, timeout=30)
         except Exception as e:
             print(f"Error fetching TOC: {e}")
-            return documents
+            return
+
+        chapter_urls = self._parse_toc(html)
+        print(f"Found {len(chapter_urls)} chapters to scrape")
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        total = 0
+        async for url, docs in map_in_order(lambda url: self._scrape_chapter(fetcher, url), chapter_urls):
+            if isinstance(docs, Exception):
+                print(f"  Error on {url}: {docs}")
+                continue
+            total += len(docs)
+            if docs:
+                print(f"  {url.split('/')[-1]}: {len(docs)} passages")
+            for doc in docs:
+                yield doc
+
+        print(f"Total: {total} passages from Navalmanack")
+
+    def _parse_toc(self, html: str) -> list[str]:
+        soup = BeautifulSoup(html, "html.parser")
         chapter_urls = []
 
         for a in soup.find_all("a", href=True):
@@ -44,26 +59,13 @@ class NavalmanackScraper(BaseScraper):
                     chapter_urls.append(full)
 
         # Deduplicate
-        chapter_urls = list(dict.fromkeys(chapter_urls))
-        print(f"Found {len(chapter_urls)} chapters to scrape")
-
-        for url in chapter_urls:
-            try:
-                docs = self._scrape_chapter(url)
-                documents.extend(docs)
-                if docs:
-                    print(f"  {url.split('/')[-1]}: {len(docs)} passages")
-            except Exception as e:
-                print(f"  Error on {url}: {e}")
-
-        print(f"Total: {len(documents)} passages from Navalmanack")
-        return documents
+        return list(dict.fromkeys(chapter_urls))
 
-    def _scrape_chapter(self, url: str) -> list[ScrapedDocument]:
-        resp = httpx.get(url, timeout=30, headers=HEADERS, follow_redirects=True)
-        resp.raise_for_status()
+    async def _scrape_chapter(self, fetcher: Fetcher, url: str) -> list[ScrapedDocument]:
+        return await fetcher.get_parsed(url, self._parse_chapter, url, timeout=30)
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+    def _parse_chapter(self, html: str, url: str) -> list[ScrapedDocument]:
+        soup = BeautifulSoup(html, "html.parser")
 
         # Squarespace uses sqs-html-content divs for the actual body text
         html_content_divs = soup.find_all("div", class_="sqs-html-content")
@@ -104,6 +106,4 @@ class NavalmanackScraper(BaseScraper):
 
 if __name__ == "__main__":
     s = NavalmanackScraper()
-    docs = s.scrape()
-    if docs:
-        s.save(docs, "navalmanack.json")
+    s.save_stream(s.scrape(), "navalmanack_naval.jsonl")
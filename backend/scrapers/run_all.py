@@ -1,4 +1,20 @@
-"""Run all scrapers and save raw data."""
+"""Run all scrapers and save raw data.
+
+All scrapers run concurrently on one event loop and share a `Fetcher`:
+pooled keep-alive connections, a global and a per-host request limit, and
+retries with backoff. HTML is parsed on a process pool. Documents are
+streamed to JSONL files as each page is scraped (`--gzip` compresses them).
+
+Pages are cached in `data/http_cache`: later runs send conditional requests
+and skip parsing unchanged pages, and `--offline` scrapes from the cache
+alone (useful when working on a parser).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
 
 from scrapers.gutenberg import (
     FranklinGutenbergScraper,
@@ -9,40 +25,92 @@ from scrapers.fsblog import FSBlogMungerScraper, FSBlogBuffettScraper
 from scrapers.twentyfiveiq import TwentyFiveIQMungerScraper
 from scrapers.navalmanack import NavalmanackScraper
 from scrapers.buffett_sources import BuffettFAQScraper, OldSchoolValueBuffettScraper
+from scrapers.fetcher import Fetcher
+from scrapers.http_cache import DEFAULT_CACHE_DIR, HTTPCache
+
+
+async def run_scraper(fetcher: Fetcher, scraper, filename: str) -> tuple[str, float, str]:
+    """Scrape into `filename`; returns (scraper name, seconds, outcome)."""
+    name = scraper.__class__.__name__
+    print(f"Running {name}...")
+    start = time.perf_counter()
+    try:
+        path = await scraper.asave_stream(scraper.ascrape(fetcher), filename)
+        outcome = str(path) if path else "no documents"
+    except Exception as e:
+        print(f"Error in {name}: {e}")
+        outcome = f"error: {e}"
+    return name, time.perf_counter() - start, outcome
+
+
+async def run(all_scrapers: list, args):
+    fetcher = Fetcher(
+        max_concurrency=args.concurrency,
+        per_host=args.per_host,
+        retries=args.retries,
+        parse_workers=args.parse_workers,
+        cache=None if args.no_cache else HTTPCache(args.cache_dir),
+        offline=args.offline,
+    )
+    async with fetcher:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_scraper(fetcher, scraper, filename + (".gz" if args.gzip else ""))
+            for scraper, filename in all_scrapers
+        ))
+        elapsed = time.perf_counter() - start
+
+    print(f"\n{'='*60}")
+    for name, seconds, outcome in results:
+        print(f"  {name:32s} {seconds:6.1f}s  {outcome}")
+    stats = fetcher.stats()
+    print(
+        f"\n  {stats['requests']} requests ({stats['retried']} retried, {stats['failed']} failed), "
+        f"{stats['megabytes']} MB in {elapsed:.1f}s wall time"
+    )
+    if fetcher.cache is not None:
+        print(
+            f"  Cache: {stats['not_modified']} not modified, {stats['unchanged']} unchanged, "
+            f"{stats['offline_hits']} served offline, {stats['parses_skipped']} parses skipped"
+        )
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape raw persona data")
+    parser.add_argument("--gzip", action="store_true", help="Write .jsonl.gz instead of .jsonl")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight across all sites")
+    parser.add_argument("--per-host", type=int, default=4, help="Requests in flight per site")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per request on errors, 429 and 5xx")
+    parser.add_argument(
+        "--parse-workers", type=int, default=min(4, (os.cpu_count() or 1) - 1),
+        help="Processes for HTML parsing (0 parses on a thread; default leaves a core for the event loop)",
+    )
+    parser.add_argument("--offline", action="store_true", help="Serve every page from the HTTP cache")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the HTTP cache")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="HTTP cache directory")
+    args = parser.parse_args()
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the cache")
+
     all_scrapers = [
         # Charlie Munger
-        (FSBlogMungerScraper(), "fsblog_munger.json"),
-        (TwentyFiveIQMungerScraper(), "twentyfiveiq_munger.json"),
+        (FSBlogMungerScraper(), "fsblog_munger.jsonl"),
+        (TwentyFiveIQMungerScraper(), "twentyfiveiq_munger.jsonl"),
         # Benjamin Franklin
-        (FranklinGutenbergScraper(), "gutenberg_franklin.json"),
+        (FranklinGutenbergScraper(), "gutenberg_franklin.jsonl"),
         # Marcus Aurelius
-        (MarcusAureliusGutenbergScraper(), "gutenberg_marcus_aurelius.json"),
+        (MarcusAureliusGutenbergScraper(), "gutenberg_marcus_aurelius.jsonl"),
         # Warren Buffett
-        (BuffettFAQScraper(), "buffettfaq_buffett.json"),
-        (OldSchoolValueBuffettScraper(), "osv_buffett.json"),
-        (FSBlogBuffettScraper(), "fsblog_buffett.json"),
+        (BuffettFAQScraper(), "buffettfaq_buffett.jsonl"),
+        (OldSchoolValueBuffettScraper(), "osv_buffett.jsonl"),
+        (FSBlogBuffettScraper(), "fsblog_buffett.jsonl"),
         # Confucius
-        (ConfuciusGutenbergScraper(), "gutenberg_confucius.json"),
+        (ConfuciusGutenbergScraper(), "gutenberg_confucius.jsonl"),
         # Naval Ravikant
-        (NavalmanackScraper(), "navalmanack_naval.json"),
+        (NavalmanackScraper(), "navalmanack_naval.jsonl"),
     ]
 
-    for scraper, filename in all_scrapers:
-        print(f"\n{'='*60}")
-        print(f"Running {scraper.__class__.__name__}...")
-        print(f"{'='*60}")
-        try:
-            docs = scraper.scrape()
-            if docs:
-                scraper.save(docs, filename)
-            else:
-                print(f"No documents scraped by {scraper.__class__.__name__}")
-        except Exception as e:
-            print(f"Error in {scraper.__class__.__name__}: {e}")
-
+    asyncio.run(run(all_scrapers, args))
     print("\nAll scrapers finished.")
 
 
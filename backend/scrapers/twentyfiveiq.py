@@ -1,10 +1,10 @@
 """Scrape Charlie Munger quotes from 25iq.com (Tren Griffin's collection)."""
 
-import httpx
+from collections.abc import AsyncIterator
+
 from bs4 import BeautifulSoup
 from scrapers.base import BaseScraper, ScrapedDocument
-
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+from scrapers.fetcher import Fetcher
 
 
 class TwentyFiveIQMungerScraper(BaseScraper):
@@ -13,18 +13,22 @@ class TwentyFiveIQMungerScraper(BaseScraper):
     def __init__(self):
         super().__init__(persona_id="charlie-munger")
 
-    def scrape(self) -> list[ScrapedDocument]:
+    async def ascrape(self, fetcher: Fetcher) -> AsyncIterator[ScrapedDocument]:
         print(f"Scraping 25iq Munger quotes: {self.URL}")
-        documents = []
 
         try:
-            resp = httpx.get(self.URL, timeout=30, follow_redirects=True, headers=HEADERS)
-            resp.raise_for_status()
+            documents = await fetcher.get_parsed(self.URL, self._parse, timeout=30)
         except Exception as e:
             print(f"Error fetching 25iq: {e}")
-            return documents
+            return
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        print(f"Found {len(documents)} quotes from 25iq")
+        for doc in documents:
+            yield doc
+
+    def _parse(self, html: str) -> list[ScrapedDocument]:
+        documents = []
+        soup = BeautifulSoup(html, "html.parser")
         content = soup.find("div", class_="entry-content") or soup.find("article")
         if not content:
             print("Warning: no content div found")
@@ -64,12 +68,9 @@ class TwentyFiveIQMungerScraper(BaseScraper):
                 metadata={"url": self.URL},
             ))
 
-        print(f"Found {len(documents)} quotes from 25iq")
         return documents
 
 
 if __name__ == "__main__":
     s = TwentyFiveIQMungerScraper()
-    docs = s.scrape()
-    if docs:
-        s.save(docs, "twentyfiveiq_munger.json")
+    s.save_stream(s.scrape(), "twentyfiveiq_munger.jsonl")
@@ -0,0 +1,53 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from app.config import get_settings
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    """Settings with every on-disk path under `tmp_path` (and the working directory there).
+
+    Override other fields with `monkeypatch.setenv` followed by `get_settings.cache_clear()`.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CHROMA_DB_PATH", str(tmp_path / "chroma_db"))
+    monkeypatch.setenv("BM25_INDEX_PATH", str(tmp_path / "bm25_index"))
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path / "profiles"))
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def hash_embeddings(monkeypatch):
+    """Replace the embedding model with a deterministic hash of the text, so nothing is downloaded."""
+    from app.services import embeddings
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = []
+        for text in texts:
+            seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+            vectors.append(vector / np.linalg.norm(vector))
+        return np.stack(vectors) if vectors else np.zeros((0, 16), dtype=np.float32)
+
+    monkeypatch.setattr(embeddings.PersonaEmbeddingFunction, "embed", embed)
+    monkeypatch.setattr(embeddings.PersonaEmbeddingFunction, "load", lambda self: None)
+    monkeypatch.setattr(embeddings, "_embedding_function", None, raising=False)
+
+
+@pytest.fixture
+def chroma(settings, hash_embeddings, monkeypatch):
+    """A fresh ChromaDB client in `settings.chroma_db_path` with no cached collections or indexes."""
+    from app.services import bm25_index, vectorstore
+
+    monkeypatch.setattr(vectorstore, "_client", None)
+    vectorstore.invalidate_collection_cache()
+    bm25_index.invalidate_cache()
+    yield vectorstore.get_chroma_client()
+    vectorstore.invalidate_collection_cache()
+    bm25_index.invalidate_cache()
@@ -0,0 +1,132 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.services.bm25_index import BM25Index, _tokenize, build_index, load_index, save_index
+
+WORDS = [f"w{i}" for i in range(300)]
+
+
+def make_corpus(size: int, seed: int = 0) -> tuple[list[str], list[str], list[dict]]:
+    rng = random.Random(seed)
+    # Zipf-ish: low-numbered words are common, so IDFs span negative to large
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    documents = [" ".join(rng.choices(WORDS, weights, k=rng.randint(5, 60))) for _ in range(size)]
+    ids = [f"doc-{seed}-{i}" for i in range(size)]
+    return ids, documents, [{"n": i} for i in range(size)]
+
+
+def make_queries(count: int, seed: int = 1) -> list[list[str]]:
+    rng = random.Random(seed)
+    return [rng.sample(WORDS[:150], rng.randint(1, 5)) for _ in range(count)]
+
+
+def ranked(index: BM25Index, query: list[str], top_k: int = 10) -> list[tuple[str, float]]:
+    return [(index.ids[doc], score) for doc, score in index.search(query, top_k)]
+
+
+def assert_same_results(index: BM25Index, reference: BM25Index, queries: list[list[str]]):
+    for query in queries:
+        got, expected = ranked(index, query), ranked(reference, query)
+        assert [doc_id for doc_id, _ in got] == [doc_id for doc_id, _ in expected], query
+        assert [score for _, score in got] == pytest.approx([score for _, score in expected], rel=1e-9)
+
+
+def test_scores_match_rank_bm25():
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    ids, documents, metadatas = make_corpus(500)
+    index = build_index(ids, documents, metadatas)
+    okapi = rank_bm25.BM25Okapi([_tokenize(doc) for doc in documents])
+
+    for query in make_queries(50):
+        scores = okapi.get_scores(query)
+        # Highest score first, ties in corpus order
+        order = sorted((i for i in range(len(scores)) if scores[i] > 0), key=lambda i: (-scores[i], i))[:10]
+        assert [doc for doc, _ in index.search(query, 10)] == order, query
+        assert [score for _, score in index.search(query, 10)] == pytest.approx(scores[order].tolist(), rel=1e-12)
+
+
+def test_search_many_matches_search():
+    index = build_index(*make_corpus(500))
+    queries = make_queries(50)
+    for query, hits in zip(queries, index.search_many(queries, 10)):
+        expected = index.search(query, 10)
+        assert [score for _, score in hits] == pytest.approx([score for _, score in expected], rel=1e-9)
+        assert {doc for doc, _ in hits} <= {doc for doc, _ in index.search(query, 20)}
+
+
+def test_add_and_remove_match_rebuild():
+    ids, documents, metadatas = make_corpus(400)
+    index = build_index(ids[:300], documents[:300], metadatas[:300])
+    index.add_documents(ids[300:], documents[300:], metadatas[300:])
+    removed = set(ids[::7])
+    index.remove_documents(sorted(removed))
+
+    keep = [i for i, doc_id in enumerate(ids) if doc_id not in removed]
+    rebuilt = build_index([ids[i] for i in keep], [documents[i] for i in keep], [metadatas[i] for i in keep])
+
+    assert index.num_docs == rebuilt.num_docs
+    assert index.num_terms == rebuilt.num_terms
+    assert index.fingerprint == rebuilt.fingerprint
+    assert_same_results(index, rebuilt, make_queries(50))
+    assert_same_results(index.compacted(), rebuilt, make_queries(50))
+
+
+def test_add_existing_id_replaces_document():
+    ids, documents, metadatas = make_corpus(100)
+    index = build_index(ids, documents, metadatas)
+    index.add_documents([ids[0]], ["zzz unique words"], [{"n": -1}])
+
+    assert index.num_docs == 100
+    assert ranked(index, ["zzz"]) and ranked(index, ["zzz"])[0][0] == ids[0]
+    rebuilt = build_index(ids[1:] + [ids[0]], documents[1:] + ["zzz unique words"], metadatas[1:] + [{"n": -1}])
+    assert_same_results(index, rebuilt, make_queries(30))
+
+
+def test_compacted_drops_tombstones_and_dead_terms():
+    index = build_index(["a", "b", "c"], ["apple banana", "banana cherry", "durian"], [{}, {}, {}])
+    index.remove_documents(["c", "unknown"])
+    compacted = index.compacted()
+
+    assert compacted.ids == ["a", "b"]
+    assert "durian" not in compacted.vocabulary
+    assert compacted.search(["durian"], 5) == []
+    assert ranked(compacted, ["cherry"]) == ranked(index, ["cherry"])
+
+
+def test_save_and_load_round_trip(settings):
+    ids, documents, metadatas = make_corpus(300)
+    index = build_index(ids, documents, metadatas)
+    index.add_documents(*make_corpus(20, seed=5))
+    index.remove_documents(ids[:10])
+    save_index("persona", index)
+
+    loaded = load_index("persona", expected_fingerprint=index.fingerprint)
+    assert loaded is not None
+    assert isinstance(loaded._postings_docs, np.memmap)
+    assert loaded.ids == index.live_ids()
+    assert_same_results(loaded, index, make_queries(50))
+
+    # Mutating a memory-mapped index works on top of the read-only arrays
+    loaded.add_documents(["new"], ["w1 w2 w3 zebra"], [{}])
+    assert ranked(loaded, ["zebra"])[0][0] == "new"
+
+
+def test_load_refuses_stale_or_missing_artifacts(settings):
+    assert load_index("persona") is None
+    index = build_index(*make_corpus(50))
+    save_index("persona", index)
+    assert load_index("persona", expected_fingerprint="something else") is None
+    assert load_index("persona", expected_fingerprint=index.fingerprint) is not None
+
+
+def test_save_replaces_previous_artifact(settings):
+    first = build_index(*make_corpus(50))
+    second = build_index(*make_corpus(60, seed=3))
+    target = save_index("persona", first)
+    target.with_name("persona.old").mkdir()  # left over from an interrupted save
+
+    assert save_index("persona", second) == target
+    assert sorted(p.name for p in target.parent.iterdir()) == ["persona"]
+    assert load_index("persona", expected_fingerprint=second.fingerprint) is not None
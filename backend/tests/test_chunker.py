@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from ingestion.chunker import approx_token_count, chunk_document, chunk_spans, get_token_counter
+from ingestion.cleaner import clean_text
+
+WORDS = "the of and wisdom patience reason habit money mind character discipline time learning".split()
+
+
+def make_text(seed: int, paragraphs: int = 6) -> str:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(1, 12)):
+            words = rng.choices(WORDS, k=rng.randint(3, 25))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        out.append(" ".join(sentences))
+    return "\n\n".join(out)
+
+
+def sentence_spans(text: str) -> list[tuple[int, int]]:
+    spans, start = [], None
+    for i, char in enumerate(text):
+        if start is None and not char.isspace():
+            start = i
+        if start is not None and char in ".!?" and (i + 1 == len(text) or text[i + 1].isspace()):
+            spans.append((start, i + 1))
+            start = None
+    return spans
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("counter", ["approx", "chars", "words"])
+def test_spans_cover_text_in_order_within_limits(seed, counter):
+    text = make_text(seed)
+    count_tokens = get_token_counter(counter)
+    max_tokens = {"approx": 64, "chars": 256, "words": 48}[counter]
+    spans = chunk_spans(text, "article", max_tokens=max_tokens, count_tokens=count_tokens)
+
+    sentences = sentence_spans(text)
+    assert spans
+    assert spans[0][0] == sentences[0][0]
+    assert spans[-1][1] == sentences[-1][1]
+    starts = {start for start, _ in sentences}
+    ends = {end for _, end in sentences}
+    for start, end in spans:
+        # Chunks are runs of whole sentences
+        assert start in starts and end in ends
+        inside = [(a, b) for a, b in sentences if start <= a and b <= end]
+        if len(inside) > 1:
+            # Merging may add a remainder below min_tokens; anything else stays within max_tokens
+            assert sum(count_tokens(text[a:b]) for a, b in inside) <= max_tokens + 12
+    # In order, and together they cover every sentence
+    assert [start for start, _ in spans] == sorted({start for start, _ in spans})
+    assert all(any(start <= a and b <= end for start, end in spans) for a, b in sentences)
+
+
+def test_quote_and_short_text_stay_intact():
+    text = "  Be fearful when others are greedy. Be greedy when others are fearful.  "
+    assert chunk_spans(text, "quote") == [(2, len(text) - 2)]
+    assert chunk_spans(text, "article") == [(2, len(text) - 2)]
+    assert chunk_spans("   ", "article") == []
+
+
+def test_overlap_repeats_last_sentence():
+    sentences = [f"Sentence number {i} talks about patience and time." for i in range(12)]
+    text = " ".join(sentences)
+    spans = chunk_spans(text, "article", max_tokens=40, overlap_sentences=1, min_tokens=1)
+    chunks = [text[start:end] for start, end in spans]
+    assert len(chunks) > 1
+    for first, second in zip(chunks, chunks[1:]):
+        last_sentence = first[first.rstrip(".").rfind(".") + 1:].strip()
+        assert second.startswith(last_sentence)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_spans_match_chunk_document_on_cleaned_text(seed):
+    # With a length-only counter both chunkers use the same boundaries,
+    # except that chunk_document also counts the joining spaces
+    text = clean_text(make_text(seed))
+    spans = chunk_spans(text, "article", max_tokens=10_000, count_tokens=len)
+    assert [text[start:end] for start, end in spans] == chunk_document(text, "article", max_chunk_size=10_000)
+
+
+def test_approx_token_count():
+    assert approx_token_count("") == 0
+    assert approx_token_count("abcd") == 1
+    assert approx_token_count("abcde") == 2
+    with pytest.raises(ValueError):
+        get_token_counter("nope")
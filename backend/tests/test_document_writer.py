@@ -0,0 +1,94 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from scrapers.base import BaseScraper, DocumentWriter, ScrapedDocument
+
+
+class StaticScraper(BaseScraper):
+    async def ascrape(self, fetcher):
+        yield  # not used
+
+
+def doc(content: str) -> ScrapedDocument:
+    return ScrapedDocument(content=content, source="https://example.com", persona_id="persona", doc_type="quote")
+
+
+def read_jsonl(path) -> list[str]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line)["content"] for line in f]
+
+
+@pytest.fixture
+def scraper(tmp_path) -> StaticScraper:
+    return StaticScraper("persona", output_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize("filename", ["docs.jsonl", "docs.jsonl.gz"])
+def test_save_stream_writes_jsonl(scraper, tmp_path, filename):
+    path = scraper.save_stream([doc("one"), doc("two")], filename)
+    assert path == tmp_path / filename
+    assert read_jsonl(path) == ["one", "two"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [filename]
+
+
+def test_previous_file_untouched_until_scrape_succeeds(scraper, tmp_path):
+    scraper.save_stream([doc("old")], "docs.jsonl")
+
+    def documents():
+        yield doc("new")
+        # While scraping, readers still see the previous output
+        assert read_jsonl(tmp_path / "docs.jsonl") == ["old"]
+        yield doc("newer")
+
+    scraper.save_stream(documents(), "docs.jsonl")
+    assert read_jsonl(tmp_path / "docs.jsonl") == ["new", "newer"]
+
+
+@pytest.mark.parametrize("filename", ["docs.jsonl", "docs.jsonl.gz"])
+def test_failed_scrape_keeps_previous_file_and_leaves_no_partial(scraper, tmp_path, filename):
+    scraper.save_stream([doc("old")], filename)
+
+    def failing():
+        yield doc("partial")
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        scraper.save_stream(failing(), filename)
+    assert read_jsonl(tmp_path / filename) == ["old"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [filename]
+
+
+def test_failed_first_scrape_leaves_nothing(scraper, tmp_path):
+    async def failing():
+        yield doc("partial")
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scraper.asave_stream(failing(), "docs.jsonl"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_empty_scrape_keeps_previous_file(scraper, tmp_path):
+    scraper.save_stream([doc("old")], "docs.jsonl")
+
+    async def nothing():
+        return
+        yield
+
+    assert asyncio.run(scraper.asave_stream(nothing(), "docs.jsonl")) is None
+    assert read_jsonl(tmp_path / "docs.jsonl") == ["old"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["docs.jsonl"]
+
+
+def test_writer_discards_on_exception(tmp_path):
+    path = tmp_path / "docs.jsonl"
+    with pytest.raises(KeyboardInterrupt):
+        with DocumentWriter(path) as writer:
+            writer.write(doc("one"))
+            assert writer.tmp_path.exists()
+            raise KeyboardInterrupt
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,74 @@
+import gzip
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scrapers import html_stream
+from scrapers.gutenberg import GutenbergScraper, _is_boilerplate_element
+from scrapers.html_stream import iter_paragraphs
+
+PAGES = {
+    "simple": "<html><body><p>First paragraph.</p><p>Second <b>bold</b> one.</p></body></html>",
+    "whitespace": "<p>  Text   with\n spaces </p><p>\n</p><p>a<i> b </i>c</p>",
+    "unclosed": "<div><p>One<p>Two</div><p>Three",
+    "nested": "<blockquote>Quote <p>inner</p> tail</blockquote><p>after</p>",
+    "muted": "<p>Visible<script>var x = 1;</script><style>p {}</style> text</p>",
+    "entities": "<p>Fish &amp; chips &lt;3 &#8212; caf&eacute;</p>",
+    "comments": "<p>Before<!-- hidden --> after</p><![CDATA[raw]]><p>x</p>",
+    "void": "<p>Line<br>break<img src='a.png'>end</p><p/>",
+    "unknown_close": "<p>Text</span> more</p>",
+    "ruby": "<p><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby>字</p>",
+}
+
+
+def reference(html: str, tags=("p", "blockquote")) -> list[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    return [element.get_text(strip=True) for element in soup.find_all(list(tags))]
+
+
+def stream(tmp_path, html: str, **kwargs) -> list[str]:
+    path = tmp_path / "page.html"
+    path.write_text(html, encoding="utf-8")
+    return list(iter_paragraphs(path, **kwargs))
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_matches_beautifulsoup(tmp_path, name):
+    assert stream(tmp_path, PAGES[name]) == reference(PAGES[name])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_chunk_boundaries_do_not_matter(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(html_stream, "CHUNK_SIZE", chunk_size)
+    html = "".join(PAGES[name] for name in sorted(PAGES))
+    assert stream(tmp_path, html) == reference(html)
+
+
+def test_gzipped_file(tmp_path):
+    path = tmp_path / "page.html.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(PAGES["simple"])
+    assert list(iter_paragraphs(path)) == reference(PAGES["simple"])
+
+
+def test_skip_matches_gutenberg_decompose(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    passage = "A passage long enough to be kept by the scraper, about patience and virtue."
+    html = (
+        "<html><body>"
+        "<div class='pg-boilerplate'><p>Header paragraph that is long enough to be kept otherwise.</p></div>"
+        f"<p>{passage}</p>"
+        "<pre><p>Licence text inside a pre block that would be long enough too.</p></pre>"
+        f"<div class='chapter'><blockquote>{passage} Again.</blockquote></div>"
+        "<div class='pg-footer other'><p>Footer paragraph that is long enough to be kept otherwise.</p></div>"
+        "</body></html>"
+    )
+    path = tmp_path / "book.html"
+    path.write_text(html, encoding="utf-8")
+    scraper = GutenbergScraper("persona", [])
+    book = {"url": "https://example.com/book", "title": "Book"}
+
+    streamed = list(scraper.iter_book_file(path, "utf-8", book))
+    assert streamed == scraper._parse_book(html, book)
+    assert [doc.content for doc in streamed] == [passage, f"{passage} Again."]
+    assert list(iter_paragraphs(path, skip=_is_boilerplate_element)) == [passage, f"{passage} Again."]
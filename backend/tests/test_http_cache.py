@@ -0,0 +1,154 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scrapers.fetcher import Fetcher
+from scrapers import http_cache
+from scrapers.http_cache import HTTPCache, OfflineCacheMiss, parse_key
+
+URL = "https://example.com/page"
+
+
+class Server:
+    """Serves one page with an ETag; honours If-None-Match unless `conditional` is off."""
+
+    def __init__(self, body: bytes = b"<p>hello</p>", etag: str = '"v1"'):
+        self.body = body
+        self.etag = etag
+        self.conditional = True
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.conditional and request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        headers = {"ETag": self.etag, "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+                   "Content-Type": "text/html; charset=utf-8"}
+        return httpx.Response(200, content=self.body, headers=headers)
+
+
+def make_fetcher(server: Server, cache: HTTPCache | None, offline: bool = False) -> Fetcher:
+    fetcher = Fetcher(cache=cache, offline=offline, retries=0)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(server))
+    return fetcher
+
+
+def run(server: Server, cache: HTTPCache | None, method: str, *args, offline: bool = False, **kwargs):
+    async def main():
+        async with make_fetcher(server, cache, offline) as fetcher:
+            return await getattr(fetcher, method)(URL, *args, **kwargs), fetcher.stats()
+
+    return asyncio.run(main())
+
+
+def parse_upper(text: str) -> str:
+    parse_upper.calls += 1
+    return text.upper()
+
+
+def parse_file(path, encoding: str) -> str:
+    parse_file.calls += 1
+    with open(path, encoding=encoding) as f:
+        return f.read()
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    parse_upper.calls = parse_file.calls = 0
+
+
+@pytest.fixture
+def cache(tmp_path) -> HTTPCache:
+    return HTTPCache(tmp_path / "http_cache")
+
+
+def test_revalidates_with_etag_and_serves_304_from_cache(cache):
+    server = Server()
+    page, _ = run(server, cache, "fetch")
+    assert page.text == "<p>hello</p>" and not page.unchanged
+    assert "If-None-Match" not in server.requests[0].headers
+
+    page, stats = run(server, cache, "fetch")
+    assert server.requests[1].headers["If-None-Match"] == '"v1"'
+    assert server.requests[1].headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert page.text == "<p>hello</p>" and page.unchanged
+    assert stats["not_modified"] == 1
+
+
+def test_changed_page_replaces_cached_body(cache):
+    server = Server()
+    run(server, cache, "fetch")
+    server.body, server.etag = b"<p>changed</p>", '"v2"'
+    page, _ = run(server, cache, "fetch")
+    assert page.text == "<p>changed</p>" and not page.unchanged
+    assert cache.read_text(cache.get(URL)) == "<p>changed</p>"
+    assert cache.get(URL).etag == '"v2"'
+
+
+def test_same_body_without_conditional_support_counts_as_unchanged(cache):
+    server = Server()
+    server.conditional = False
+    run(server, cache, "fetch")
+    page, stats = run(server, cache, "fetch")
+    assert page.unchanged
+    assert (stats["not_modified"], stats["unchanged"]) == (0, 1)
+
+
+def test_parse_result_reused_for_unchanged_page(cache):
+    server = Server()
+    result, _ = run(server, cache, "get_parsed", parse_upper)
+    assert result == "<P>HELLO</P>"
+    result, stats = run(server, cache, "get_parsed", parse_upper)
+    assert result == "<P>HELLO</P>"
+    assert stats["parses_skipped"] == 1
+    assert parse_upper.calls == 1
+
+    server.body, server.etag = b"<p>new</p>", '"v2"'
+    result, _ = run(server, cache, "get_parsed", parse_upper)
+    assert result == "<P>NEW</P>"
+    assert parse_upper.calls == 2
+
+
+def test_download_revalidates_and_reuses_parse(cache):
+    server = Server(body=b"<p>big book</p>")
+    result, _ = run(server, cache, "get_parsed_file", parse_file)
+    assert result == "<p>big book</p>"
+    result, stats = run(server, cache, "get_parsed_file", parse_file)
+    assert result == "<p>big book</p>"
+    assert stats["not_modified"] == 1 and stats["parses_skipped"] == 1
+    assert parse_file.calls == 1
+
+
+def test_offline_serves_cache_only(cache):
+    server = Server()
+    run(server, cache, "fetch")
+    page, stats = run(server, cache, "fetch", offline=True)
+    assert page.text == "<p>hello</p>"
+    assert len(server.requests) == 1 and stats["offline_hits"] == 1
+
+    with pytest.raises(OfflineCacheMiss):
+        asyncio.run(make_fetcher(server, cache, offline=True).fetch("https://example.com/other"))
+    with pytest.raises(ValueError):
+        Fetcher(offline=True)
+
+
+def test_without_cache_every_fetch_downloads():
+    server = Server()
+    run(server, None, "fetch")
+    page, _ = run(server, None, "fetch")
+    assert not page.unchanged
+    assert all("If-None-Match" not in request.headers for request in server.requests)
+
+
+def test_parse_key_changes_with_shared_parser_modules(monkeypatch):
+    key = parse_key(parse_upper, ())
+    assert parse_key(parse_upper, ()) == key
+    assert parse_key(parse_upper, ("other",)) != key
+
+    for module in http_cache.PARSER_MODULES:
+        hashes = {name: http_cache._module_hash(name) for name in (parse_upper.__module__, *http_cache.PARSER_MODULES)}
+        hashes[module] = "edited"
+        monkeypatch.setattr(http_cache, "_module_hash", hashes.__getitem__)
+        assert parse_key(parse_upper, ()) != key
+        monkeypatch.undo()
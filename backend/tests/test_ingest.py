@@ -0,0 +1,144 @@
+import json
+import sys
+
+import pytest
+
+from app.services import bm25_index
+from app.services.vectorstore import corpus_fingerprint, get_collection, get_document_ids
+from ingestion import ingest
+
+PERSONA = "test-persona"
+
+
+def document(content: str, source: str = "https://example.com/quotes") -> dict:
+    return {"content": content, "source": source, "persona_id": PERSONA, "doc_type": "quote", "metadata": {}}
+
+
+QUOTES = [
+    "Patience is the companion of wisdom, and wisdom grows slowly.",
+    "Invert, always invert: think about what would make you fail.",
+    "Spend each day trying to be a little wiser than you were before.",
+]
+LETTERS = [
+    "Our favorite holding period is forever, when we own great businesses.",
+    "Price is what you pay; value is what you get in the long run.",
+]
+
+
+def write_raw(name: str, contents: list[str]):
+    ingest.RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with open(ingest.RAW_DATA_DIR / name, "w") as f:
+        for content in contents:
+            f.write(json.dumps(document(content, source=name)) + "\n")
+
+
+@pytest.fixture
+def run_ingest(chroma, monkeypatch):
+    """Run the ingest CLI in the temporary working directory; returns the chunk ids it upserted."""
+    def run(*args: str) -> list[str]:
+        upserted = []
+        upsert = ingest.upsert_prepared
+        monkeypatch.setattr(ingest, "upsert_prepared", lambda prepared, embeddings: (
+            upserted.extend(prepared.ids), upsert(prepared, embeddings)
+        ))
+        monkeypatch.setattr(sys, "argv", ["ingest", "--embed-workers", "0", *args])
+        ingest.main()
+        return upserted
+
+    return run
+
+
+def stored_contents() -> set[str]:
+    return set(get_collection(PERSONA).get(include=["documents"])["documents"])
+
+
+def manifest_chunks() -> dict[str, set[str]]:
+    with open(ingest.MANIFEST_DIR / f"{PERSONA}.json") as f:
+        manifest = json.load(f)
+    assert manifest["version"] == ingest.MANIFEST_VERSION
+    return {name: set(entry["chunks"]) for name, entry in manifest["files"].items()}
+
+
+def assert_consistent():
+    """Manifest, collection and BM25 artifact all describe the same chunks."""
+    ids = get_document_ids(PERSONA)
+    assert set().union(*manifest_chunks().values()) == set(ids)
+    index = bm25_index.load_index(PERSONA, expected_fingerprint=corpus_fingerprint(ids))
+    assert index is not None
+    assert sorted(index.ids) == sorted(ids)
+
+
+def test_first_run_ingests_everything(run_ingest):
+    write_raw("quotes.jsonl", QUOTES)
+    write_raw("letters.jsonl", LETTERS)
+    upserted = run_ingest()
+
+    assert len(upserted) == 5
+    assert stored_contents() == set(QUOTES + LETTERS)
+    assert set(manifest_chunks()) == {"quotes.jsonl", "letters.jsonl"}
+    assert_consistent()
+
+
+def test_unchanged_files_are_skipped(run_ingest):
+    write_raw("quotes.jsonl", QUOTES)
+    run_ingest()
+    before = manifest_chunks()
+
+    assert run_ingest() == []
+    assert manifest_chunks() == before
+    assert_consistent()
+
+
+def test_edited_file_upserts_changes_and_deletes_removed_chunks(run_ingest):
+    write_raw("quotes.jsonl", QUOTES)
+    write_raw("letters.jsonl", LETTERS)
+    run_ingest()
+
+    edited = [
+        QUOTES[0],
+        "Invert, always invert: think about what would make you succeed.",
+        "A brand new quote about reading every single day.",
+    ]
+    write_raw("quotes.jsonl", edited)
+    upserted = run_ingest()
+
+    assert len(upserted) == 2
+    assert stored_contents() == set(edited + LETTERS)
+    assert_consistent()
+    hits = bm25_index.bm25_search(PERSONA, "brand new quote", top_k=1)
+    assert hits[0]["content"] == edited[2]
+    assert bm25_index.bm25_search(PERSONA, "wiser", top_k=1) == []
+
+
+def test_removed_file_deletes_its_chunks(run_ingest):
+    write_raw("quotes.jsonl", QUOTES)
+    write_raw("letters.jsonl", LETTERS)
+    run_ingest()
+
+    (ingest.RAW_DATA_DIR / "letters.jsonl").unlink()
+    assert run_ingest() == []
+    assert stored_contents() == set(QUOTES)
+    assert set(manifest_chunks()) == {"quotes.jsonl"}
+    assert_consistent()
+
+
+def test_full_run_reembeds_and_still_deletes(run_ingest):
+    write_raw("quotes.jsonl", QUOTES)
+    run_ingest()
+
+    write_raw("quotes.jsonl", QUOTES[:2])
+    upserted = run_ingest("--full")
+
+    assert len(upserted) == 2
+    assert stored_contents() == set(QUOTES[:2])
+    assert_consistent()
+
+
+def test_missing_bm25_artifact_is_rebuilt(run_ingest):
+    write_raw("quotes.jsonl", QUOTES)
+    run_ingest()
+    bm25_index.save_index(PERSONA, bm25_index.build_index(["stale"], ["stale document"], [{}]))
+
+    write_raw("quotes.jsonl", QUOTES + ["One more quote so that the persona changes again."])
+    run_ingest()
+    assert_consistent()
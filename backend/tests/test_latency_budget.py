@@ -0,0 +1,191 @@
+import asyncio
+import math
+
+import pytest
+
+from app.config import get_settings
+from app.services import latency_budget, rag
+from app.services.latency_budget import LatencyBudget, record_stage_latency, stage_p95
+
+
+@pytest.fixture(autouse=True)
+def fresh_samples(monkeypatch):
+    monkeypatch.setattr(latency_budget, "_samples", {})
+
+
+def record(stage: str, *latencies: float):
+    for seconds in latencies:
+        record_stage_latency(stage, seconds)
+
+
+def test_p95_needs_enough_samples():
+    record("rerank", 0.1, 0.2, 0.3, 0.4)
+    assert stage_p95("rerank") is None
+    record("rerank", 0.5)
+    assert stage_p95("rerank") == 0.5
+    assert stage_p95("unknown") is None
+
+
+def test_p95_uses_recent_window():
+    record("rerank", *[10.0] * 100)
+    record("rerank", *[0.1] * 100)
+    assert stage_p95("rerank") == 0.1
+
+
+def test_allows_stage_that_fits_and_skips_one_that_does_not():
+    record("rerank", *[0.5] * 20)
+    budget = LatencyBudget(1000)
+    assert budget.allows("rerank")
+    assert not budget.allows("rerank", reserve=0.7)
+    assert not LatencyBudget(100).allows("rerank")
+
+
+def test_stage_without_history_allowed_while_time_remains():
+    assert LatencyBudget(1000).allows("rewrite")
+    assert not LatencyBudget(1000).allows("rewrite", reserve=2.0)
+
+
+def test_timeout_for_leaves_reserve():
+    budget = LatencyBudget(1000)
+    assert 0.4 < budget.timeout_for(reserve=0.5) <= 0.5
+    assert budget.timeout_for(reserve=5.0) == 0.0
+
+
+def test_probe_runs_skipped_stage():
+    record("rerank", *[5.0] * 20)
+    assert not LatencyBudget(1000, probe_rate=0.0).allows("rerank")
+
+    budget = LatencyBudget(1000, probe_rate=1.0)
+    assert budget.allows("rerank")
+    assert budget.report()["probes"] == ["rerank"]
+    # No time left at all: not even a probe
+    assert not budget.allows("rerank", reserve=2.0)
+
+
+def test_old_samples_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(latency_budget.time, "monotonic", lambda: now[0])
+    record("rerank", *[5.0] * 20)
+    assert not LatencyBudget(1000).allows("rerank")
+
+    now[0] += latency_budget._MAX_AGE + 1
+    assert stage_p95("rerank") is None
+    assert LatencyBudget(1000).allows("rerank")
+
+
+def test_cut_off_stage_counts_as_too_slow():
+    record("rerank", *[0.1] * 19)
+    record_stage_latency("rerank", 0.2, cut_off=True)
+    assert stage_p95("rerank") == math.inf
+    assert not LatencyBudget(10_000).allows("rerank")
+
+
+def test_timed_records_cut_off_optional_stage_only():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def main():
+        for stage, optional in (("rerank", True), ("retrieval", False)):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(rag._timed(stage, slow(), optional=optional), 0.01)
+
+    asyncio.run(main())
+    assert [seconds for _, seconds in latency_budget._samples["rerank"]] == [math.inf]
+    assert "retrieval" not in latency_budget._samples
+
+
+@pytest.fixture
+def sequential_pipeline(settings, monkeypatch):
+    monkeypatch.setenv("RETRIEVAL_MODE", "sequential")
+    monkeypatch.setenv("ENABLE_QUERY_REWRITE", "true")
+    monkeypatch.setenv("ENABLE_RERANKER", "false")
+    get_settings.cache_clear()
+
+    async def search(persona_id, query, top_k):
+        return [{"id": "doc", "content": query, "metadata": {}}]
+
+    monkeypatch.setattr(rag, "hybrid_search_async", search)
+
+
+def test_rewrite_error_is_recorded(sequential_pipeline, monkeypatch):
+    async def failing_rewrite(message, persona_name):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(rag, "rewrite_query", failing_rewrite)
+    budget = LatencyBudget(1000)
+    docs, rewritten = asyncio.run(rag._run_pipeline("persona", "Persona", "hello", budget))
+
+    assert rewritten is None
+    assert docs[0]["content"] == "hello"
+    assert budget.decisions == {"rewrite": "error"}
+
+
+def test_rewrite_timeout_is_recorded(sequential_pipeline, monkeypatch):
+    async def slow_rewrite(message, persona_name):
+        await asyncio.sleep(1)
+        return "rewritten"
+
+    monkeypatch.setattr(rag, "rewrite_query", slow_rewrite)
+    budget = LatencyBudget(50)
+    docs, rewritten = asyncio.run(rag._run_pipeline("persona", "Persona", "hello", budget))
+
+    assert rewritten is None
+    assert budget.decisions == {"rewrite": "timeout"}
+    assert [seconds for _, seconds in latency_budget._samples["rewrite"]] == [math.inf]
+
+
+def test_degraded_results_are_not_cached(sequential_pipeline, monkeypatch):
+    monkeypatch.setenv("ENABLE_SEMANTIC_CACHE", "true")
+    get_settings.cache_clear()
+    stored = []
+    cache = type("Cache", (), {
+        "lookup": lambda self, embedding, fingerprint: None,
+        "store": lambda self, *args: stored.append(args),
+    })()
+    monkeypatch.setattr(rag, "get_semantic_cache", lambda persona_id: cache)
+    monkeypatch.setattr(rag, "embed_query", lambda text: None)
+    monkeypatch.setattr(rag, "get_corpus_fingerprint", lambda persona_id: "fingerprint")
+
+    async def failing_rewrite(message, persona_name):
+        raise RuntimeError("provider down")
+
+    async def rewrite(message, persona_name):
+        return "rewritten"
+
+    monkeypatch.setattr(rag, "rewrite_query", failing_rewrite)
+    asyncio.run(rag.retrieve_context("persona", "Persona", "hello", LatencyBudget(1000)))
+    assert stored == []
+
+    monkeypatch.setattr(rag, "rewrite_query", rewrite)
+    asyncio.run(rag.retrieve_context("persona", "Persona", "hello", LatencyBudget(1000)))
+    assert len(stored) == 1
+
+
+def test_skipped_fanout_variants_are_never_created(settings, monkeypatch, recwarn):
+    monkeypatch.setenv("RETRIEVAL_MODE", "fanout")
+    monkeypatch.setenv("ENABLE_QUERY_REWRITE", "true")
+    monkeypatch.setenv("ENABLE_HYDE", "true")
+    monkeypatch.setenv("ENABLE_RERANKER", "false")
+    get_settings.cache_clear()
+    called = []
+
+    async def candidate_lists(persona_id, text, top_k, include_sparse=True):
+        return [[{"id": text, "content": text, "metadata": {}}]]
+
+    async def generate(message, persona_name):
+        called.append(message)
+        return message
+
+    monkeypatch.setattr(rag, "candidate_lists_async", candidate_lists)
+    monkeypatch.setattr(rag, "rewrite_query", generate)
+    monkeypatch.setattr(rag, "generate_hyde_document", generate)
+    record("rewrite", *[5.0] * 20)
+    record("hyde", *[5.0] * 20)
+
+    budget = LatencyBudget(1000)
+    docs, rewritten = asyncio.run(rag._run_pipeline("persona", "Persona", "hello", budget))
+
+    assert docs[0]["id"] == "hello" and rewritten is None
+    assert budget.decisions == {"rewrite": "skipped", "hyde": "skipped"}
+    assert called == []
+    assert not [w for w in recwarn if "never awaited" in str(w.message)]
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import get_settings
+from app.services import llm, llm_cache
+from app.services.llm_cache import CompletionCache
+
+
+@pytest.fixture
+def cache(tmp_path) -> CompletionCache:
+    return CompletionCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+
+
+def test_get_set_by_namespace(cache):
+    key = CompletionCache.make_key("model", [{"role": "user", "content": "hi"}], 0.0, 16)
+    assert cache.get("rerank", key) is None
+    cache.set("rerank", key, "answer")
+    assert cache.get("rerank", key) == "answer"
+    assert cache.get("judge", key) is None
+    cache.set("rerank", key, "newer")
+    assert cache.get("rerank", key) == "newer"
+    assert cache.stats() == {"rerank": 1}
+
+
+def test_key_depends_on_every_input():
+    messages = [{"role": "user", "content": "hi"}]
+    key = CompletionCache.make_key("model", messages, 0.0, 16)
+    assert key == CompletionCache.make_key("model", [dict(messages[0])], 0.0, 16)
+    assert key != CompletionCache.make_key("other", messages, 0.0, 16)
+    assert key != CompletionCache.make_key("model", [{"role": "user", "content": "hi!"}], 0.0, 16)
+    assert key != CompletionCache.make_key("model", messages, 0.5, 16)
+    assert key != CompletionCache.make_key("model", messages, 0.0, 32)
+
+
+def test_eviction_keeps_recently_used(cache, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: clock[0])
+    for i in range(10):
+        clock[0] += 1
+        cache.set("ns", str(i), f"value {i}")
+    clock[0] += 1
+    assert cache.get("ns", "0") == "value 0"  # now the most recently used
+
+    clock[0] += 1
+    cache.set("ns", "10", "value 10")
+
+    # Over max_entries: evicted down to 90% of it, least recently used first
+    assert cache.stats() == {"ns": 9}
+    assert cache.get("ns", "0") == "value 0"
+    assert cache.get("ns", "10") == "value 10"
+    assert cache.get("ns", "1") is None
+    assert cache.get("ns", "2") is None
+
+
+def test_table_is_only_counted_when_over_max_entries(tmp_path, monkeypatch):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"), max_entries=100)
+    evictions = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda conn: evictions.append(1) or evict(conn))
+    for i in range(300):
+        cache.set("ns", str(i), "value")
+    # Insert 101 evicts down to 90, then every 11th insert goes over again
+    assert len(evictions) == 19
+    assert cache.stats() == {"ns": cache._count} == {"ns": 91}
+
+
+def test_count_survives_reopen_and_clear(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = CompletionCache(path, max_entries=10)
+    for i in range(8):
+        first.set("a" if i % 2 else "b", str(i), "value")
+    second = CompletionCache(path, max_entries=10)
+    assert second._count == 8
+
+    second.clear("a")
+    assert second._count == 4
+    assert second.stats() == {"b": 4}
+    second.clear()
+    assert second.stats() == {}
+
+
+def test_concurrent_writers_stay_bounded(cache):
+    def write(thread: int):
+        for i in range(50):
+            cache.set("ns", f"{thread}-{i}", "value")
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(cache.stats().values()) <= 10
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=2)
+        message = SimpleNamespace(content=f"reply {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def test_chat_completion_served_from_cache(settings, monkeypatch):
+    monkeypatch.setenv("ENABLE_LLM_CACHE", "true")
+    get_settings.cache_clear()
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    client = FakeClient()
+    monkeypatch.setattr(llm, "get_llm_client", lambda: client)
+    messages = [{"role": "user", "content": "rewrite this"}]
+
+    async def main():
+        with llm.track_usage() as usage:
+            first = await llm.chat_completion(messages, cache_namespace="query_rewrite")
+            second = await llm.chat_completion(messages, cache_namespace="query_rewrite")
+            uncached = await llm.chat_completion(messages)
+        return first, second, uncached, usage
+
+    first, second, uncached, usage = asyncio.run(main())
+    assert (first, second, uncached) == ("reply 1", "reply 1", "reply 2")
+    assert client.calls == 2
+    assert (usage.calls, usage.cached_calls) == (2, 1)